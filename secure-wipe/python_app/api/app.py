@@ -1,10 +1,15 @@
-from flask import Flask
+import time
+from flask import Flask, Response, g, request
 from .routes import bp as routes_bp
 from .models import WipeRequest, CertVerifyRequest
+from ..src.logging_config import setup_logging
+from ..src import metrics as app_metrics
+from ..src.metrics import HTTP_LATENCY, HTTP_REQUESTS
 from ..src.utils import load_config
 
 app = Flask(__name__)
 config = load_config()
+setup_logging(config['logging'])
 
 app.register_blueprint(routes_bp, url_prefix='/api/v1')
 
@@ -12,7 +17,38 @@ app.register_blueprint(routes_bp, url_prefix='/api/v1')
 def home():
     return {"message": "Secure Wipe API", "version": "0.1.0"}
 
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    start = g.pop('request_start', None)
+    if start is None:
+        return response
+    elapsed = time.perf_counter() - start
+    endpoint = request.endpoint or 'unmatched'  # Route names keep label cardinality bounded
+    HTTP_LATENCY.observe(elapsed, endpoint=endpoint)
+    HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    if config['metrics']['timing_header']:
+        response.headers['Server-Timing'] = f'app;dur={elapsed * 1000:.2f}'
+    return response
+
+if config['metrics']['enabled']:
+    @app.route('/metrics')
+    def metrics():
+        # Summed across server workers once serve has shared the registry
+        return Response(app_metrics.exposition(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
+    import sys
+    if '--profile-startup' in sys.argv:
+        from ..src.startup import report
+        report(__spec__.name)
+        sys.exit(0)
+    if '--dev' not in sys.argv:
+        from .serve import main
+        sys.exit(main())
     host = config['api']['host']
     port = config['api']['port']
-    app.run(host=host, port=port, debug=True)
\ No newline at end of file
+    app.run(host=host, port=port, debug=True)  # Development server with the reloader
\ No newline at end of file
@@ -1,11 +1,16 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class WipeRequest(BaseModel):
     devices: List[str]
-    passes: Optional[int] = 3
+    passes: Optional[int] = 3  # Only used when `method` is not a registered method
     method: Optional[str] = "DoD 3-Pass"
+    chunk_size: Optional[int] = None  # Engine write size in bytes (default from config)
+    direct_io: Optional[bool] = None  # Use O_DIRECT where supported (default from config)
+    verify: Optional[Literal['none', 'sample', 'full']] = None  # Read-back mode (default from config)
+    verify_fraction: Optional[float] = Field(None, gt=0, le=1)  # Coverage for 'sample'
+    resume: bool = False  # Continue an interrupted wipe from its last checkpoint
 
 class CertData(BaseModel):
     device_id: str
@@ -13,9 +18,21 @@ class CertData(BaseModel):
     timestamp: datetime
     status: str = "Completed"
 
+class MerkleProofStep(BaseModel):
+    side: str
+    hash: str
+
+class MerkleProof(BaseModel):
+    root: str
+    proof: List[MerkleProofStep]
+
 class CertVerifyRequest(BaseModel):
     json_data: str
     signature_hex: str
+    merkle: Optional[MerkleProof] = None  # Present for batch-signed certs
+
+class CompactVerifyRequest(BaseModel):
+    payload: str  # Scanned QR text ('SW:' + base45)
 
 class WipeResponse(BaseModel):
     status: str
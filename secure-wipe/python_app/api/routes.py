@@ -1,69 +1,396 @@
-from flask import Blueprint, request, jsonify
+import json
+import queue
+import threading
+import time
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from pydantic import ValidationError
-import secure_wipe_engine as engine
-from ..src.cert_gen import CertificateGenerator
-from ..src.utils import log_message, parse_device_path
-from .models import WipeRequest, CertVerifyRequest
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import ec
-from cryptography.exceptions import InvalidSignature
+from ..src.cert_gen import CertificateGenerator, verify_cert_signature
+from ..src.cert_store import CertStore
+from ..src.compact import decode_payload
+from ..src.checkpoint import CheckpointJournal
+from ..src.devices import DeviceInventory
+from ..src.jobs import JobManager, JobStore, RunnerLock
+from ..src.logstore import get_log_store, parse_timestamp
+from ..src.methods import get_method
+from ..src.pipeline import wipe_and_certify
+from ..src.progress import ProgressBroker, ProgressTracker, WipeCancelled
+from ..src.scheduler import DeviceScheduler
+from ..src.utils import load_config, load_public_key, log_message, parse_device_path
+from ..src.verifier import BulkVerifier
+from .models import WipeRequest, CertVerifyRequest, CompactVerifyRequest
 
 bp = Blueprint('routes', __name__)
-gen = CertificateGenerator()
+config = load_config()
+gen = CertificateGenerator()  # Keys are read on first use
+progress = ProgressBroker()
+
+# SQLite stores, pools and watchers are created on first use, so importing the
+# API (the gunicorn master, --profile-startup, tests) opens no files
+_shared = {}
+_shared_lock = threading.RLock()
+
+def _shared_instance(name, factory):
+    instance = _shared.get(name)
+    if instance is None:
+        with _shared_lock:
+            instance = _shared.get(name)
+            if instance is None:
+                instance = _shared[name] = factory()
+    return instance
+
+def get_scheduler():
+    return _shared_instance('scheduler', lambda: DeviceScheduler(**config['scheduler']))
+
+def _make_jobs():
+    manager = JobManager(
+        max_workers=config['jobs']['max_concurrent_wipes'], scheduler=get_scheduler(),
+        store=JobStore(config['jobs']['store']),
+        progress_interval=config['jobs']['progress_interval'],
+        keep_finished=config['jobs']['keep_finished']
+    )
+    manager.add_listener(lambda job: progress.finish(job.id))
+    return manager
+
+def get_jobs():
+    return _shared_instance('jobs', _make_jobs)
+
+def get_inventory():
+    return _shared_instance('inventory', lambda: DeviceInventory(**config['devices']))
+
+def get_journal():
+    return _shared_instance('journal', lambda: CheckpointJournal(config['checkpoint']['path']))
+
+def get_cert_store():
+    return _shared_instance('cert_store', lambda: CertStore(**config['certs']))
+
+def get_verifier():
+    return _shared_instance('verifier', lambda: BulkVerifier(
+        config['keys']['public_path'],
+        max_workers=config['verify']['workers'],
+        chunk_size=config['verify']['chunk_size']
+    ))
+
+def _wipe_one(job, device, data):
+    parsed = parse_device_path(device)
+    tracker = ProgressTracker(parsed)
+    method = get_method(data.method, data.passes)
+    jobs, scheduler = get_jobs(), get_scheduler()
+    def on_progress(event):
+        if jobs.stopping.is_set():
+            raise WipeCancelled(parsed)  # Server is draining; the journal keeps the checkpoint
+        event = tracker.update(event)
+        scheduler.observe(device, event['bytes_written'])
+        progress.publish(job.id, event)
+        jobs.record_progress(job, device, event)  # For SSE clients served by other workers
+    disk = get_inventory().get(parsed)
+    try:
+        result = wipe_and_certify(
+            parsed, method, gen, on_progress, store=get_cert_store(), journal=get_journal(),
+            resume=data.resume, serial=disk.serial if disk else None,
+            chunk_size=data.chunk_size, direct_io=data.direct_io,
+            verify=data.verify, verify_fraction=data.verify_fraction
+        )
+    except Exception as e:
+        log_message('ERROR', 'Wipe failed on %s: %s', parsed, e, device=parsed)
+        raise
+    log_message('INFO', 'Wipe completed: %s', parsed, device=parsed)
+    return result
+
+def _job_func(params, resume=False):
+    # Rebuilds a stored job's work when another server process hands it over
+    data = WipeRequest(**{**params, 'resume': params.get('resume') or resume})
+    return lambda job, device: _wipe_one(job, device, data)
+
+def start_jobs(lock_path=None, interval=1.0):
+    """Pick up stored jobs when serving in production.
+
+    With lock_path (several worker processes) wipes run only in the process
+    holding it; without, this process runs them, starting with any an
+    earlier run left unfinished.
+    """
+    if lock_path is None:
+        get_jobs().adopt(_job_func)
+    else:
+        get_jobs().elect(RunnerLock(lock_path), _job_func, interval)
+
+def drain(timeout=None):
+    """Interrupt running wipes for a later resume and release worker pools."""
+    jobs, verifier = _shared.get('jobs'), _shared.get('verifier')
+    drained = jobs.drain(timeout) if jobs is not None else True
+    if verifier is not None:
+        verifier.shutdown()
+    return drained
+
+def _ndjson_lines(stream):
+    # Non-blank lines of a request body, read as they arrive rather than buffered
+    for line in stream:
+        if line.strip():
+            yield line
+
+def _parse(model, raw):
+    # NDJSON lines are validated straight from their bytes, without an intermediate dict
+    if isinstance(raw, bytes):
+        return model.model_validate_json(raw)
+    return model.model_validate(raw)
+
+MAX_PAGE_SIZE = 1000
+
+def _page_limit(args, default=100):
+    # 0 would leave no row for the cursor and a negative value lifts SQLite's LIMIT
+    try:
+        limit = int(args.get('limit', default))
+    except ValueError:
+        raise ValueError('limit must be an integer') from None
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+    return limit
+
+def _queue_wipe(data):
+    get_method(data.method, data.passes)  # Reject bad pass counts before queueing
+    job = get_jobs().submit(
+        data.devices, lambda job, device: _wipe_one(job, device, data),
+        params=data.model_dump()
+    )
+    log_message('INFO', 'Bulk wipe queued as job %s: %s', job.id, data.devices)
+    return job
+
+def _queue_wipe_lines(lines):
+    for index, line in enumerate(lines):
+        try:
+            job = _queue_wipe(_parse(WipeRequest, line))
+            result = {'index': index, 'status': 'queued', 'job_id': job.id}
+        except (ValidationError, ValueError) as e:
+            result = {'index': index, 'error': str(e)}
+        yield json.dumps(result) + '\n'
 
 @bp.route('/wipe', methods=['POST'])
 def wipe_devices():
+    """Queue a wipe job.
+
+    An NDJSON body (one wipe request per line) queues a job per line as the
+    body arrives; results stream back as NDJSON lines {"index", "status",
+    "job_id"} or {"index", "error"}.
+    """
+    if request.mimetype == 'application/x-ndjson':
+        lines = _ndjson_lines(request.stream)
+        return Response(stream_with_context(_queue_wipe_lines(lines)),
+                        mimetype='application/x-ndjson')
     try:
-        data = WipeRequest(**request.json)
-        wiped = []
-        certs = []
-        for device in data.devices:
-            parsed = parse_device_path(device)
-            engine.wipe_device(parsed, data.passes)
-            engine.handle_hpa_dco(parsed)
-            wiped.append(parsed)
-            cert_files = gen.generate_full_cert(device, data.method)
-            certs.extend(list(cert_files.values()))
-        log_message('INFO', f'Bulk wipe completed: {wiped}')
-        return jsonify({
-            'status': 'success',
-            'wiped_devices': wiped,
-            'cert_files': certs
-        })
-    except ValidationError as e:
+        job = _queue_wipe(_parse(WipeRequest, request.get_data()))
+        return jsonify({'status': 'queued', 'job_id': job.id}), 202
+    except (ValidationError, ValueError) as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        log_message('ERROR', f'Wipe failed: {e}')
+        log_message('ERROR', 'Wipe failed: %s', e)
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/devices', methods=['GET'])
+def list_devices():
+    inventory = get_inventory()
+    inventory.refresh()  # Directory listing only; known disks are not re-read
+    return jsonify({'devices': [d.to_dict() for d in inventory.devices()]})
+
+@bp.route('/scheduler', methods=['GET'])
+def scheduler_status():
+    return jsonify({'groups': get_scheduler().groups()})
+
+@bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    return jsonify({'jobs': [job.to_dict() for job in get_jobs().list()]})
+
+@bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = get_jobs().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@bp.route('/wipe/<job_id>/events', methods=['GET'])
+def wipe_events(job_id):
+    jobs = get_jobs()
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    # The process running the job publishes to its broker; other workers follow the job store
+    stream = _local_events(jobs, job) if jobs.is_local(job_id) else _stored_events(jobs, job_id)
+    return Response(stream, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Seconds between job store reads for jobs another worker runs
+STORE_POLL_INTERVAL = 1.0
+
+def _progress_frame(event):
+    return f"event: progress\ndata: {json.dumps(event)}\n\n"
+
+def _done_frame(job):
+    return f"event: done\ndata: {json.dumps(job.to_dict())}\n\n"
+
+def _local_events(jobs, job):
+    q = progress.subscribe(job.id)
+    idle = 0
+    try:
+        while True:
+            try:
+                event = q.get(timeout=1)
+            except queue.Empty:
+                if job.done.is_set() or jobs.stopping.is_set():
+                    break
+                idle += 1
+                if idle % 15 == 0:
+                    yield ': keepalive\n\n'
+                continue
+            yield _progress_frame(event)
+        yield _done_frame(job)
+    finally:
+        progress.unsubscribe(job.id, q)
+
+def _stored_events(jobs, job_id):
+    seen = {}
+    idle = 0
+    while True:
+        # State before progress, so the final events are sent before `done`
+        job = jobs.get(job_id)
+        for device, event in jobs.store.progress(job_id).items():
+            if seen.get(device) != event:
+                seen[device] = event
+                idle = 0
+                yield _progress_frame(event)
+        if job.done.is_set() or jobs.stopping.is_set():
+            break
+        idle += 1
+        if idle * STORE_POLL_INTERVAL >= 15:
+            idle = 0
+            yield ': keepalive\n\n'
+        time.sleep(STORE_POLL_INTERVAL)
+    yield _done_frame(job)
+
 @bp.route('/logs', methods=['GET'])
 def get_logs():
-    # Placeholder: In production, read from file/DB
-    logs = [
-        {'timestamp': '2023-10-01T12:00:00', 'level': 'INFO', 'message': 'App started'},
-        {'timestamp': '2023-10-01T12:05:00', 'level': 'INFO', 'message': 'Wipe completed on /dev/sda'}
-    ]
-    return jsonify({'logs': logs})
+    """Newest-first audit log with cursor pagination.
+
+    Filters: device, level, since/until (ISO 8601 or epoch seconds).
+    Pass the returned next_cursor as `cursor` for the next page;
+    format=ndjson (or Accept: application/x-ndjson) streams every match.
+    """
+    args = request.args
+    filters = {key: args[key] for key in ('device', 'level', 'since', 'until') if key in args}
+    store = get_log_store()
+    try:
+        for key in ('since', 'until'):
+            if key in filters:
+                filters[key] = parse_timestamp(filters[key])  # Fail before streaming starts
+        if args.get('format') == 'ndjson' or request.accept_mimetypes.best == 'application/x-ndjson':
+            lines = (json.dumps(entry) + '\n' for entry in store.iter_all(**filters))
+            return Response(lines, mimetype='application/x-ndjson')
+        logs, next_cursor = store.query(limit=_page_limit(args), cursor=args.get('cursor'), **filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'logs': logs, 'next_cursor': next_cursor})
+
+@bp.route('/certs', methods=['GET'])
+def list_certs():
+    """Newest-first certificate index with cursor pagination.
+
+    Filters: device, serial, method, signature (hex), since/until
+    (ISO 8601 or epoch seconds). Pass next_cursor back as `cursor`.
+    """
+    args = request.args
+    filters = {key: args[key] for key in ('device', 'serial', 'method', 'signature', 'since', 'until')
+               if key in args}
+    try:
+        certs, next_cursor = get_cert_store().query(limit=_page_limit(args), cursor=args.get('cursor'), **filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'certs': certs, 'next_cursor': next_cursor})
+
+@bp.route('/certs/<cert_id>', methods=['GET'])
+def get_cert(cert_id):
+    cert_store = get_cert_store()
+    record = cert_store.get(cert_id)
+    if record is None:
+        return jsonify({'error': 'Certificate not found'}), 404
+    return jsonify({**record, 'certificate': cert_store.document(cert_id)})
+
+@bp.route('/certs/<cert_id>/<artifact>', methods=['GET'])
+def get_cert_artifact(cert_id, artifact):
+    """Download one artifact: pdf, qr or json (PDF/QR are rendered on first request)."""
+    found = get_cert_store().load(cert_id, artifact)
+    if found is None:
+        return jsonify({'error': 'Certificate artifact not found'}), 404
+    content, mimetype = found
+    return Response(content, mimetype=mimetype, headers={'Cache-Control': 'max-age=31536000, immutable'})
 
 @bp.route('/verify_cert', methods=['POST'])
 def verify_cert():
     try:
-        data = CertVerifyRequest(**request.json)
-        # Load public key (assume from config or upload)
-        from ..src.utils import load_config
-        config = load_config()
-        with open(config['keys']['public_path'], 'rb') as f:
-            public_key = serialization.load_pem_public_key(f.read())
+        data = _parse(CertVerifyRequest, request.get_data())
+        public_key = load_public_key(config['keys']['public_path'])
         signature = bytes.fromhex(data.signature_hex)
-        is_valid = public_key.verify(
-            signature, data.json_data.encode(), ec.ECDSA(hashes.SHA256())
-        )
-        return jsonify({'valid': is_valid, 'message': 'Verified' if is_valid else 'Tampered'})
-    except InvalidSignature:
-        return jsonify({'valid': False, 'message': 'Invalid signature'}), 400
+        merkle = data.merkle.model_dump() if data.merkle else None
+        if not verify_cert_signature(public_key, data.json_data, signature, merkle):
+            return jsonify({'valid': False, 'message': 'Invalid signature'}), 400
+        return jsonify({'valid': True, 'message': 'Verified'})
+    except (ValidationError, ValueError) as e:
+        # Malformed request, signature hex or Merkle proof
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/verify_cert/compact', methods=['POST'])
+def verify_cert_compact():
+    """Verify a scanned compact QR payload against the stored certificate it names."""
+    try:
+        data = _parse(CompactVerifyRequest, request.get_data())
+        cert_id = decode_payload(data.payload)['cert_id']
+    except (ValidationError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    document = get_cert_store().document(cert_id)
+    if document is None:
+        return jsonify({'valid': False, 'cert_id': cert_id, 'message': 'Certificate not found'}), 404
+    if not gen.verify_compact(data.payload, document):
+        return jsonify({'valid': False, 'cert_id': cert_id, 'message': 'Invalid signature'}), 400
+    return jsonify({'valid': True, 'cert_id': cert_id, 'certificate': document})
+
+def _verify_items(raw_items):
+    for raw in raw_items:
+        try:
+            data = _parse(CertVerifyRequest, raw)
+        except ValidationError as e:
+            yield {'error': str(e)}
+            continue
+        yield {
+            'json_data': data.json_data,
+            'signature_hex': data.signature_hex,
+            'merkle': data.merkle.model_dump() if data.merkle else None,
+        }
+
+@bp.route('/verify_cert/batch', methods=['POST'])
+def verify_cert_batch():
+    """Verify many certs; accepts a JSON list (or {"certs": [...]}) or NDJSON.
+
+    Results stream back as NDJSON lines {"index", "valid"[, "error"]} in input
+    order. NDJSON bodies are read and verified as they arrive, so memory use
+    does not grow with the batch; a malformed line only fails its own item.
+    """
+    if request.mimetype == 'application/x-ndjson':
+        raw_items = _ndjson_lines(request.stream)
+    else:
+        try:
+            body = request.get_json()
+            raw_items = body.get('certs', []) if isinstance(body, dict) else body
+            if not isinstance(raw_items, list):
+                raise ValueError('Expected a list of certificates')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    def stream():
+        results = get_verifier().verify_iter(_verify_items(raw_items))
+        for index, result in enumerate(results):
+            yield json.dumps({'index': index, **result}) + '\n'
+
+    return Response(stream_with_context(stream()), mimetype='application/x-ndjson')
+
 @bp.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Endpoint not found'}), 404
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""
+Production serving for the API: gunicorn with `serve.workers` processes of
+`serve.threads` request threads each, replacing the Flask dev server.
+
+Heavy modules, the config and the signing keys are loaded once in the master
+and frozen out of the garbage collector before forking, so workers share
+those pages copy-on-write. The app itself (SQLite connections, logging and
+verifier threads) is created in each worker after the fork. Wipe jobs are
+shared through the job store and run only in the worker holding the jobs
+lock. On SIGTERM a worker finishes in-flight requests within
+`serve.graceful_timeout`, and its wipes stop at the next progress event
+for the next lock holder to resume. Workers write their metrics to
+`metrics.shared_dir`, so GET /metrics on any worker reports the sum.
+
+Where gunicorn is not available (Windows), one threaded process serves.
+"""
+
+import gc
+import importlib
+import signal
+import sys
+from ..src import metrics
+from ..src.logging_config import get_logger
+from ..src.utils import load_config, load_private_key, load_public_key
+
+# Imported in the master before forking; relative names resolve against this package
+PRELOAD_MODULES = (
+    'flask', 'pydantic', 'yaml',
+    'cryptography.hazmat.primitives.asymmetric.ec', 'cryptography.hazmat.primitives.serialization',
+    'reportlab.pdfgen.canvas', 'qrcode',
+    '.models', '..src.cert_gen', '..src.cert_store', '..src.compact', '..src.verifier',
+)
+
+_log = get_logger('serve')
+
+
+def preload(config):
+    """Import heavy modules and parse the keys so forked workers inherit them."""
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name, __package__)
+    for load, path in ((load_public_key, config['keys']['public_path']),
+                       (load_private_key, config['keys']['private_path'])):
+        try:
+            load(path)
+        except FileNotFoundError:
+            pass  # e.g. verification-only hosts have no signing key; workers report it on use
+    gc.collect()
+    gc.freeze()  # Keep the GC from touching (and so copying) preloaded objects in workers
+
+
+def gunicorn_options(config):
+    serve = config['serve']
+    return {
+        'bind': f"{config['api']['host']}:{config['api']['port']}",
+        'workers': serve['workers'],
+        'threads': serve['threads'],
+        'worker_class': 'gthread',
+        'timeout': serve['timeout'],
+        'graceful_timeout': serve['graceful_timeout'],
+        'max_requests': serve['max_requests'],
+        'preload_app': False,  # The app holds connections and threads that must not cross a fork
+        'post_worker_init': _post_worker_init,
+        'worker_exit': _worker_exit,
+    }
+
+
+def _routes():
+    return importlib.import_module('.routes', __package__)
+
+
+def _post_worker_init(worker):
+    config = load_config()
+    serve = config['serve']
+    metrics.share(config['metrics']['shared_dir'], config['metrics']['sync_interval'])
+    routes = _routes()
+    routes.start_jobs(serve['jobs_lock'], serve['jobs_poll'])
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def on_term(signum, frame):
+        routes.get_jobs().stopping.set()  # Wipes stop now rather than after in-flight requests
+        if callable(previous):
+            previous(signum, frame)
+
+    signal.signal(signal.SIGTERM, on_term)
+
+
+def _worker_exit(server, worker):
+    routes = _routes()
+    if not routes.drain(timeout=load_config()['serve']['graceful_timeout']):
+        _log.warning('Worker %s exited with wipes still running', worker.pid)
+    metrics.unshare()
+    from ..src.logging_config import flush_logging
+    flush_logging()
+
+
+def _serve_gunicorn(config):
+    from gunicorn.app.base import BaseApplication
+    metrics.SharedMetrics.reset(config['metrics']['shared_dir'])  # Counters start at zero per server run
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in gunicorn_options(config).items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from .app import app
+            return app
+
+    Application().run()
+
+
+def _serve_threaded(config):
+    # Single process: it is always the job runner and adopts work left by earlier runs
+    import threading
+    from werkzeug.serving import make_server
+    from .app import app
+    routes = _routes()
+    routes.start_jobs()
+    server = make_server(config['api']['host'], config['api']['port'], app, threaded=True)
+
+    def on_term(signum, frame):
+        routes.get_jobs().stopping.set()
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, on_term)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    routes.drain(timeout=config['serve']['graceful_timeout'])
+
+
+def main():
+    config = load_config()
+    preload(config)
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        _log.warning('gunicorn is not installed; serving from one threaded process')
+        _serve_threaded(config)
+    else:
+        _serve_gunicorn(config)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
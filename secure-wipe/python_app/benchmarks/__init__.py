@@ -0,0 +1,6 @@
+"""
+Benchmarks for the wipe engine, certificate issuance and the API.
+Run from python_app/:
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --baseline baseline.json   (exit 1 on regression)
+"""
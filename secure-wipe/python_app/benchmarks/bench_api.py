@@ -0,0 +1,54 @@
+"""
+API load through the Flask test client: /api/v1/verify_cert latency and
+/api/v1/wipe enqueue latency plus end-to-end job throughput. The engine is
+replaced by an instant stub so this measures the request, job and
+certificate path rather than disk speed.
+"""
+
+import tempfile
+import time
+from unittest.mock import patch
+from .bench_certs import bench_generator
+from .harness import HIGHER, latency_results, result, timed
+
+ENGINE_RESULT = {'patterns': ['fixed:00'], 'verify_mode': 'sample', 'sectors_checked': 8}
+
+
+def run(requests=200):
+    from api.app import app
+    import api.routes as routes
+    from src.cert_store import CertStore
+
+    gen = bench_generator()
+    json_str, sig = gen.sign_data(gen.generate_data('/dev/sdb', 'DoD 5220.22-M 3-Pass'))
+    body = {'json_data': json_str, 'signature_hex': sig.hex()}
+    app.config['TESTING'] = True
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix='api-bench-') as root, \
+            patch.object(routes, 'gen', gen), \
+            patch.object(routes, 'cert_store', CertStore(root, lazy_render=True)), \
+            patch.object(routes, 'load_public_key', return_value=gen.public_key), \
+            patch('src.engine.wipe_device', return_value=ENGINE_RESULT), \
+            patch('src.engine.handle_hpa_dco'), \
+            app.test_client() as client:
+
+        def verify():
+            assert client.post('/api/v1/verify_cert', json=body).status_code == 200
+        results.update(latency_results('api.verify_cert', timed(verify, repeat=requests)))
+
+        counter = iter(range(requests + 2))
+        job_ids = []
+        def wipe():
+            response = client.post('/api/v1/wipe', json={
+                'devices': [f'/dev/bench{next(counter)}'], 'method': 'Zero Fill'
+            })
+            assert response.status_code == 202
+            job_ids.append(response.get_json()['job_id'])
+        start = time.perf_counter()
+        results.update(latency_results('api.wipe_enqueue', timed(wipe, repeat=requests)))
+        for job_id in job_ids:
+            routes.get_jobs().wait(job_id, timeout=60)
+        elapsed = time.perf_counter() - start
+        results['api.wipe_jobs_per_sec'] = result(len(job_ids) / elapsed, 'jobs/s', HIGHER)
+    return results
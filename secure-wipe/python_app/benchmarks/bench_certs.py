@@ -0,0 +1,52 @@
+"""
+Certificate issuance: sign, PDF render, QR render, verify and store put,
+each timed on its own with a throwaway key.
+"""
+
+import tempfile
+from .harness import latency_results, timed
+
+EXTRA = {
+    'serial': 'WD-WCC4N1234567',
+    'passes': ['0x00', '0xFF', 'random'],
+    'verification': {'mode': 'sample', 'sectors_checked': 20480},
+}
+
+
+def bench_generator():
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from src.cert_gen import CertificateGenerator
+    gen = CertificateGenerator()  # Keys are read lazily; replace them before first use
+    gen.private_key = ec.generate_private_key(ec.SECP384R1())
+    gen.public_key = gen.private_key.public_key()
+    return gen
+
+
+def run(repeat=50):
+    from src.cert_gen import qr_payload, render_pdf, render_qr
+    from src.cert_store import CertStore
+    from src.compact import cert_document
+
+    gen = bench_generator()
+    data = gen.generate_data('/dev/sdb', 'DoD 5220.22-M 3-Pass', extra=EXTRA)
+    json_str, sig = gen.sign_data(data)
+    payload = qr_payload(json_str, sig)
+    document = cert_document(json_str, sig)
+
+    results = {}
+    results.update(latency_results('cert.sign', timed(lambda: gen.sign_data(data), repeat)))
+    results.update(latency_results('cert.render_pdf', timed(lambda: render_pdf(data), repeat)))
+    results.update(latency_results('cert.render_qr', timed(lambda: render_qr(payload), repeat)))
+    results.update(latency_results('cert.verify', timed(lambda: gen.verify_signature(json_str, sig), repeat)))
+    results.update(latency_results('cert.verify_compact',
+                                   timed(lambda: gen.verify_compact(payload, document), repeat)))
+
+    signed = [gen.sign_data(gen.generate_data(f'/dev/sd{i}', 'Zero Fill', extra=EXTRA))
+              for i in range(repeat + 2)]
+    with tempfile.TemporaryDirectory(prefix='cert-bench-') as root:
+        store = CertStore(root, lazy_render=True)
+        pending = iter(signed)
+        results.update(latency_results('cert.store_put', timed(lambda: store.put(*next(pending)), repeat)))
+        store.close()
+    return results
+
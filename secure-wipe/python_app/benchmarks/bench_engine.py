@@ -0,0 +1,67 @@
+"""
+Engine throughput: secure_wipe_engine.wipe_device over sparse files (and,
+with --loop as root, loop devices backed by them) for several sizes and
+chunk sizes. Reports MB/s of overwrite plus read-back.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from .harness import HIGHER, result
+
+MiB = 1024 * 1024
+
+
+def _sparse_file(directory, size):
+    fd, path = tempfile.mkstemp(dir=directory, suffix='.img')
+    os.ftruncate(fd, size)
+    os.close(fd)
+    return path
+
+
+def _attach_loop(path):
+    return subprocess.run(['losetup', '--find', '--show', path], check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+
+def _detach_loop(device):
+    subprocess.run(['losetup', '--detach', device], check=False)
+
+
+def loop_available():
+    return os.geteuid() == 0 and shutil.which('losetup') is not None
+
+
+def run(sizes_mib=(64, 256), chunk_sizes_mib=(1, 4, 16), passes=1, verify='sample',
+        direct_io=True, loop=False, workdir=None, repeat=3):
+    import secure_wipe_engine
+    results = {}
+    targets = ['file'] + (['loop'] if loop and loop_available() else [])
+    with tempfile.TemporaryDirectory(dir=workdir, prefix='wipe-bench-') as directory:
+        for size_mib in sizes_mib:
+            backing = _sparse_file(directory, size_mib * MiB)
+            for target in targets:
+                path = _attach_loop(backing) if target == 'loop' else backing
+                try:
+                    for chunk_mib in chunk_sizes_mib:
+                        best = None
+                        for _ in range(repeat):
+                            start = time.perf_counter()
+                            secure_wipe_engine.wipe_device(
+                                path, passes, None, chunk_size=chunk_mib * MiB,
+                                direct_io=direct_io, verify=verify
+                            )
+                            elapsed = time.perf_counter() - start
+                            best = elapsed if best is None else min(best, elapsed)
+                        name = f'engine.{target}.{size_mib}MiB.chunk{chunk_mib}MiB.mbps'
+                        results[name] = result(
+                            size_mib * MiB * passes / best / 1e6, 'MB/s', HIGHER,
+                            passes=passes, verify=verify, direct_io=direct_io
+                        )
+                finally:
+                    if target == 'loop':
+                        _detach_loop(path)
+            os.unlink(backing)
+    return results
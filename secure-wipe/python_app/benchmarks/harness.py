@@ -0,0 +1,94 @@
+"""
+Timing helpers, result format and baseline comparison for the benchmarks.
+
+A result file is JSON:
+    {"meta": {...}, "results": {"<name>": {"value": 123.4, "unit": "MB/s",
+                                           "better": "higher", ...}}}
+Every result says which direction is better, so comparison needs no
+per-benchmark knowledge.
+"""
+
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+HIGHER = 'higher'
+LOWER = 'lower'
+
+
+def timed(fn, repeat=20, warmup=2):
+    """Run fn() warmup + repeat times; returns the measured durations in seconds."""
+    for _ in range(warmup):
+        fn()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def latency_results(name, durations):
+    """ops/s plus p50/p95 latency (ms) for one operation."""
+    return {
+        f'{name}.ops_per_sec': result(len(durations) / sum(durations), 'ops/s', HIGHER),
+        f'{name}.p50_ms': result(statistics.median(durations) * 1000, 'ms', LOWER),
+        f'{name}.p95_ms': result(percentile(durations, 95) * 1000, 'ms', LOWER),
+    }
+
+
+def result(value, unit, better, **extra):
+    return {'value': round(value, 4), 'unit': unit, 'better': better, **extra}
+
+
+def report(results, meta=None):
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            **(meta or {}),
+        },
+        'results': results,
+    }
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(current, baseline, tolerance=0.15):
+    """Compare result dicts; returns rows (name, base, value, change, regressed).
+
+    A benchmark regresses when it moves in the wrong direction by more than
+    `tolerance` (a fraction). Benchmarks missing from either side are skipped.
+    """
+    rows = []
+    for name in sorted(set(current) & set(baseline)):
+        base = baseline[name]['value']
+        value = current[name]['value']
+        change = (value - base) / base if base else 0.0
+        if current[name]['better'] == HIGHER:
+            regressed = change < -tolerance
+        else:
+            regressed = change > tolerance
+        rows.append((name, base, value, change, regressed))
+    return rows
+
+
+def print_comparison(rows, file=None):
+    file = file or sys.stdout
+    print(f'{"benchmark":<48} {"baseline":>12} {"current":>12} {"change":>8}', file=file)
+    for name, base, value, change, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f'{name:<48} {base:>12.2f} {value:>12.2f} {change:>+8.1%}{flag}', file=file)
@@ -0,0 +1,88 @@
+"""
+Benchmark runner: runs the selected suites, writes a JSON result file and
+optionally fails when results regress against a baseline.
+"""
+
+import argparse
+import json
+import sys
+from . import harness
+
+SUITES = ('engine', 'certs', 'api')
+
+
+def _ints(text):
+    return tuple(int(part) for part in text.split(','))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description=__doc__)
+    parser.add_argument('--suite', default=','.join(SUITES),
+                        help=f'Comma-separated suites to run ({", ".join(SUITES)})')
+    parser.add_argument('--quick', action='store_true', help='Small sizes and few repeats (smoke test)')
+    parser.add_argument('--output', help='Write results JSON here')
+    parser.add_argument('--baseline', help='Compare against this results JSON; exit 1 on regression')
+    parser.add_argument('--compare', metavar='RESULTS',
+                        help='Compare an existing results file with --baseline instead of running')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Allowed change in the wrong direction before failing (fraction)')
+    parser.add_argument('--sizes', type=_ints, default=(64, 256), help='Engine target sizes in MiB')
+    parser.add_argument('--chunks', type=_ints, default=(1, 4, 16), help='Engine chunk sizes in MiB')
+    parser.add_argument('--verify', default='sample', choices=('none', 'sample', 'full'))
+    parser.add_argument('--no-direct-io', dest='direct_io', action='store_false')
+    parser.add_argument('--loop', action='store_true', help='Also wipe loop devices (root + losetup)')
+    parser.add_argument('--workdir', help='Directory for the sparse target files')
+    return parser
+
+
+def run_suites(args):
+    suites = [s.strip() for s in args.suite.split(',') if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        raise SystemExit(f'Unknown suite(s): {", ".join(sorted(unknown))}')
+    results = {}
+    if 'engine' in suites:
+        from . import bench_engine
+        results.update(bench_engine.run(
+            sizes_mib=(16,) if args.quick else args.sizes,
+            chunk_sizes_mib=(1, 4) if args.quick else args.chunks,
+            verify=args.verify, direct_io=args.direct_io, loop=args.loop,
+            workdir=args.workdir, repeat=1 if args.quick else 3,
+        ))
+    if 'certs' in suites:
+        from . import bench_certs
+        results.update(bench_certs.run(repeat=5 if args.quick else 50))
+    if 'api' in suites:
+        from . import bench_api
+        results.update(bench_api.run(requests=20 if args.quick else 200))
+    return harness.report(results, meta={'suites': suites, 'quick': args.quick})
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.compare:
+        if not args.baseline:
+            raise SystemExit('--compare needs --baseline')
+        current = harness.load(args.compare)
+    else:
+        current = run_suites(args)
+        text = json.dumps(current, indent=2)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(text + '\n')
+        else:
+            print(text)
+    if not args.baseline:
+        return 0
+    rows = harness.compare(current['results'], harness.load(args.baseline)['results'], args.tolerance)
+    harness.print_comparison(rows, file=sys.stderr)
+    regressed = [row[0] for row in rows if row[4]]
+    if regressed:
+        print(f'\n{len(regressed)} benchmark(s) regressed by more than {args.tolerance:.0%}: '
+              f'{", ".join(regressed)}', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+"""
+Headless entry point for Secure Wipe (no Qt, no Flask).
+Run: python cli.py run manifest.yaml --yes
+     python cli.py methods
+"""
+
+import sys
+from src.cli import main
+
+if __name__ == '__main__':
+    sys.exit(main())
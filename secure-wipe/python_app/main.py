@@ -3,26 +3,37 @@
 Main entry point for Secure Wipe Desktop App.
 Flow: Auth → Launch GUI → Wipe/Cert Generation.
 Run: python main.py
+     python main.py --profile-startup   (report per-module import times and exit)
 """
 
 import sys
-from src.auth import authenticate, test_auth  # Use test_auth for dev
-from src.gui import SecureWipeApp
+from src.logging_config import setup_logging
 from src.utils import log_message
-from PyQt6.QtWidgets import QApplication
+
+# What main() imports before the window appears
+STARTUP_MODULES = ['src.auth', 'src.gui', 'PyQt6.QtWidgets']
 
 def main():
+    if '--profile-startup' in sys.argv:
+        from src.startup import report
+        report(STARTUP_MODULES)
+        return
+
+    setup_logging()
     log_message('INFO', 'Starting Secure Wipe Application')
 
     # Authentication (OAuth/OpenID)
+    from src.auth import authenticate, test_auth  # Use test_auth for dev
     print("Authenticating user...")
     token = test_auth()  # Or authenticate() for real Auth0
     if not token:
         print("Authentication failed. Exiting.")
         sys.exit(1)
-    log_message('INFO', f'Authenticated as: {token.get("user", "unknown")}')
+    log_message('INFO', 'Authenticated as: %s', token.get('user', 'unknown'))
 
-    # Launch GUI
+    # Launch GUI (PyQt6 loads only once authentication has succeeded)
+    from PyQt6.QtWidgets import QApplication
+    from src.gui import SecureWipeApp
     app = QApplication(sys.argv)
     window = SecureWipeApp()
     window.show()
@@ -1,9 +1,10 @@
-from requests_oauthlib import OAuth2Session
 from .utils import load_config
-import webbrowser
 import urllib.parse
 
 def authenticate():
+    # requests/oauthlib are slow to import and only needed for real Auth0 logins
+    from requests_oauthlib import OAuth2Session
+    import webbrowser
     config = load_config('auth0_config.json')  # Load from config
     oauth = OAuth2Session(
         config['client_id'],
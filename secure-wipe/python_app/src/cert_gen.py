@@ -1,27 +1,128 @@
+import hashlib
 import json
+import os
+import time
 from datetime import datetime
-from cryptography.hazmat.primitives import serialization, hashes
-from cryptography.hazmat.primitives.asymmetric import ec
-from cryptography.exceptions import InvalidSignature
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-import qrcode
 from io import BytesIO
-from .utils import load_config
+from .compact import cert_document, cert_id, decode_payload, encode_payload
+from .merkle import build_tree, inclusion_proof, root_from_proof
+from .metrics import CERT_RENDER, CERT_SIGN, CERT_VERIFICATIONS, CERT_VERIFY
+from .utils import load_config, load_private_key, load_public_key
+
+# Prefix for batch roots so a root signature can never pass as a per-cert signature
+MERKLE_SIGN_PREFIX = b'SecureWipe-Merkle-v1:'
+QR_MASK_PATTERN = 0
+
+def _ecdsa():
+    # cryptography is imported on first sign/verify rather than at startup
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec
+    return ec.ECDSA(hashes.SHA256())
+
+def verify_cert_signature(public_key, json_str, signature, merkle=None):
+    """Check a per-cert signature, or a batch root signature plus inclusion proof."""
+    with CERT_VERIFY.time():
+        valid = _verify(public_key, json_str, signature, merkle)
+    CERT_VERIFICATIONS.inc(result='valid' if valid else 'invalid')
+    return valid
+
+def _verify(public_key, json_str, signature, merkle):
+    if merkle is None:
+        message = json_str.encode()
+    else:
+        root = root_from_proof(json_str, merkle['proof'])
+        if root != bytes.fromhex(merkle['root']):
+            return False
+        message = MERKLE_SIGN_PREFIX + root
+    from cryptography.exceptions import InvalidSignature
+    try:
+        public_key.verify(signature, message, _ecdsa())
+        return True
+    except InvalidSignature:
+        return False
+
+def render_pdf(data):
+    """Render the certificate PDF and return its bytes."""
+    # ReportLab is only needed when a PDF is actually rendered
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    with CERT_RENDER.time(artifact='pdf'):
+        buf = BytesIO()
+        c = canvas.Canvas(buf, pagesize=letter)
+        c.drawString(100, 750, f"Secure Wipe Certificate")
+        c.drawString(100, 700, f"Device: {data['device_id']}")
+        c.drawString(100, 650, f"Method: {data['method']}")
+        c.drawString(100, 600, f"Date: {data['timestamp']}")
+        c.drawString(100, 550, f"Status: {data['status']}")
+        c.save()
+        return buf.getvalue()
+
+def render_qr(text):
+    """Render a QR code (normally a compact payload, see compact.py) and return PNG bytes."""
+    import qrcode
+    # A fixed mask skips scoring all eight patterns, which is most of the encode time
+    with CERT_RENDER.time(artifact='qr'):
+        qr = qrcode.QRCode(version=1, box_size=4, border=4, mask_pattern=QR_MASK_PATTERN)
+        qr.add_data(text)
+        qr.make(fit=True)
+        img = qr.make_image(fill_color="black", back_color="white")
+        buf = BytesIO()
+        img.save(buf)
+        return buf.getvalue()
+
+def _render_artifacts(data, qr_text):
+    # Top-level so it can run in a process pool worker
+    return render_pdf(data), render_qr(qr_text)
+
+def qr_payload(json_str, signature, merkle=None):
+    """Compact QR text for a signed cert (cert id, hash prefix, raw signature)."""
+    document = cert_document(json_str, signature, merkle)
+    return encode_payload(cert_id(document), json_str, signature)
+
+def cert_paths(device_id, output_dir='.'):
+    # '/dev/sda' -> 'dev_sda' so device paths can't escape output_dir
+    name = device_id.strip('/').replace('/', '_') or 'device'
+    return {
+        'pdf': f"{output_dir}/{name}_cert.pdf",
+        'qr': f"{output_dir}/{name}_qr.png",
+        'json': f"{output_dir}/{name}_cert.json",
+    }
+
+def _stored(record):
+    # Lazily rendered certs have no pdf/qr paths until they are downloaded
+    return {**record['files'], 'cert_id': record['cert_id'], 'valid': True}
 
 class CertificateGenerator:
     def __init__(self):
-        config = load_config()
-        private_path = config['keys']['private_path']
-        public_path = config['keys']['public_path']
-        with open(private_path, 'rb') as f:
-            self.private_key = serialization.load_pem_private_key(
-                f.read(), password=None
-            )
-        with open(public_path, 'rb') as f:
-            self.public_key = serialization.load_pem_public_key(f.read())
-
-    def generate_data(self, device_id, wipe_method, timestamp=None):
+        keys = load_config()['keys']
+        self.private_path = keys['private_path']
+        self.public_path = keys['public_path']
+        self._private_key = None
+        self._public_key = None
+
+    # Keys are read on first use, so constructing a generator (e.g. at API
+    # import time) touches neither the key files nor cryptography
+    @property
+    def private_key(self):
+        if self._private_key is None:
+            self._private_key = load_private_key(self.private_path)
+        return self._private_key
+
+    @private_key.setter
+    def private_key(self, key):
+        self._private_key = key
+
+    @property
+    def public_key(self):
+        if self._public_key is None:
+            self._public_key = load_public_key(self.public_path)
+        return self._public_key
+
+    @public_key.setter
+    def public_key(self, key):
+        self._public_key = key
+
+    def generate_data(self, device_id, wipe_method, timestamp=None, extra=None):
         if timestamp is None:
             timestamp = datetime.now()
         data = {
@@ -31,51 +132,156 @@ class CertificateGenerator:
             'timestamp': timestamp.isoformat(),
             'status': 'Completed'
         }
+        if extra:
+            data.update(extra)  # e.g. verification details from the engine
         return data
 
     def sign_data(self, data):
         json_str = json.dumps(data, sort_keys=True)
-        signature = self.private_key.sign(
-            json_str.encode(), ec.ECDSA(hashes.SHA256())
-        )
+        private_key = self.private_key  # Key loading is not signing latency
+        with CERT_SIGN.time():
+            signature = private_key.sign(json_str.encode(), _ecdsa())
         return json_str, signature
 
+    def sign_batch(self, datas):
+        """Sign many payloads with a single signature over their Merkle root.
+
+        Returns (json_strs, signature, proofs); proofs[i] is the
+        {'root', 'proof'} dict that verify_signature expects for json_strs[i].
+        """
+        json_strs = [json.dumps(data, sort_keys=True) for data in datas]
+        levels = build_tree(json_strs)
+        root = levels[-1][0]
+        private_key = self.private_key
+        with CERT_SIGN.time():
+            signature = private_key.sign(MERKLE_SIGN_PREFIX + root, _ecdsa())
+        proofs = [
+            {'root': root.hex(), 'proof': inclusion_proof(levels, i)}
+            for i in range(len(json_strs))
+        ]
+        return json_strs, signature, proofs
+
     def generate_pdf(self, data, filename='cert.pdf'):
-        c = canvas.Canvas(filename, pagesize=letter)
-        c.drawString(100, 750, f"Secure Wipe Certificate")
-        c.drawString(100, 700, f"Device: {data['device_id']}")
-        c.drawString(100, 650, f"Method: {data['method']}")
-        c.drawString(100, 600, f"Date: {data['timestamp']}")
-        c.drawString(100, 550, f"Status: {data['status']}")
-        c.save()
+        with open(filename, 'wb') as f:
+            f.write(render_pdf(data))
 
-    def generate_qr(self, data_json, filename='cert.qr.png'):
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(data_json)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-        img.save(filename)
+    def generate_qr(self, text, filename='cert.qr.png'):
+        with open(filename, 'wb') as f:
+            f.write(render_qr(text))
+
+    def verify_signature(self, json_str, signature, merkle=None):
+        return verify_cert_signature(self.public_key, json_str, signature, merkle)
 
-    def verify_signature(self, json_str, signature):
+    def verify_compact(self, payload, document):
+        """Check a scanned compact QR payload against the certificate it names.
+
+        `document` is the stored {'data', 'signature'[, 'merkle']} JSON, e.g.
+        fetched from GET /api/v1/certs/<cert_id>. The payload must name this
+        document, match its data hash, and carry a valid signature over it.
+        """
         try:
-            self.public_key.verify(
-                signature, json_str.encode(), ec.ECDSA(hashes.SHA256())
-            )
-            return True
-        except InvalidSignature:
+            fields = decode_payload(payload)
+        except ValueError:
+            return False
+        json_str = document['data']
+        if fields['cert_id'] != cert_id(document):
+            return False
+        if fields['hash_prefix'] != hashlib.sha256(json_str.encode()).digest()[:len(fields['hash_prefix'])]:
             return False
+        return self.verify_signature(json_str, fields['signature'], document.get('merkle'))
 
-    def generate_full_cert(self, device_id, wipe_method, output_dir='.'):
-        data = self.generate_data(device_id, wipe_method)
+    def generate_full_cert(self, device_id, wipe_method, output_dir='.', extra=None, store=None):
+        """Sign and render one certificate.
+
+        With a CertStore the artifacts go into the content-addressed store and
+        the result carries the cert_id; a lazy_render store only gets the
+        signed JSON here. Otherwise everything is written to output_dir.
+        """
+        data = self.generate_data(device_id, wipe_method, extra=extra)
         json_str, sig = self.sign_data(data)
-        pdf_file = f"{output_dir}/{device_id}_cert.pdf"
-        qr_file = f"{output_dir}/{device_id}_qr.png"
-        json_file = f"{output_dir}/{device_id}_cert.json"
-        self.generate_pdf(data, pdf_file)
-        self.generate_qr(json_str, qr_file)
-        with open(json_file, 'w') as f:
-            json.dump({'data': json_str, 'signature': sig.hex()}, f)
-        return {'pdf': pdf_file, 'qr': qr_file, 'json': json_file, 'valid': True}
+        if store is not None:
+            if store.lazy_render:
+                return _stored(store.put(json_str, sig))
+            return _stored(store.put(
+                json_str, sig, render_pdf(data), render_qr(qr_payload(json_str, sig))
+            ))
+        paths = cert_paths(device_id, output_dir)
+        self.generate_pdf(data, paths['pdf'])
+        self.generate_qr(qr_payload(json_str, sig), paths['qr'])
+        with open(paths['json'], 'w') as f:
+            json.dump(cert_document(json_str, sig), f)
+        return {**paths, 'valid': True}
+
+    def generate_batch(self, devices, wipe_method, output_dir='.', max_workers=None,
+                       merkle=False, store=None, extras=None):
+        """Issue certificates for many devices at once.
+
+        For offline issuance of already-finished wipes (e.g. re-issuing from
+        saved records); the wipe paths certify each device through
+        generate_full_cert as soon as it finishes. extras[i] is merged into
+        the payload of devices[i] like generate_full_cert's `extra` (passes,
+        verification, purge).
+
+        Payloads are signed in one pass before rendering starts, PDFs/QRs are
+        rendered across a process pool, and outputs are written together at
+        the end. Each payload gets its own signature unless merkle=True, where
+        the whole batch shares one signature over a Merkle root and each cert
+        JSON carries its inclusion proof. With a CertStore the
+        outputs are stored there instead of output_dir.
+        Returns {'certs': [paths per device], 'timings': {stage: seconds}}.
+        """
+        if extras is None:
+            extras = [None] * len(devices)
+        elif len(extras) != len(devices):
+            raise ValueError(f'{len(extras)} extras for {len(devices)} devices')
+        timings = {}
+        start = time.perf_counter()
+
+        t = time.perf_counter()
+        datas = [self.generate_data(device_id, wipe_method, extra=extra)
+                 for device_id, extra in zip(devices, extras)]
+        if merkle:
+            json_strs, sig, proofs = self.sign_batch(datas)
+            signed = [(json_str, sig) for json_str in json_strs]
+        else:
+            signed = [self.sign_data(data) for data in datas]
+            proofs = [None] * len(datas)
+        timings['sign'] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        json_strs = [json_str for json_str, _ in signed]
+        qr_texts = [qr_payload(json_str, sig, proof) for (json_str, sig), proof in zip(signed, proofs)]
+        workers = max_workers or os.cpu_count() or 1
+        if store is not None and store.lazy_render:
+            rendered = [(None, None)] * len(datas)
+        elif workers > 1 and len(datas) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=min(workers, len(datas))) as pool:
+                chunksize = max(1, len(datas) // (workers * 4))
+                rendered = list(pool.map(_render_artifacts, datas, qr_texts, chunksize=chunksize))
+        else:
+            rendered = [_render_artifacts(d, q) for d, q in zip(datas, qr_texts)]
+        timings['render'] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        certs = []
+        for device_id, (json_str, sig), proof, (pdf, png) in zip(devices, signed, proofs, rendered):
+            if store is not None:
+                certs.append(_stored(store.put(json_str, sig, pdf, png, merkle=proof)))
+                continue
+            paths = cert_paths(device_id, output_dir)
+            with open(paths['pdf'], 'wb') as f:
+                f.write(pdf)
+            with open(paths['qr'], 'wb') as f:
+                f.write(png)
+            cert_json = cert_document(json_str, sig, proof)
+            with open(paths['json'], 'w') as f:
+                f.write(json.dumps(cert_json))
+            certs.append({**paths, 'valid': True})
+        timings['write'] = time.perf_counter() - t
+
+        timings['total'] = time.perf_counter() - start
+        return {'certs': certs, 'timings': timings}
 
 # Example usage (for testing; run python cert_gen.py)
 if __name__ == "__main__":
@@ -83,5 +289,7 @@ if __name__ == "__main__":
     data = gen.generate_data("test_device", "DoD 3-Pass")
     json_str, sig = gen.sign_data(data)
     gen.generate_pdf(data)
-    gen.generate_qr(json_str)
-    print("Signature valid:", gen.verify_signature(json_str, sig))
\ No newline at end of file
+    payload = qr_payload(json_str, sig)
+    gen.generate_qr(payload)
+    print("Signature valid:", gen.verify_signature(json_str, sig))
+    print("Compact QR valid:", gen.verify_compact(payload, cert_document(json_str, sig)))
\ No newline at end of file
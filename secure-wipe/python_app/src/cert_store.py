@@ -0,0 +1,249 @@
+"""
+Certificate repository.
+Artifacts (PDF, QR PNG, signed JSON) are stored content-addressed under
+objects/<aa>/<bb>/<sha256>.<ext>, so a re-wipe never overwrites an earlier
+certificate and device paths like /dev/sda never end up in file names. A
+SQLite index over device, serial, method, timestamp and signature digest
+answers auditor lookups from B-tree indexes instead of directory scans.
+In lazy mode only the signed JSON is written when a wipe completes; the
+PDF and QR are rendered on first download and kept in a byte-bounded LRU
+cache.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from .compact import cert_document, encode_payload
+from .logstore import parse_timestamp
+
+ARTIFACTS = {
+    'pdf': ('pdf', 'application/pdf'),
+    'qr': ('png', 'image/png'),
+    'json': ('json', 'application/json'),
+}
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS certs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        cert_id TEXT NOT NULL UNIQUE,
+        device TEXT NOT NULL,
+        serial TEXT,
+        method TEXT NOT NULL,
+        ts REAL NOT NULL,
+        sig_digest TEXT NOT NULL,
+        pdf TEXT,
+        qr TEXT,
+        created REAL NOT NULL
+    )''',
+    'CREATE INDEX IF NOT EXISTS certs_device ON certs (device, id)',
+    'CREATE INDEX IF NOT EXISTS certs_serial ON certs (serial, id)',
+    'CREATE INDEX IF NOT EXISTS certs_method ON certs (method, id)',
+    'CREATE INDEX IF NOT EXISTS certs_ts ON certs (ts)',
+    'CREATE INDEX IF NOT EXISTS certs_sig ON certs (sig_digest)',
+]
+
+COLUMNS = 'id, cert_id, device, serial, method, ts, sig_digest, pdf, qr'
+
+
+def signature_digest(signature):
+    """Index key for a signature (raw bytes or hex), as SHA-256 hex."""
+    if isinstance(signature, str):
+        signature = bytes.fromhex(signature)
+    return hashlib.sha256(signature).hexdigest()
+
+
+class RenderCache:
+    """LRU cache of rendered artifacts, bounded by total bytes."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if len(value) > self.max_bytes:
+            return  # Would evict everything else and still not fit
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'entries': len(self._entries), 'bytes': self.size}
+
+
+class CertStore:
+    def __init__(self, root, index=None, lazy_render=False, cache_bytes=64 * 1024 * 1024):
+        self.root = root
+        self.index_path = index or os.path.join(root, 'index.db')
+        self.lazy_render = lazy_render
+        self.cache = RenderCache(cache_bytes)
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.index_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def object_path(self, digest, ext):
+        return os.path.join(self.root, 'objects', digest[:2], digest[2:4], f'{digest}.{ext}')
+
+    def _write_object(self, content, ext):
+        digest = hashlib.sha256(content).hexdigest()
+        path = self.object_path(digest, ext)
+        if not os.path.exists(path):  # Same bytes, same name: nothing to do
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp, path)
+        return digest
+
+    def put(self, json_str, signature, pdf=None, qr=None, merkle=None):
+        """Store one signed certificate and its renderings; returns its record.
+
+        The cert id is the SHA-256 of the signed JSON document, so storing the
+        same certificate twice is a no-op.
+        """
+        document = cert_document(json_str, signature, merkle)
+        cert_id = self._write_object(json.dumps(document).encode(), 'json')
+        digests = {
+            key: self._write_object(content, ARTIFACTS[key][0]) if content is not None else None
+            for key, content in (('pdf', pdf), ('qr', qr))
+        }
+        data = json.loads(json_str)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR IGNORE INTO certs (cert_id, device, serial, method, ts, sig_digest, '
+                'pdf, qr, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (cert_id, data['device_id'], data.get('serial'), data['method'],
+                 parse_timestamp(data['timestamp']), signature_digest(signature),
+                 digests['pdf'], digests['qr'], datetime.now().timestamp())
+            )
+            self._conn.commit()
+        return self.get(cert_id)
+
+    def _record(self, row):
+        id_, cert_id, device, serial, method, ts, sig_digest, pdf, qr = row
+        files = {'json': self.object_path(cert_id, 'json')}
+        if pdf:
+            files['pdf'] = self.object_path(pdf, 'pdf')
+        if qr:
+            files['qr'] = self.object_path(qr, 'png')
+        return {
+            'id': id_,
+            'cert_id': cert_id,
+            'device': device,
+            'serial': serial,
+            'method': method,
+            'timestamp': datetime.fromtimestamp(ts).isoformat(),
+            'signature_digest': sig_digest,
+            'files': files,
+        }
+
+    def get(self, cert_id):
+        with self._lock:
+            row = self._conn.execute(
+                f'SELECT {COLUMNS} FROM certs WHERE cert_id = ?', (cert_id,)
+            ).fetchone()
+        return None if row is None else self._record(row)
+
+    def load(self, cert_id, kind):
+        """(bytes, mimetype) of one artifact, or None if the cert or kind is unknown.
+
+        PDF and QR are read from the store when they were rendered at issue
+        time, otherwise rendered from the signed JSON and cached.
+        """
+        record = self.get(cert_id)
+        if record is None or kind not in ARTIFACTS:
+            return None
+        mimetype = ARTIFACTS[kind][1]
+        path = record['files'].get(kind)
+        if path is not None:
+            with open(path, 'rb') as f:
+                return f.read(), mimetype
+        content = self.cache.get((cert_id, kind))
+        if content is None:
+            content = self._render(cert_id, kind)
+            self.cache.put((cert_id, kind), content)
+        return content, mimetype
+
+    def _render(self, cert_id, kind):
+        from .cert_gen import render_pdf, render_qr  # ReportLab/qrcode only when needed
+        document = self.document(cert_id)
+        if kind == 'pdf':
+            return render_pdf(json.loads(document['data']))
+        signature = bytes.fromhex(document['signature'])
+        return render_qr(encode_payload(cert_id, document['data'], signature))
+
+    def document(self, cert_id):
+        """The signed {'data', 'signature'[, 'merkle']} JSON for a cert."""
+        record = self.get(cert_id)
+        if record is None:
+            return None
+        with open(record['files']['json']) as f:
+            return json.load(f)
+
+    def _where(self, cursor=None, device=None, serial=None, method=None, signature=None,
+               since=None, until=None):
+        clauses, args = [], []
+        if cursor is not None:
+            clauses.append('id < ?')
+            args.append(int(cursor))
+        for column, value in (('device', device), ('serial', serial), ('method', method)):
+            if value is not None:
+                clauses.append(f'{column} = ?')
+                args.append(value)
+        if signature is not None:
+            clauses.append('sig_digest = ?')
+            args.append(signature_digest(signature))
+        if since is not None:
+            clauses.append('ts >= ?')
+            args.append(parse_timestamp(since))
+        if until is not None:
+            clauses.append('ts < ?')
+            args.append(parse_timestamp(until))
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', args
+
+    def query(self, limit=100, cursor=None, **filters):
+        """Newest-first page of cert records; returns (records, next_cursor).
+
+        Filters: device, serial, method, signature (hex), since/until.
+        """
+        where, args = self._where(cursor=cursor, **filters)
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT {COLUMNS} FROM certs{where} ORDER BY id DESC LIMIT ?', args + [limit]
+            ).fetchall()
+        next_cursor = rows[-1][0] if rows and len(rows) == limit else None
+        return [self._record(row) for row in rows], next_cursor
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
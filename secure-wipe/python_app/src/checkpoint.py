@@ -0,0 +1,100 @@
+"""
+Crash-safe checkpoint journal for resumable wipes.
+One SQLite row per device records the pass patterns (random passes with
+their seeds, so an interrupted pass continues the same stream) and the
+last durable (pass, offset). The engine only reports an offset after
+fdatasync, so the journal never runs ahead of what is on the media.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+RUNNING = 'running'
+COMPLETED = 'completed'
+
+
+def seed_patterns(patterns):
+    """Give every random pass an explicit seed so it can be regenerated after a restart."""
+    return [f'random:{os.urandom(32).hex()}' if p == 'random' else p for p in patterns]
+
+
+def device_size(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.lseek(fd, 0, os.SEEK_END)
+    finally:
+        os.close(fd)
+
+
+class CheckpointJournal:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS wipes (
+                device TEXT PRIMARY KEY,
+                method TEXT NOT NULL,
+                patterns TEXT NOT NULL,
+                device_size INTEGER,
+                pass INTEGER NOT NULL DEFAULT 0,
+                offset INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                started TEXT NOT NULL,
+                updated TEXT NOT NULL
+            )''')
+        self._conn.commit()
+
+    def _execute(self, sql, args=()):
+        with self._lock:
+            cur = self._conn.execute(sql, args)
+            self._conn.commit()
+            return cur
+
+    def start(self, device, method, patterns, size):
+        now = datetime.now().isoformat()
+        self._execute(
+            'INSERT OR REPLACE INTO wipes VALUES (?, ?, ?, ?, 0, 0, ?, ?, ?)',
+            (device, method, json.dumps(patterns), size, RUNNING, now, now)
+        )
+
+    def checkpoint(self, device, pass_index, offset):
+        self._execute(
+            'UPDATE wipes SET pass = ?, offset = ?, updated = ? WHERE device = ?',
+            (pass_index, offset, datetime.now().isoformat(), device)
+        )
+
+    def complete(self, device):
+        self._execute(
+            'UPDATE wipes SET status = ?, updated = ? WHERE device = ?',
+            (COMPLETED, datetime.now().isoformat(), device)
+        )
+
+    def get(self, device):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT method, patterns, device_size, pass, offset, status, started, updated '
+                'FROM wipes WHERE device = ?', (device,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ('method', 'patterns', 'device_size', 'pass', 'offset', 'status', 'started', 'updated')
+        record = dict(zip(keys, row))
+        record['patterns'] = json.loads(record['patterns'])
+        return record
+
+    def resumable(self, device, method, size):
+        """The unfinished record for this device, method and size, if any."""
+        record = self.get(device)
+        if (record is None or record['status'] != RUNNING or record['method'] != method
+                or record['device_size'] != size):
+            return None
+        return record
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,283 @@
+"""
+Headless batch runner: wipe the devices listed in a YAML or CSV manifest
+and print JSON-lines progress on stdout.
+It never imports PyQt6 or Flask, and ReportLab/qrcode only with --render
+(otherwise certificates are stored as signed JSON and rendered on download),
+so it starts quickly on the minimal live image.
+
+Manifest (YAML):
+    defaults: {method: "NIST 800-88 Clear", verify: sample}
+    devices:
+      - /dev/sdb
+      - {device: /dev/sdc, method: "DoD 5220.22-M 3-Pass", resume: true}
+
+Manifest (CSV): a header row with `device` and any of the optional columns
+below; empty cells fall back to the defaults.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import threading
+import time
+
+FIELDS = {
+    'device': str,
+    'method': str,
+    'passes': int,
+    'verify': str,
+    'verify_fraction': float,
+    'chunk_size': int,
+    'direct_io': bool,
+    'resume': bool,
+}
+ENGINE_OPTIONS = ('verify', 'verify_fraction', 'chunk_size', 'direct_io')
+VERIFY_MODES = ('none', 'sample', 'full')
+
+# Everything `run` loads before the first wipe starts (for --profile-startup)
+RUN_MODULES = ('cli', 'pipeline', 'cert_gen', 'cert_store', 'checkpoint', 'devices', 'jobs',
+               'progress', 'purge', 'scheduler')
+
+EXIT_OK, EXIT_FAILED, EXIT_USAGE, EXIT_INTERRUPTED = 0, 1, 2, 130
+
+
+def _coerce(key, value):
+    kind = FIELDS.get(key)
+    if kind is None:
+        raise ValueError(f'Unknown manifest field {key!r}')
+    if value is None or value == '':
+        return None
+    if kind is bool and isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered not in ('true', 'false', 'yes', 'no', '1', '0'):
+            raise ValueError(f'{key}: expected a boolean, got {value!r}')
+        return lowered in ('true', 'yes', '1')
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{key}: expected {kind.__name__}, got {value!r}') from None
+
+
+def _fields(mapping):
+    coerced = {key: _coerce(key, value) for key, value in mapping.items()}
+    return {key: value for key, value in coerced.items() if value is not None}
+
+
+def _read_entries(path):
+    if path.lower().endswith('.csv'):
+        with open(path, newline='') as f:
+            return {}, list(csv.DictReader(f))
+    import yaml
+    with open(path) as f:
+        doc = yaml.safe_load(f)
+    if isinstance(doc, list):
+        return {}, doc
+    if not isinstance(doc, dict) or not isinstance(doc.get('devices'), list):
+        raise ValueError('Manifest must be a list of devices or have a `devices` list')
+    return doc.get('defaults') or {}, doc['devices']
+
+
+def load_manifest(path, config):
+    """Validated wipe specs: [{'device', 'method' (WipeMethod), 'resume', 'engine': {...}}]."""
+    from .methods import get_method
+    from .utils import parse_device_path
+    defaults, entries = _read_entries(path)
+    base = {
+        'method': config['app']['default_method'],
+        'passes': config['app']['wipe_passes'],
+        'resume': False,
+    }
+    base.update(_fields(defaults))
+    specs, seen = [], set()
+    for index, entry in enumerate(entries, 1):
+        if isinstance(entry, str):
+            entry = {'device': entry}
+        if not isinstance(entry, dict):
+            raise ValueError(f'Entry {index}: expected a device path or mapping')
+        fields = dict(base)
+        try:
+            fields.update(_fields(entry))
+            if not fields.get('device'):
+                raise ValueError('missing `device`')
+            if fields.get('verify') is not None and fields['verify'] not in VERIFY_MODES:
+                raise ValueError(f"verify must be one of {', '.join(VERIFY_MODES)}")
+            method = get_method(fields['method'], fields['passes'])
+        except ValueError as e:
+            raise ValueError(f'Entry {index}: {e}') from None
+        device = parse_device_path(fields['device'])
+        if device in seen:
+            raise ValueError(f'Entry {index}: {device} is listed twice')
+        seen.add(device)
+        specs.append({
+            'device': device,
+            'method': method,
+            'resume': bool(fields['resume']),
+            'engine': {k: fields[k] for k in ENGINE_OPTIONS if fields.get(k) is not None},
+        })
+    if not specs:
+        raise ValueError('Manifest lists no devices')
+    return specs
+
+
+class Emitter:
+    """Thread-safe JSON-lines writer with per-device progress throttling."""
+
+    def __init__(self, stream=None, progress_interval=1.0):
+        self.stream = stream or sys.stdout
+        self.progress_interval = progress_interval
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        line = json.dumps({'event': event, 'time': round(time.time(), 3), **fields}, default=str)
+        with self._lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+
+    def progress(self, device, event):
+        now = time.monotonic()
+        pass_done = event['bytes_written'] >= event['bytes_total']
+        if not pass_done and now - self._last.get(device, float('-inf')) < self.progress_interval:
+            return
+        self._last[device] = now
+        keys = ('pass', 'passes', 'bytes_written', 'bytes_total', 'percent',
+                'throughput_mbps', 'eta_seconds')
+        self.emit('progress', device=device, **{k: event.get(k) for k in keys})
+
+
+def run(args, config):
+    specs = {spec['device']: spec for spec in load_manifest(args.manifest, config)}
+    out = Emitter(progress_interval=args.progress_interval)
+    if args.dry_run:
+        from .purge import plan_purge  # Probes are read-only (hdparm -I, nvme id-ctrl)
+        for spec in specs.values():
+            plan = plan_purge(spec['device'], spec['method'], mode=config['purge']['mode'],
+                              sys_root=config['devices']['sys_root'])
+            out.emit('planned', device=spec['device'], method=spec['method'].name,
+                     passes=spec['method'].labels(), resume=spec['resume'],
+                     purge=plan.to_dict(), **spec['engine'])
+        return EXIT_OK
+    if not args.yes:
+        print('Refusing to wipe without --yes', file=sys.stderr)
+        return EXIT_USAGE
+
+    # The engine and signing stack are only loaded once there is work to do
+    from .cert_gen import CertificateGenerator
+    from .cert_store import CertStore
+    from .checkpoint import CheckpointJournal
+    from .devices import DeviceInventory
+    from .jobs import JobManager
+    from .pipeline import wipe_and_certify
+    from .progress import ProgressTracker, WipeCancelled
+    from .scheduler import DeviceScheduler
+
+    gen = CertificateGenerator()
+    store = CertStore(**config['certs'])
+    store.lazy_render = not args.render
+    journal = CheckpointJournal(config['checkpoint']['path'])
+    inventory = DeviceInventory(**config['devices'])
+    scheduler = DeviceScheduler(**config['scheduler'])
+    jobs = JobManager(max_workers=args.jobs or config['jobs']['max_concurrent_wipes'],
+                      scheduler=scheduler)
+    cancel = threading.Event()
+
+    def wipe_one(job, device):
+        if cancel.is_set():
+            # Dispatched as the interrupt landed: stop before any write or purge command
+            out.emit('cancelled', device=device, error='Interrupted before start')
+            raise WipeCancelled(device)
+        spec = specs[device]
+        tracker = ProgressTracker(device)
+        def on_progress(event):
+            if cancel.is_set():
+                raise WipeCancelled(device)
+            event = tracker.update(event)
+            scheduler.observe(device, event['bytes_written'])
+            out.progress(device, event)
+        disk = inventory.get(device)
+        out.emit('started', device=device, method=spec['method'].name)
+        try:
+            result = wipe_and_certify(
+                device, spec['method'], gen, on_progress, store=store, journal=journal,
+                resume=spec['resume'], serial=disk.serial if disk else None, **spec['engine']
+            )
+        except Exception as e:
+            out.emit('cancelled' if isinstance(e, WipeCancelled) else 'failed',
+                     device=device, error=str(e))
+            raise
+        out.emit('completed', **result)
+        return result
+
+    job = jobs.submit(list(specs), wipe_one, params={'manifest': args.manifest})
+    interrupted = False
+    try:
+        while not job.done.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        # Queued devices are never started; engines stop at their next progress callback
+        # and journals keep the checkpoint. A hardware purge already issued runs to the end.
+        interrupted = True
+        cancel.set()
+        jobs.drain()
+    jobs.shutdown()
+    journal.close()
+    store.close()
+    summary = job.to_dict()
+    failed = [t['device'] for t in summary['devices'] if t['state'] != 'completed']
+    out.emit('summary', job_id=job.id, completed=len(specs) - len(failed), failed=failed)
+    if interrupted:
+        return EXIT_INTERRUPTED
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def list_methods(args, config):
+    from .methods import available_methods
+    out = Emitter()
+    for method in available_methods():
+        out.emit('method', **method.to_dict())
+    return EXIT_OK
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='secure-wipe', description='Headless Secure Wipe batch runner (JSON-lines output).'
+    )
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Report per-module import times for `run` and exit')
+    commands = parser.add_subparsers(dest='command')
+
+    run_cmd = commands.add_parser('run', help='Wipe every device in a manifest')
+    run_cmd.add_argument('manifest', help='YAML or CSV manifest of devices and methods')
+    run_cmd.add_argument('--yes', action='store_true', help='Confirm the wipe (required)')
+    run_cmd.add_argument('--dry-run', action='store_true', help='Validate and print the plan only')
+    run_cmd.add_argument('--jobs', type=int, help='Parallel wipes (default from config)')
+    run_cmd.add_argument('--render', action='store_true',
+                         help='Render PDF/QR now instead of on first download')
+    run_cmd.add_argument('--progress-interval', type=float, default=1.0,
+                         help='Seconds between progress lines per device')
+    run_cmd.set_defaults(func=run)
+
+    methods_cmd = commands.add_parser('methods', help='List wipe methods')
+    methods_cmd.set_defaults(func=list_methods)
+    return parser
+
+
+def main(argv=None):
+    from .logging_config import setup_logging
+    from .utils import load_config
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.profile_startup:
+        from .startup import report
+        report([f'{__package__}.{name}' for name in RUN_MODULES])
+        return EXIT_OK
+    if args.command is None:
+        parser.error('a command is required')
+    config = load_config()
+    setup_logging({**config['logging'], 'stream': 'stderr'})
+    try:
+        return args.func(args, config)
+    except (OSError, ValueError) as e:
+        print(f'secure-wipe: {e}', file=sys.stderr)
+        return EXIT_USAGE
@@ -0,0 +1,104 @@
+"""
+Compact certificate payloads for QR codes.
+Instead of the whole signed JSON, the QR carries a short binary record:
+
+    version (1) | cert id (32) | SHA-256(data) prefix (8) | r || s
+
+encoded as base45 (RFC 9285) behind a 'SW:' prefix. Every base45
+character is in the QR alphanumeric set, so the code stays at a low
+version. The cert id locates the full certificate in the store; the hash
+prefix and raw ECDSA signature let a verifier check the document it
+fetched without trusting where it came from.
+"""
+
+import hashlib
+import json
+
+PREFIX = 'SW:'
+VERSION = 1
+ID_SIZE = 32
+HASH_SIZE = 8
+
+B45_CHARSET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:'
+_B45_INDEX = {c: i for i, c in enumerate(B45_CHARSET)}
+
+
+def b45encode(data):
+    out = []
+    for i in range(0, len(data) - 1, 2):
+        n = data[i] * 256 + data[i + 1]
+        n, c = divmod(n, 45)
+        e, d = divmod(n, 45)
+        out += [B45_CHARSET[c], B45_CHARSET[d], B45_CHARSET[e]]
+    if len(data) % 2:
+        d, c = divmod(data[-1], 45)
+        out += [B45_CHARSET[c], B45_CHARSET[d]]
+    return ''.join(out)
+
+
+def b45decode(text):
+    try:
+        values = [_B45_INDEX[c] for c in text]
+    except KeyError as e:
+        raise ValueError(f'Invalid base45 character {e.args[0]!r}') from None
+    if len(values) % 3 == 1:
+        raise ValueError('Invalid base45 length')
+    out = bytearray()
+    for i in range(0, len(values), 3):
+        chunk = values[i:i + 3]
+        n = sum(v * 45 ** k for k, v in enumerate(chunk))
+        if len(chunk) == 3:
+            if n > 0xFFFF:
+                raise ValueError('Invalid base45 triplet')
+            out += n.to_bytes(2, 'big')
+        else:
+            if n > 0xFF:
+                raise ValueError('Invalid base45 pair')
+            out.append(n)
+    return bytes(out)
+
+
+def cert_document(json_str, signature, merkle=None):
+    """The signed JSON document that is stored and whose digest is the cert id."""
+    document = {'data': json_str, 'signature': signature.hex()}
+    if merkle is not None:
+        document['merkle'] = merkle
+    return document
+
+
+def cert_id(document):
+    return hashlib.sha256(json.dumps(document).encode()).hexdigest()
+
+
+def encode_payload(cert_id_hex, json_str, signature):
+    """QR text for a cert; `signature` is the DER signature from the signer."""
+    from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+    r, s = decode_dss_signature(signature)
+    size = max((r.bit_length() + 7) // 8, (s.bit_length() + 7) // 8)
+    record = (bytes([VERSION]) + bytes.fromhex(cert_id_hex)
+              + hashlib.sha256(json_str.encode()).digest()[:HASH_SIZE]
+              + r.to_bytes(size, 'big') + s.to_bytes(size, 'big'))
+    return PREFIX + b45encode(record)
+
+
+def decode_payload(text):
+    """Parse QR text into {'version', 'cert_id', 'hash_prefix', 'signature' (DER)}."""
+    from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+    if not text.startswith(PREFIX):
+        raise ValueError('Not a compact certificate payload')
+    record = b45decode(text[len(PREFIX):])
+    if not record or record[0] != VERSION:
+        raise ValueError(f'Unsupported payload version {record[:1].hex() or "(empty)"}')
+    header = 1 + ID_SIZE + HASH_SIZE
+    raw = record[header:]
+    if not raw or len(raw) % 2:
+        raise ValueError('Truncated payload signature')
+    half = len(raw) // 2
+    return {
+        'version': record[0],
+        'cert_id': record[1:1 + ID_SIZE].hex(),
+        'hash_prefix': record[1 + ID_SIZE:header],
+        'signature': encode_dss_signature(
+            int.from_bytes(raw[:half], 'big'), int.from_bytes(raw[half:], 'big')
+        ),
+    }
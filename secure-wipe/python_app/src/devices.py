@@ -0,0 +1,228 @@
+"""
+Block device inventory.
+Whole disks are read from /sys/block once and kept in an in-memory index;
+later refreshes only list the directory and read attributes of disks that
+appeared, so a refresh on a full chassis costs a few milliseconds. Hotplug
+events come from udev when pyudev is installed, otherwise from polling.
+"""
+
+import os
+import threading
+
+# Virtual and optical devices that are never wipe targets
+DEFAULT_IGNORE = ('loop', 'ram', 'zram', 'sr', 'fd', 'dm-', 'md', 'nbd')
+SECTOR = 512  # /sys/block/*/size is always in 512-byte units
+
+
+def _read(path, default=None):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return default
+
+
+def _read_vpd_serial(path):
+    # SCSI/SATA serials are only exposed as the raw unit serial number VPD page
+    try:
+        with open(path, 'rb') as f:
+            page = f.read()
+    except OSError:
+        return None
+    if len(page) <= 4:
+        return None
+    return page[4:4 + page[3]].decode('ascii', 'replace').strip() or None
+
+
+def format_size(size_bytes):
+    size = float(size_bytes)
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if size < 1000 or unit == 'TB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1000
+
+
+class BlockDevice:
+    def __init__(self, name, path, size_bytes, model=None, serial=None, vendor=None,
+                 rotational=None, transport=None, removable=False):
+        self.name = name
+        self.path = path
+        self.size_bytes = size_bytes
+        self.model = model
+        self.serial = serial
+        self.vendor = vendor
+        self.rotational = rotational
+        self.transport = transport
+        self.removable = removable
+
+    @property
+    def nvme(self):
+        return self.transport == 'nvme'
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'path': self.path,
+            'size_bytes': self.size_bytes,
+            'model': self.model,
+            'serial': self.serial,
+            'vendor': self.vendor,
+            'rotational': self.rotational,
+            'nvme': self.nvme,
+            'transport': self.transport,
+            'removable': self.removable,
+        }
+
+    def describe(self):
+        details = ', '.join(filter(None, [format_size(self.size_bytes), self.model, self.serial]))
+        return f"{self.path} ({details})"
+
+
+class DeviceInventory:
+    """In-memory index of whole-disk block devices, updated incrementally."""
+
+    def __init__(self, sys_root='/sys', dev_root='/dev', ignore_prefixes=DEFAULT_IGNORE,
+                 poll_interval=2.0):
+        self.block_dir = os.path.join(sys_root, 'block')
+        self.dev_root = dev_root
+        self.ignore_prefixes = tuple(ignore_prefixes)
+        self.poll_interval = poll_interval
+        self._devices = {}
+        self._scanned = False
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._stop = threading.Event()
+        self._watcher = None
+
+    @property
+    def available(self):
+        return os.path.isdir(self.block_dir)
+
+    def _read_device(self, name):
+        base = os.path.join(self.block_dir, name)
+        size = _read(os.path.join(base, 'size'))
+        if size is None:
+            return None  # Removed while we were scanning
+        rotational = _read(os.path.join(base, 'queue', 'rotational'))
+        device_link = os.path.realpath(os.path.join(base, 'device'))
+        if name.startswith('nvme'):
+            transport = 'nvme'
+        elif '/usb' in device_link:
+            transport = 'usb'
+        elif '/ata' in device_link:
+            transport = 'ata'
+        elif name.startswith('vd'):
+            transport = 'virtio'
+        else:
+            transport = None
+        serial = (_read(os.path.join(base, 'device', 'serial'))
+                  or _read_vpd_serial(os.path.join(base, 'device', 'vpd_pg80')))
+        return BlockDevice(
+            name=name,
+            path=os.path.join(self.dev_root, name),
+            size_bytes=int(size) * SECTOR,
+            model=_read(os.path.join(base, 'device', 'model')) or None,
+            serial=serial,
+            vendor=_read(os.path.join(base, 'device', 'vendor')) or None,
+            rotational=None if rotational is None else rotational == '1',
+            transport=transport,
+            removable=_read(os.path.join(base, 'removable')) == '1',
+        )
+
+    def _names(self):
+        try:
+            names = os.listdir(self.block_dir)
+        except OSError:
+            return set()
+        return {n for n in names if not n.startswith(self.ignore_prefixes)}
+
+    def refresh(self):
+        """Pick up added/removed disks; returns (added, removed) device names."""
+        names = self._names()
+        with self._lock:
+            known = set(self._devices)
+        added, removed = sorted(names - known), sorted(known - names)
+        new = {}
+        for name in added:
+            device = self._read_device(name)
+            if device is not None:
+                new[name] = device
+        with self._lock:
+            self._devices.update(new)
+            for name in removed:
+                self._devices.pop(name, None)
+            self._scanned = True
+        added = sorted(new)
+        if added or removed:
+            self._notify(added, removed)
+        return added, removed
+
+    def update(self, name):
+        """Re-read one disk, e.g. after a media change event."""
+        if name.startswith(self.ignore_prefixes):
+            return
+        device = self._read_device(name) if name in self._names() else None
+        with self._lock:
+            if device is None:
+                self._devices.pop(name, None)
+            else:
+                self._devices[name] = device
+        self._notify([name] if device else [], [] if device else [name])
+
+    def _notify(self, added, removed):
+        for listener in list(self._listeners):
+            listener(added, removed)
+
+    def devices(self):
+        if not self._scanned:
+            self.refresh()
+        with self._lock:
+            return [self._devices[name] for name in sorted(self._devices)]
+
+    def get(self, name_or_path):
+        if not self._scanned:
+            self.refresh()
+        with self._lock:
+            return self._devices.get(os.path.basename(name_or_path))
+
+    def add_listener(self, callback):
+        """callback(added, removed) is called from the watcher thread on every change."""
+        self._listeners.append(callback)
+
+    def watch(self):
+        """Start tracking hotplug events in a daemon thread."""
+        if self._watcher is not None:
+            return
+        self.refresh()
+        self._stop.clear()
+        try:
+            import pyudev
+        except ImportError:
+            target = self._poll
+        else:
+            target = lambda: self._udev(pyudev)
+        self._watcher = threading.Thread(target=target, name='device-watcher', daemon=True)
+        self._watcher.start()
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            self.refresh()
+
+    def _udev(self, pyudev):
+        monitor = pyudev.Monitor.from_netlink(pyudev.Context())
+        monitor.filter_by('block', device_type='disk')
+        monitor.start()
+        while not self._stop.is_set():
+            event = monitor.poll(timeout=self.poll_interval)
+            if event is None:
+                continue
+            if event.action == 'change':
+                self.update(event.sys_name)
+            else:
+                self.refresh()
+
+    def stop(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
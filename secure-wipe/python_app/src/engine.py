@@ -0,0 +1,152 @@
+"""
+Python-side control of the Rust wipe engine (secure_wipe_engine).
+Engine tuning (write chunk size, O_DIRECT, read-back verification) comes from
+the `engine` config section; callers pass arguments only to override it.
+"""
+
+import time
+from .checkpoint import device_size, seed_patterns
+from .logging_config import get_logger
+from .methods import describe_pattern, legacy_method
+from .metrics import BYTES_WIPED, DEVICE_THROUGHPUT, ENGINE_CALL, PASS_DURATION, WIPES, WIPES_ACTIVE
+from .utils import LazyModule, load_config
+
+_engine = LazyModule('secure_wipe_engine')  # Native module loads on the first engine call
+
+_log = get_logger('engine')
+
+
+def _log_progress(path, progress):
+    # Every event is offered to the logger; ProgressSampler keeps a few per device
+    def on_progress(event):
+        per_pass = event['bytes_total'] // max(event['passes'], 1)
+        _log.info(
+            'Pass %s/%s: %s of %s bytes', event['pass'], event['passes'],
+            event['bytes_written'], event['bytes_total'],
+            extra={'device': path, 'data': event, 'progress': True,
+                   'final': event.get('offset') == per_pass}
+        )
+        if progress is not None:
+            progress(event)
+    return on_progress
+
+
+def _metered(path, method_name, progress, start_offset=0):
+    # Engine events are already throttled (every few MiB and at pass ends), so
+    # metering costs a few operations per event and nothing per chunk
+    state = {'offset': start_offset, 'begin': start_offset, 'started': time.monotonic()}
+
+    def on_progress(event):
+        offset = event['offset']
+        BYTES_WIPED.inc(max(offset - state['offset'], 0), method=method_name)
+        state['offset'] = offset
+        elapsed = time.monotonic() - state['started']
+        if elapsed > 0:
+            DEVICE_THROUGHPUT.set((offset - state['begin']) / elapsed / 1e6, device=path)
+        if offset == event['bytes_total'] // max(event['passes'], 1):
+            PASS_DURATION.observe(elapsed, method=method_name)
+            state.update(offset=0, begin=0, started=time.monotonic())
+        progress(event)
+    return on_progress
+
+
+def _run_engine(path, passes, method_name, progress, **kwargs):
+    # kwargs go to the engine; a resumed wipe's start_offset also seeds the meter
+    WIPES_ACTIVE.inc()
+    outcome = 'error'
+    try:
+        with ENGINE_CALL.time(call='wipe_device'):
+            result = _engine.wipe_device(
+                path, passes, _metered(path, method_name, progress, kwargs.get('start_offset', 0)),
+                **kwargs
+            )
+        outcome = 'ok'
+        return result
+    finally:
+        WIPES_ACTIVE.inc(-1)
+        WIPES.inc(method=method_name, outcome=outcome)
+        DEVICE_THROUGHPUT.remove(device=path)  # No series left behind for idle devices
+
+
+def wipe_device(path, passes, progress=None, chunk_size=None, direct_io=None,
+                verify=None, verify_fraction=None, method=None, journal=None, resume=False):
+    """Wipe and read back; verify is 'none', 'sample' or 'full'.
+
+    With a WipeMethod the engine runs its pass patterns and `passes` is
+    ignored; methods that require verification never run with 'none'.
+    With a CheckpointJournal, durable progress is recorded and `resume`
+    continues an unfinished wipe of the same device, method and size.
+    Returns the engine summary dict (device_size, patterns, bytes_written,
+    verify_mode, sectors_checked, resumed_from, ...).
+    """
+    settings = load_config()['engine']
+    if chunk_size is None:
+        chunk_size = settings['chunk_size']
+    if direct_io is None:
+        direct_io = settings['direct_io']
+    if verify is None:
+        verify = settings['verify']
+    if verify_fraction is None:
+        verify_fraction = settings['verify_fraction']
+    progress = _log_progress(path, progress)
+    patterns = None
+    if method is not None:
+        passes = method.pass_count
+        patterns = method.engine_patterns()
+        if method.requires_verify and verify == 'none':
+            verify = 'sample'
+    if journal is None:
+        return _run_engine(
+            path, passes, method.name if method else f'{passes}-pass', progress,
+            chunk_size=chunk_size, direct_io=direct_io, verify=verify,
+            verify_fraction=verify_fraction, patterns=patterns
+        )
+
+    if method is None:
+        method = legacy_method(None, passes)
+        patterns = method.engine_patterns()
+    size = device_size(path)
+    record = journal.resumable(path, method.name, size) if resume else None
+    if record is not None:
+        patterns, start_pass, start_offset = record['patterns'], record['pass'], record['offset']
+    else:
+        patterns, start_pass, start_offset = seed_patterns(patterns), 0, 0
+        journal.start(path, method.name, patterns, size)
+
+    def on_progress(event):
+        if event.get('synced'):
+            journal.checkpoint(path, event['pass'] - 1, event['offset'])
+        progress(event)
+
+    result = _run_engine(
+        path, len(patterns), method.name, on_progress,
+        chunk_size=chunk_size, direct_io=direct_io, verify=verify,
+        verify_fraction=verify_fraction, patterns=patterns,
+        start_pass=start_pass, start_offset=start_offset,
+        checkpoint_interval=load_config()['checkpoint']['interval_seconds']
+    )
+    journal.complete(path)
+    result['resumed_from'] = (
+        {'pass': start_pass + 1, 'offset': start_offset} if record is not None else None
+    )
+    return result
+
+
+def wipe_record(result):
+    """Certificate fields describing the passes that ran and how they were read back."""
+    record = {'passes': [describe_pattern(p) for p in result['patterns']], 'verification': {
+        'mode': result['verify_mode'],
+        'sectors_checked': result['sectors_checked'],
+    }}
+    if result.get('resumed_from'):
+        record['resumed'] = result['resumed_from']
+    return record
+
+
+def handle_hpa_dco(path):
+    with ENGINE_CALL.time(call='handle_hpa_dco'):
+        return _engine.handle_hpa_dco(path)
+
+
+def detect_devices():
+    return _engine.detect_devices()
@@ -1,15 +1,29 @@
 import sys
+import threading
+import time
 from PyQt6.QtWidgets import (
-    QApplication, QMainWindow, QVBoxLayout, QWidget, QPushButton, 
-    QLabel, QTextEdit, QComboBox, QMessageBox, QWizard, QWizardPage
+    QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QPushButton, 
+    QLabel, QTextEdit, QComboBox, QMessageBox, QWizard, QWizardPage,
+    QListWidget, QListWidgetItem, QAbstractItemView, QProgressBar, QCheckBox, QFileDialog
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QObject, QThread, pyqtSignal
 from PyQt6.QtGui import QPalette, QColor
-import secure_wipe_engine as engine  # Rust module
+from . import engine  # Rust engine wrapper
 from .cert_gen import CertificateGenerator
-from .utils import load_config
+from .cert_store import CertStore
+from .checkpoint import CheckpointJournal
+from .devices import DeviceInventory
+from .logging_config import get_logger, setup_logging
+from .methods import get_method
+from .pipeline import wipe_and_certify
+from .progress import ProgressTracker, WipeCancelled
+from .scheduler import DeviceScheduler
+from .utils import LazyModule, load_config
 from datetime import datetime
-import psutil  # Fallback for device detection
+
+psutil = LazyModule('psutil')  # Fallback for device detection
+
+_log = get_logger('gui')
 
 class WipeWizard(QWizard):
     def __init__(self):
@@ -33,29 +47,113 @@ class ConfirmPage(QWizardPage):
         super().__init__()
         self.setTitle("Confirm Wipe")
 
+class WipeWorker(QObject):
+    """Runs one device wipe on a QThread and reports back through signals."""
+    progress = pyqtSignal(str, object)
+    finished = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+    cancelled = pyqtSignal(str)
+
+    # Cap progress signals per device so many parallel wipes can't flood the event loop
+    MAX_UPDATES_PER_SEC = 30
+
+    def __init__(self, device, passes, method, gen, journal=None, resume=False, store=None,
+                 serial=None):
+        super().__init__()
+        self.device = device
+        self.passes = passes
+        self.method = method
+        self.gen = gen
+        self.store = store
+        self.serial = serial
+        self.journal = journal
+        self.resume = resume
+        self.tracker = None
+        self._cancel = threading.Event()
+        self._last_emit = 0.0
+
+    def cancel(self):
+        """Thread-safe; the engine stops at its next progress report."""
+        self._cancel.set()
+
+    def _on_progress(self, event):
+        if self._cancel.is_set():
+            raise WipeCancelled(self.device)
+        now = time.monotonic()
+        pass_done = event['bytes_written'] >= event['bytes_total']
+        if pass_done or now - self._last_emit >= 1.0 / self.MAX_UPDATES_PER_SEC:
+            self._last_emit = now
+            self.progress.emit(self.device, self.tracker.update(event))
+
+    def run(self):
+        self.tracker = ProgressTracker(self.device)
+        try:
+            method = get_method(self.method, self.passes)
+            result = wipe_and_certify(
+                self.device, method, self.gen, self._on_progress, store=self.store,
+                journal=self.journal, resume=self.resume, serial=self.serial
+            )
+        except WipeCancelled:
+            self.cancelled.emit(self.device)
+        except Exception as e:
+            self.failed.emit(self.device, str(e))
+        else:
+            self.finished.emit(self.device, result)
+
 class SecureWipeApp(QMainWindow):
+    # Emitted from the inventory watcher thread; Qt queues it to the GUI thread
+    devices_changed = pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.config = load_config()
+        self.workers = {}  # device -> (QThread, WipeWorker)
+        self.progress_rows = {}  # device -> (progress bar, status label, cancel button)
+        self.queued = []  # Devices waiting for a free slot on their controller
+        self.certs = {}  # device -> cert_id of its latest certificate
+        self.closing = set()  # Devices whose wipe must end before the window closes
         self.setWindowTitle('Secure Wipe')
         self.setGeometry(100, 100, 800, 600)
         self.gen = CertificateGenerator()
+        self.inventory = DeviceInventory(**self.config['devices'])
+        self.scheduler = DeviceScheduler(**self.config['scheduler'])
+        self.scheduler.add_listener(self._start_queued)
+        self.journal = CheckpointJournal(self.config['checkpoint']['path'])
+        self.cert_store = CertStore(**self.config['certs'])
+        self.theme = self.config['app']['theme']
         self.init_ui()
-        self.set_theme(self.config['app']['theme'])
+        self.set_theme(self.theme)
+        if self.inventory.available:
+            self.inventory.add_listener(lambda added, removed: self.devices_changed.emit())
+            self.devices_changed.connect(self.refresh_devices)
+            self.inventory.watch()
 
     def init_ui(self):
         central = QWidget()
         self.setCentralWidget(central)
         layout = QVBoxLayout()
 
+        # Logs (created first so device refresh can log)
+        self.log_text = QTextEdit()
+        self.log_text.setReadOnly(True)
+
         # Dashboard
         self.label = QLabel('Select Device to Wipe')
         layout.addWidget(self.label)
 
         self.device_combo = QComboBox()
-        self.refresh_devices()
         layout.addWidget(self.device_combo)
 
+        layout.addWidget(QLabel('Or select several devices to wipe in parallel'))
+        self.device_list = QListWidget()
+        self.device_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        layout.addWidget(self.device_list)
+        self.refresh_devices()
+
+        self.resume_check = QCheckBox('Resume interrupted wipes from last checkpoint')
+        self.resume_check.setChecked(False)  # A journal may belong to a drive since swapped
+        layout.addWidget(self.resume_check)
+
         self.wipe_btn = QPushButton('One-Click Wipe (3-Pass)')
         self.wipe_btn.clicked.connect(self.wipe_device)
         layout.addWidget(self.wipe_btn)
@@ -64,9 +162,14 @@ class SecureWipeApp(QMainWindow):
         self.wizard_btn.clicked.connect(self.start_wizard)
         layout.addWidget(self.wizard_btn)
 
-        # Logs
-        self.log_text = QTextEdit()
-        self.log_text.setReadOnly(True)
+        self.save_cert_btn = QPushButton('Save Certificate PDF')
+        self.save_cert_btn.clicked.connect(self.save_certificate)
+        layout.addWidget(self.save_cert_btn)
+
+        # Per-device progress
+        self.progress_layout = QVBoxLayout()
+        layout.addLayout(self.progress_layout)
+
         layout.addWidget(self.log_text)
 
         self.theme_btn = QPushButton('Toggle Dark/Light')
@@ -76,44 +179,192 @@ class SecureWipeApp(QMainWindow):
         central.setLayout(layout)
 
     def refresh_devices(self):
-        try:
-            devices = engine.detect_devices()
-        except:
-            devices = [p.device for p in psutil.disk_partitions()]
+        if self.inventory.available:
+            self.inventory.refresh()
+            entries = [(d.path, d.describe()) for d in self.inventory.devices()]
+        else:
+            try:
+                devices = engine.detect_devices()
+            except:
+                devices = [p.device for p in psutil.disk_partitions()]
+            entries = [(d, d) for d in devices]
         self.device_combo.clear()
-        self.device_combo.addItems(devices)
-        self.log(f"Detected devices: {devices}")
+        self.device_list.clear()
+        for path, label in entries:
+            self.device_combo.addItem(label, path)
+            item = QListWidgetItem(label)
+            item.setData(Qt.ItemDataRole.UserRole, path)
+            self.device_list.addItem(item)
+        self.log(f"Detected devices: {[path for path, _ in entries]}")
 
     def log(self, msg):
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         self.log_text.append(f"[{timestamp}] {msg}")
+        _log.info(msg)
+
+    def selected_devices(self):
+        devices = [item.data(Qt.ItemDataRole.UserRole) for item in self.device_list.selectedItems()]
+        if not devices and self.device_combo.currentText():
+            devices = [self.device_combo.currentData() or self.device_combo.currentText()]
+        return devices
 
     def wipe_device(self):
-        device = self.device_combo.currentText()
-        if not device:
+        devices = self.selected_devices()
+        if not devices:
             self.log("No device selected.")
             return
         reply = QMessageBox.question(
-            self, 'Confirm Wipe', f'Wipe {device}? This is IRREVERSIBLE!',
+            self, 'Confirm Wipe', f'Wipe {", ".join(devices)}? This is IRREVERSIBLE!',
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
         if reply != QMessageBox.StandardButton.Yes:
             return
-        try:
-            passes = self.config['app']['wipe_passes']
-            self.log(f"Starting {passes}-pass wipe on {device}...")
-            engine.wipe_device(device, passes)
-            engine.handle_hpa_dco(device)
-            self.log("Wipe completed successfully.")
-            self.generate_cert(device)
-        except Exception as e:
-            self.log(f"Error during wipe: {e}")
-            QMessageBox.critical(self, 'Wipe Error', str(e))
+        for device in devices:
+            self.start_wipe(device)
+
+    def start_wipe(self, device):
+        if device in self.workers or device in self.queued:
+            self.log(f"{device} is already being wiped.")
+            return
+        self.add_progress_row(device)
+        if self.scheduler.try_acquire(device):
+            self._launch(device)
+        else:
+            self.queued.append(device)
+            self.progress_rows[device][1].setText('Queued (controller busy)')
+
+    def _start_queued(self):
+        for device in list(self.queued):
+            if self.scheduler.try_acquire(device):
+                self.queued.remove(device)
+                self._launch(device)
 
-    def generate_cert(self, device):
+    def _launch(self, device):
+        passes = self.config['app']['wipe_passes']
         method = self.config['app']['default_method']
-        cert_files = self.gen.generate_full_cert(device, method)
-        self.log(f"Certificates generated: {cert_files}")
+        disk = self.inventory.get(device)
+        worker = WipeWorker(
+            device, passes, method, self.gen,
+            journal=self.journal, resume=self.resume_check.isChecked(), store=self.cert_store,
+            serial=disk.serial if disk else None
+        )
+        pass_count = get_method(method, passes).pass_count
+        thread = QThread(self)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.progress.connect(self.on_wipe_progress)
+        worker.finished.connect(self.on_wipe_finished)
+        worker.failed.connect(self.on_wipe_failed)
+        worker.cancelled.connect(self.on_wipe_cancelled)
+        for signal in (worker.finished, worker.failed, worker.cancelled):
+            signal.connect(thread.quit)
+        thread.finished.connect(lambda d=device: self.workers.pop(d, None))
+        thread.finished.connect(thread.deleteLater)
+        self.workers[device] = (thread, worker)
+        self.log(f"Starting {method} ({pass_count} passes) on {device}...")
+        thread.start()
+
+    def add_progress_row(self, device):
+        if device in self.progress_rows:
+            bar, status, cancel_btn = self.progress_rows[device]
+        else:
+            row = QHBoxLayout()
+            row.addWidget(QLabel(device))
+            bar = QProgressBar()
+            bar.setRange(0, 1000)
+            row.addWidget(bar)
+            status = QLabel()
+            row.addWidget(status)
+            cancel_btn = QPushButton('Cancel')
+            cancel_btn.clicked.connect(lambda _=False, d=device: self.cancel_wipe(d))
+            row.addWidget(cancel_btn)
+            self.progress_layout.addLayout(row)
+            self.progress_rows[device] = (bar, status, cancel_btn)
+        bar.setValue(0)
+        status.setText('Starting...')
+        cancel_btn.setEnabled(True)
+
+    def cancel_wipe(self, device):
+        if device in self.queued:
+            self.queued.remove(device)
+            self._finish_row(device, 'Cancelled')
+        elif device in self.workers:
+            self.workers[device][1].cancel()
+            self.progress_rows[device][1].setText('Cancelling...')
+
+    def on_wipe_progress(self, device, event):
+        self.scheduler.observe(device, event['bytes_written'])
+        bar, status, _ = self.progress_rows[device]
+        bar.setValue(int(event['percent'] * 10))
+        eta = event['eta_seconds']
+        status.setText(
+            f"Pass {event['pass']}/{event['passes']} - {event['throughput_mbps']} MB/s"
+            + (f" - ETA {eta:.0f}s" if eta is not None else '')
+        )
+
+    def _finish_row(self, device, text):
+        _, status, cancel_btn = self.progress_rows[device]
+        status.setText(text)
+        cancel_btn.setEnabled(False)
+
+    def on_wipe_finished(self, device, result):
+        self.scheduler.release(device)
+        self.progress_rows[device][0].setValue(1000)
+        self._finish_row(device, 'Completed')
+        self.log(f"Wipe completed successfully on {device}.")
+        self.log(f"Certificate {result.get('cert_id')} issued: {result.get('cert_files')}")
+        if result.get('cert_id'):
+            self.certs[device] = result['cert_id']
+
+    def save_certificate(self):
+        """Render (on first use) and save the PDF certificate of the selected device."""
+        devices = [d for d in self.selected_devices() if d in self.certs]
+        if not devices:
+            self.log("No certificate for the selected device yet.")
+            return
+        device = devices[0]
+        cert_id = self.certs[device]
+        default = f"{device.strip('/').replace('/', '_')}_cert.pdf"
+        filename, _ = QFileDialog.getSaveFileName(self, 'Save Certificate', default, 'PDF (*.pdf)')
+        if not filename:
+            return
+        artifact = self.cert_store.load(cert_id, 'pdf')
+        if artifact is None:
+            self.log(f"Certificate {cert_id[:12]} for {device} is not in the certificate store.")
+            QMessageBox.critical(self, 'Certificate Error',
+                                 f"Certificate {cert_id[:12]} for {device} was not found.")
+            return
+        content, _ = artifact
+        with open(filename, 'wb') as f:
+            f.write(content)
+        self.log(f"Certificate {cert_id[:12]} for {device} saved to {filename}")
+
+    def on_wipe_failed(self, device, error):
+        self.scheduler.release(device)
+        self._finish_row(device, 'Failed')
+        self.log(f"Error during wipe of {device}: {error}")
+        QMessageBox.critical(self, 'Wipe Error', f"{device}: {error}")
+
+    def on_wipe_cancelled(self, device):
+        self.scheduler.release(device)
+        self._finish_row(device, 'Cancelled')
+        self.log(f"Wipe cancelled on {device}.")
+
+    def closeEvent(self, event):
+        # Never block the event loop: cancel the wipes and close again as each thread ends.
+        # Overwrites stop at their next progress event; a hardware erase runs to completion.
+        self.queued.clear()
+        if self.workers:
+            for device, (thread, worker) in list(self.workers.items()):
+                worker.cancel()
+                if device not in self.closing:
+                    self.closing.add(device)
+                    thread.finished.connect(self.close)
+            self.log(f"Cancelling {', '.join(self.workers)}; closing once they stop.")
+            event.ignore()
+            return
+        self.inventory.stop()
+        super().closeEvent(event)
 
     def start_wizard(self):
         wizard = WipeWizard()
@@ -155,12 +406,11 @@ class SecureWipeApp(QMainWindow):
         QApplication.setPalette(palette)
 
     def toggle_theme(self):
-        current_mode = self.config['app']['theme']
-        new_mode = 'dark' if current_mode == 'light' else 'light'
-        self.config['app']['theme'] = new_mode
-        self.set_theme(new_mode)
+        self.theme = 'dark' if self.theme == 'light' else 'light'
+        self.set_theme(self.theme)
 
 if __name__ == '__main__':
+    setup_logging()
     app = QApplication(sys.argv)
     ex = SecureWipeApp()
     ex.show()
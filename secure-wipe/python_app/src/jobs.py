@@ -0,0 +1,454 @@
+"""
+Background job queue for bulk wipes.
+A job is a batch of devices; each device runs on a bounded worker pool
+so HTTP requests return immediately with a job ID. With a DeviceScheduler,
+a device only starts once its controller group has a free write slot;
+queued devices behind a busy controller don't hold up other controllers.
+
+With a JobStore, jobs are also recorded in SQLite so several server
+processes share them: any process can accept and report jobs, while only
+the one holding a RunnerLock executes them (see JobManager.elect). The
+runner also records each device's latest progress there, so the other
+processes can report live jobs, and finished jobs past the newest
+`keep_finished` are read back from there instead of kept in memory. A
+drained manager stops its wipes at their
+next progress event and leaves them `interrupted`; the next lock holder
+resumes them from the checkpoint journal.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from .progress import WipeCancelled
+
+PENDING = 'pending'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+INTERRUPTED = 'interrupted'
+
+
+def _timestamp(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+class DeviceTask:
+    def __init__(self, device, index=0):
+        self.device = device
+        self.index = index
+        self.state = PENDING
+        self.result = None
+        self.error = None
+        self.started = None
+        self.finished = None
+
+    def to_dict(self):
+        return {
+            'device': self.device,
+            'state': self.state,
+            'result': self.result,
+            'error': self.error,
+            'started': self.started.isoformat() if self.started else None,
+            'finished': self.finished.isoformat() if self.finished else None,
+        }
+
+
+class Job:
+    def __init__(self, devices, params=None, job_id=None, created=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.params = params or {}
+        self.created = created or datetime.now()
+        self.tasks = [DeviceTask(d, i) for i, d in enumerate(devices)]
+        self.done = threading.Event()
+
+    @property
+    def state(self):
+        states = {t.state for t in self.tasks}
+        if states <= {PENDING}:
+            return PENDING
+        if INTERRUPTED in states and RUNNING not in states:
+            return INTERRUPTED
+        if states & {PENDING, RUNNING}:
+            return RUNNING
+        if FAILED in states:
+            return FAILED
+        return COMPLETED
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'state': self.state,
+            'created': self.created.isoformat(),
+            'params': self.params,
+            'devices': [t.to_dict() for t in self.tasks],
+        }
+
+
+class JobStore:
+    """SQLite record of jobs and their per-device tasks, shared between processes."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')  # Streamed bulk submissions commit per job
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                params TEXT NOT NULL,
+                created TEXT NOT NULL
+            )''')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS tasks (
+                job_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                device TEXT NOT NULL,
+                state TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                started TEXT,
+                finished TEXT,
+                PRIMARY KEY (job_id, idx)
+            )''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state, job_id)')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS progress (
+                job_id TEXT NOT NULL,
+                device TEXT NOT NULL,
+                event TEXT NOT NULL,
+                PRIMARY KEY (job_id, device)
+            )''')
+        self._conn.commit()
+
+    def add(self, job):
+        with self._lock:
+            self._conn.execute('INSERT INTO jobs VALUES (?, ?, ?)',
+                               (job.id, json.dumps(job.params), job.created.isoformat()))
+            self._conn.executemany(
+                'INSERT INTO tasks (job_id, idx, device, state) VALUES (?, ?, ?, ?)',
+                [(job.id, t.index, t.device, t.state) for t in job.tasks]
+            )
+            self._conn.commit()
+
+    def update(self, job, task):
+        result = json.dumps(task.result, default=str) if task.result is not None else None
+        with self._lock:
+            self._conn.execute(
+                'UPDATE tasks SET state = ?, result = ?, error = ?, started = ?, finished = ? '
+                'WHERE job_id = ? AND idx = ?',
+                (task.state, result, task.error,
+                 task.started.isoformat() if task.started else None,
+                 task.finished.isoformat() if task.finished else None, job.id, task.index)
+            )
+            self._conn.commit()
+
+    def set_progress(self, job_id, device, event):
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO progress VALUES (?, ?, ?)',
+                               (job_id, device, json.dumps(event)))
+            self._conn.commit()
+
+    def progress(self, job_id):
+        """{device: latest recorded progress event} of a job."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT device, event FROM progress WHERE job_id = ?', (job_id,)
+            ).fetchall()
+        return {device: json.loads(event) for device, event in rows}
+
+    def _jobs(self, where, args=()):
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT id, params, created FROM jobs {where}', args
+            ).fetchall()
+            tasks = self._conn.execute(
+                'SELECT job_id, device, state, result, error, started, finished FROM tasks '
+                f'WHERE job_id IN ({",".join("?" * len(rows))}) ORDER BY job_id, idx',
+                [row[0] for row in rows]
+            ).fetchall()
+        by_job = {}
+        for job_id, *task in tasks:
+            by_job.setdefault(job_id, []).append(task)
+        jobs = []
+        for job_id, params, created in rows:
+            entries = by_job.get(job_id, [])
+            job = Job([e[0] for e in entries], json.loads(params), job_id, _timestamp(created))
+            for task, (_, state, result, error, started, finished) in zip(job.tasks, entries):
+                task.state, task.error = state, error
+                task.result = json.loads(result) if result else None
+                task.started, task.finished = _timestamp(started), _timestamp(finished)
+            if all(t.finished for t in job.tasks):
+                job.done.set()
+            jobs.append(job)
+        return jobs
+
+    def get(self, job_id):
+        jobs = self._jobs('WHERE id = ?', (job_id,))
+        return jobs[0] if jobs else None
+
+    def list(self, limit=200):
+        """The newest `limit` jobs, oldest first."""
+        return self._jobs('ORDER BY created DESC LIMIT ?', (limit,))[::-1]
+
+    def unfinished(self):
+        """Jobs with tasks that are pending, running or interrupted, oldest first."""
+        return self._jobs(
+            'WHERE id IN (SELECT job_id FROM tasks WHERE state IN (?, ?, ?)) ORDER BY created',
+            (PENDING, RUNNING, INTERRUPTED)
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RunnerLock:
+    """Non-blocking exclusive lock on a file, held until the process exits."""
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def acquire(self):
+        import fcntl  # POSIX only, like the multi-process server that uses it
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+
+class JobManager:
+    """Runs per-device work for each job on a shared, bounded thread pool."""
+
+    def __init__(self, max_workers=4, scheduler=None, store=None, progress_interval=1.0,
+                 keep_finished=100):
+        self.max_workers = max_workers
+        self.scheduler = scheduler
+        self.store = store
+        self.progress_interval = progress_interval  # Seconds between stored progress events
+        self.keep_finished = keep_finished  # Finished jobs kept in memory when there is a store
+        self.runner = True  # False: submissions are only recorded, for the lock holder to run
+        self.stopping = threading.Event()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='wipe-worker'
+        )
+        self._jobs = {}
+        self._pending = deque()  # (job, task, func) waiting for a worker or write slot
+        self._running = 0
+        self._progress_saved = {}  # (job_id, device) -> monotonic time of the last stored event
+        self._ended = {}  # IDs of finished jobs, oldest first
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._idle = threading.Condition()
+        if scheduler is not None:
+            scheduler.add_listener(self._dispatch)
+
+    def submit(self, devices, func, params=None):
+        """Queue func(job, device) for every device; returns the Job immediately."""
+        job = Job(devices, params)
+        if not job.tasks:
+            job.done.set()
+        if not self.runner:
+            self.store.add(job)
+            return job
+        with self._lock:
+            self._jobs[job.id] = job
+            self._pending.extend((job, task, func) for task in job.tasks)
+        if self.store is not None:
+            self.store.add(job)
+        self._dispatch()
+        return job
+
+    def adopt(self, make_func):
+        """Queue stored jobs this manager does not know yet; returns the number of tasks.
+
+        make_func(params, resume) builds the func(job, device) for a job's
+        params. Tasks another process left running or interrupted are
+        re-queued with resume=True so they continue from their checkpoint.
+        """
+        adopted = 0
+        for job in self.store.unfinished():
+            with self._lock:
+                if job.id in self._jobs:
+                    continue
+                self._jobs[job.id] = job
+                for task in job.tasks:
+                    if task.state not in (PENDING, RUNNING, INTERRUPTED):
+                        continue
+                    resume = task.state != PENDING
+                    task.state = PENDING
+                    self._pending.append((job, task, make_func(job.params, resume)))
+                    adopted += 1
+        if adopted:
+            self._dispatch()
+        return adopted
+
+    def elect(self, lock, make_func, interval=1.0):
+        """Share the store with other processes; only the holder of `lock` runs jobs.
+
+        Until this process takes the lock it only records submissions. The
+        holder adopts stored jobs every `interval` seconds, including any a
+        previous holder was running when it exited.
+        """
+        self.runner = False
+
+        def loop():
+            while not self.stopping.is_set():
+                if self.runner or lock.acquire():
+                    self.runner = True
+                    self.adopt(make_func)
+                self.stopping.wait(interval)
+
+        threading.Thread(target=loop, name='job-runner', daemon=True).start()
+
+    def add_listener(self, callback):
+        """callback(job) runs when the job's last task ends, just before `done` is set."""
+        self._listeners.append(callback)
+
+    def _dispatch(self):
+        # Start queued tasks in submission order, skipping those whose group is full
+        started = []
+        with self._lock:
+            if self.stopping.is_set():
+                return
+            for entry in list(self._pending):
+                if self._running >= self.max_workers:
+                    break
+                device = entry[1].device
+                if self.scheduler is None or self.scheduler.try_acquire(device):
+                    self._pending.remove(entry)
+                    self._running += 1
+                    started.append(entry)
+        for entry in started:
+            self._executor.submit(self._run, *entry)
+
+    def _save(self, job, task):
+        if self.store is not None:
+            self.store.update(job, task)
+
+    def record_progress(self, job, device, event):
+        """Store a device's progress for other processes, at most every progress_interval."""
+        if self.store is None:
+            return
+        key = (job.id, device)
+        now = time.monotonic()
+        final = event['bytes_written'] >= event['bytes_total']
+        with self._lock:
+            if not final and now - self._progress_saved.get(key, float('-inf')) < self.progress_interval:
+                return
+            self._progress_saved[key] = now
+        self.store.set_progress(job.id, device, event)
+
+    def _run(self, job, task, func):
+        task.state = RUNNING
+        task.started = datetime.now()
+        self._save(job, task)
+        try:
+            task.result = func(job, task.device)
+            task.state = COMPLETED
+        except WipeCancelled as e:
+            if self.stopping.is_set():
+                task.state = INTERRUPTED  # Resumed by the next runner
+            else:
+                task.error = str(e)
+                task.state = FAILED
+        except Exception as e:
+            task.error = str(e)
+            task.state = FAILED
+        finally:
+            if task.state != INTERRUPTED:
+                task.finished = datetime.now()
+            self._save(job, task)
+            with self._lock:
+                self._running -= 1
+                self._progress_saved.pop((job.id, task.device), None)
+                ended = job.id not in self._ended and all(t.finished for t in job.tasks)
+                if ended:
+                    self._ended[job.id] = None
+            with self._idle:
+                self._idle.notify_all()
+            if ended:
+                for listener in list(self._listeners):
+                    listener(job)
+                job.done.set()
+                self._retire()
+            if self.scheduler is not None:
+                self.scheduler.release(task.device)  # Notifies _dispatch
+            else:
+                self._dispatch()
+
+    def _retire(self):
+        # Beyond keep_finished, finished jobs are read back from the store
+        with self._lock:
+            while len(self._ended) > self.keep_finished:
+                job_id = next(iter(self._ended))
+                del self._ended[job_id]
+                if self.store is not None:
+                    self._jobs.pop(job_id, None)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = self.store.get(job_id)  # Submitted to, or run by, another process
+        return job
+
+    def is_local(self, job_id):
+        """True if this manager runs the job, so its events and `done` are live."""
+        with self._lock:
+            return job_id in self._jobs
+
+    def list(self):
+        with self._lock:
+            local = dict(self._jobs)
+        if self.store is None:
+            return list(local.values())
+        jobs = {job.id: job for job in self.store.list()}
+        jobs.update((job_id, job) for job_id, job in local.items() if job_id in jobs)
+        return list(jobs.values())
+
+    def wait(self, job_id, timeout=None, poll_interval=0.5):
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        if self.store is None or self.is_local(job_id):
+            return job.done.wait(timeout)
+        # Another process runs it; stored snapshots are only `done` once read after the end
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not job.done.is_set():
+            remaining = poll_interval if deadline is None else deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(poll_interval, remaining))
+            job = self.get(job_id)
+        return True
+
+    def drain(self, timeout=None):
+        """Stop starting tasks and wait up to `timeout` seconds for running ones.
+
+        Task funcs raise WipeCancelled from their progress callbacks once
+        `stopping` is set, so wipes end at their next progress event and are
+        recorded as interrupted; queued tasks stay pending in the store.
+        Returns True if nothing is left running.
+        """
+        self.stopping.set()
+        with self._lock:
+            self._pending.clear()
+        with self._idle:
+            return self._idle.wait_for(lambda: self._running == 0, timeout)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
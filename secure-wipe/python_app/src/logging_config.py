@@ -0,0 +1,162 @@
+"""
+Logging pipeline for the app and API.
+Callers log through the stdlib `logging` module under the 'secure_wipe'
+logger. A QueueHandler hands records to a QueueListener thread that does all
+formatting and I/O (stdout, optional file, the audit log store), so request
+and wipe threads never block on output. Engine progress records are sampled
+per device before they are queued.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+
+LOGGER_NAME = 'secure_wipe'
+
+
+def get_logger(source='app'):
+    """Logger for one part of the app; the suffix becomes the audit log `source`."""
+    return logging.getLogger(f'{LOGGER_NAME}.{source}')
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including `device` and `data` extras."""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key in ('device', 'data'):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class ProgressSampler(logging.Filter):
+    """Pass at most one progress record per device every `interval` seconds.
+
+    Records are progress records when logged with extra={'progress': True};
+    pass boundaries (extra 'final': True) always get through.
+    """
+
+    def __init__(self, interval=5.0):
+        super().__init__()
+        self.interval = interval
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if not getattr(record, 'progress', False) or getattr(record, 'final', False):
+            return True
+        now = time.monotonic()
+        key = getattr(record, 'device', None)
+        with self._lock:
+            if now - self._last.get(key, float('-inf')) < self.interval:
+                return False
+            self._last[key] = now
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread
+    and drops records (counting them) instead of blocking when the queue is full."""
+
+    dropped = 0
+
+    def prepare(self, record):
+        # Same-process queue: no pickling, so msg % args can wait for the listener
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class AuditStoreHandler(logging.Handler):
+    """Writes records to the SQLite audit log store behind GET /api/v1/logs."""
+
+    def emit(self, record):
+        from .logstore import get_log_store
+        try:
+            source = record.name.split('.', 1)[1] if '.' in record.name else record.name
+            get_log_store().write(
+                record.levelname, record.getMessage(), device=getattr(record, 'device', None),
+                source=source, data=getattr(record, 'data', None)
+            )
+        except Exception:
+            self.handleError(record)
+
+
+_listener = None
+_lock = threading.Lock()
+
+def setup_logging(settings=None):
+    """Configure the 'secure_wipe' logger from the `logging` config section (idempotent)."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+        if settings is None:
+            from .utils import load_config
+            settings = load_config()['logging']
+        if settings.get('json'):
+            formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter(settings.get('format'))
+        # The CLI keeps stdout for its JSON-lines output
+        stream = sys.stderr if settings.get('stream') == 'stderr' else sys.stdout
+        handlers = [logging.StreamHandler(stream)]
+        if settings.get('file'):
+            handlers.append(logging.FileHandler(settings['file']))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        if settings.get('audit', True):
+            handlers.append(AuditStoreHandler())
+
+        logger = logging.getLogger(LOGGER_NAME)
+        logger.setLevel(settings.get('level', 'INFO'))
+        logger.propagate = False
+        queue_handler = DeferredQueueHandler(queue.Queue(maxsize=settings.get('queue_size', 10000)))
+        queue_handler.addFilter(ProgressSampler(settings.get('progress_interval', 5.0)))
+        logger.addHandler(queue_handler)
+        _listener = logging.handlers.QueueListener(
+            queue_handler.queue, *handlers, respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+
+def flush_logging(timeout=5.0):
+    """Wait until queued records have been handled and the audit store has committed them."""
+    if _listener is not None:
+        _listener.queue.join()
+    from .logstore import get_log_store
+    return get_log_store().flush(timeout)
+
+
+def shutdown_logging():
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        logger = logging.getLogger(LOGGER_NAME)
+        for handler in list(logger.handlers):
+            if isinstance(handler, DeferredQueueHandler):
+                logger.removeHandler(handler)
+        _listener = None
@@ -0,0 +1,184 @@
+"""
+Persistent audit log store.
+Writers only put records on a bounded in-memory queue; a background thread
+batches them into SQLite, so logging never waits on disk. Rows are indexed
+for keyset (cursor) pagination by id, optionally narrowed by device, level
+or time range, which stays fast regardless of table size.
+"""
+
+import json
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+_STOP = object()
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts REAL NOT NULL,
+        level TEXT NOT NULL,
+        source TEXT NOT NULL,
+        device TEXT,
+        message TEXT NOT NULL,
+        data TEXT
+    )''',
+    'CREATE INDEX IF NOT EXISTS logs_ts ON logs (ts)',
+    'CREATE INDEX IF NOT EXISTS logs_device ON logs (device, id)',
+    'CREATE INDEX IF NOT EXISTS logs_level ON logs (level, id)',
+]
+
+
+def parse_timestamp(value):
+    """Epoch seconds from an ISO 8601 string or a number."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def _row_to_dict(row):
+    id_, ts, level, source, device, message, data = row
+    entry = {
+        'id': id_,
+        'timestamp': datetime.fromtimestamp(ts).isoformat(timespec='milliseconds'),
+        'level': level,
+        'source': source,
+        'device': device,
+        'message': message,
+    }
+    if data:
+        entry['data'] = json.loads(data)
+    return entry
+
+
+class LogStore:
+    def __init__(self, path, batch_size=500, flush_interval=1.0, max_queue=100000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._local = threading.local()
+        conn = self._connect()
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        self._writer = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _reader(self):
+        # One read connection per thread (Flask request threads, GUI thread)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def write(self, level, message, device=None, source='app', data=None):
+        """Queue one record; never blocks. Records are dropped (and counted) if the queue is full."""
+        record = (time.time(), level, source, device, message,
+                  json.dumps(data) if data is not None else None)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        conn = self._connect()
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or isinstance(batch[-1], threading.Event):
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            rows = [item for item in batch if isinstance(item, tuple)]
+            if rows:
+                conn.executemany(
+                    'INSERT INTO logs (ts, level, source, device, message, data) VALUES (?, ?, ?, ?, ?, ?)',
+                    rows
+                )
+                conn.commit()
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+                elif item is _STOP:
+                    stop = True
+        conn.close()
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is committed."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _where(self, since=None, until=None, device=None, level=None, cursor=None):
+        clauses, args = [], []
+        if cursor is not None:
+            clauses.append('id < ?')
+            args.append(int(cursor))
+        if device is not None:
+            clauses.append('device = ?')
+            args.append(device)
+        if level is not None:
+            clauses.append('level = ?')
+            args.append(level.upper())
+        if since is not None:
+            clauses.append('ts >= ?')
+            args.append(parse_timestamp(since))
+        if until is not None:
+            clauses.append('ts < ?')
+            args.append(parse_timestamp(until))
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', args
+
+    def query(self, limit=100, cursor=None, **filters):
+        """Newest-first page of logs; returns (entries, next_cursor)."""
+        where, args = self._where(cursor=cursor, **filters)
+        rows = self._reader().execute(
+            f'SELECT id, ts, level, source, device, message, data FROM logs{where} '
+            'ORDER BY id DESC LIMIT ?', args + [limit]
+        ).fetchall()
+        next_cursor = rows[-1][0] if rows and len(rows) == limit else None
+        return [_row_to_dict(row) for row in rows], next_cursor
+
+    def iter_all(self, page_size=1000, **filters):
+        """Every matching entry, newest first, fetched page by page."""
+        cursor = None
+        while True:
+            entries, cursor = self.query(limit=page_size, cursor=cursor, **filters)
+            yield from entries
+            if cursor is None:
+                return
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._writer.join()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_log_store():
+    """Process-wide store configured from the `audit_log` config section."""
+    global _store
+    if _store is None:
+        from .utils import load_config
+        with _store_lock:
+            if _store is None:
+                _store = LogStore(**load_config()['audit_log'])
+    return _store
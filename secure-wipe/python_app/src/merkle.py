@@ -0,0 +1,58 @@
+"""
+Merkle tree helpers for batch certificate signing.
+One ECDSA signature over the root covers every certificate in a batch;
+each certificate carries the sibling hashes needed to recompute the root.
+"""
+
+import hashlib
+
+# Domain separation so a leaf can never be mistaken for an interior node
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+
+def leaf_hash(data):
+    if isinstance(data, str):
+        data = data.encode()
+    return hashlib.sha256(LEAF_PREFIX + data).digest()
+
+
+def node_hash(left, right):
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def build_tree(leaves):
+    """Return all levels of the tree, from leaf hashes up to the root."""
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree with no leaves")
+    levels = [[leaf_hash(leaf) for leaf in leaves]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])  # Odd node is promoted unchanged
+        levels.append(parents)
+    return levels
+
+
+def inclusion_proof(levels, index):
+    """Sibling hashes from leaf `index` up to the root."""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            side = 'left' if sibling < index else 'right'
+            proof.append({'side': side, 'hash': level[sibling].hex()})
+        index //= 2
+    return proof
+
+
+def root_from_proof(data, proof):
+    node = leaf_hash(data)
+    for step in proof:
+        sibling = bytes.fromhex(step['hash'])
+        if step['side'] == 'left':
+            node = node_hash(sibling, node)
+        else:
+            node = node_hash(node, sibling)
+    return node
@@ -0,0 +1,147 @@
+"""
+Wipe method registry.
+Each method is a declared sequence of overwrite passes that the engine runs
+exactly as given, so a method's cost and its certificate match what was
+written. Steps are fixed byte patterns ('0x00', '0x92 0x49 0x24'),
+'complement' (bitwise inverse of the previous fixed pass), 'random', and
+'verify', which makes read-back of the final pass mandatory. Methods with a
+NIST 800-88 `level` ('clear' or 'purge') may be met by a hardware purge
+instead of their passes (see purge.py).
+"""
+
+RANDOM = 'random'
+COMPLEMENT = 'complement'
+VERIFY = 'verify'
+
+
+def _parse_fixed(step):
+    try:
+        return bytes(int(b, 16) for b in step.split())
+    except ValueError:
+        raise ValueError(f"Unknown wipe step: {step!r}") from None
+
+
+def describe_pattern(spec):
+    """Human-readable form of an engine pattern ('fixed:924924' -> '0x92 0x49 0x24')."""
+    if spec.split(':', 1)[0] == RANDOM:
+        return RANDOM
+    return ' '.join(f'0x{b:02X}' for b in bytes.fromhex(spec.split(':', 1)[1]))
+
+
+class WipeMethod:
+    def __init__(self, name, steps, aliases=(), description='', level=None):
+        self.name = name
+        self.aliases = tuple(aliases)
+        self.description = description
+        self.level = level
+        self.requires_verify = VERIFY in steps
+        self.passes = []  # bytes for fixed passes, RANDOM for random ones
+        for step in steps:
+            if step == VERIFY:
+                continue
+            if step == RANDOM:
+                self.passes.append(RANDOM)
+            elif step == COMPLEMENT:
+                previous = next((p for p in reversed(self.passes) if p != RANDOM), None)
+                if previous is None:
+                    raise ValueError(f"{name}: 'complement' needs an earlier fixed pass")
+                self.passes.append(bytes(b ^ 0xFF for b in previous))
+            else:
+                self.passes.append(_parse_fixed(step))
+        if not self.passes:
+            raise ValueError(f"{name}: a wipe method needs at least one pass")
+
+    @property
+    def pass_count(self):
+        return len(self.passes)
+
+    def engine_patterns(self):
+        """Pass specs in the form secure_wipe_engine.wipe_device(patterns=...) takes."""
+        return [RANDOM if p == RANDOM else 'fixed:' + p.hex() for p in self.passes]
+
+    def labels(self):
+        return [describe_pattern(spec) for spec in self.engine_patterns()]
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'aliases': list(self.aliases),
+            'description': self.description,
+            'passes': self.labels(),
+            'verify': self.requires_verify,
+            'level': self.level,
+        }
+
+
+_registry = {}
+_methods = []
+
+def register(method):
+    for key in (method.name, *method.aliases):
+        _registry[key.lower()] = method
+    _methods.append(method)
+    return method
+
+
+def legacy_method(name, passes):
+    """Zeros then random data for `passes` passes: the behaviour before methods had patterns."""
+    if not passes or passes < 1:
+        raise ValueError("passes must be at least 1")
+    return WipeMethod(name or 'Custom', ['0x00'] + [RANDOM] * (passes - 1))
+
+
+def get_method(name, passes=3):
+    """Look up a method by name or alias; unknown names get the legacy sequence."""
+    method = _registry.get((name or '').lower())
+    if method is None:
+        return legacy_method(name, passes)
+    return method
+
+
+def available_methods():
+    return list(_methods)
+
+
+register(WipeMethod(
+    'NIST 800-88 Clear', ['0x00', VERIFY],
+    aliases=('NIST Clear', 'NIST 800-88 Clear 1-Pass'),
+    description='Single zero overwrite with read-back (SP 800-88 Rev. 1 Clear)',
+    level='clear'
+))
+register(WipeMethod(
+    'NIST 800-88 Purge', [RANDOM, VERIFY],
+    aliases=('NIST Purge',),
+    description='Hardware sanitize or secure erase; single random overwrite with read-back where none is available',
+    level='purge'
+))
+register(WipeMethod(
+    'DoD 5220.22-M 3-Pass', ['0x00', COMPLEMENT, RANDOM, VERIFY],
+    aliases=('DoD 3-Pass', 'DoD 5220.22-M'),
+    description='Zeros, ones, random, then verification'
+))
+register(WipeMethod(
+    'DoD 5220.22-M ECE 7-Pass', ['0x00', COMPLEMENT, RANDOM, RANDOM, '0x00', COMPLEMENT, RANDOM, VERIFY],
+    aliases=('DoD 7-Pass', 'DoD 5220.22-M ECE'),
+    description='Two DoD 3-pass runs around an extra random pass'
+))
+register(WipeMethod(
+    'Gutmann 35-Pass',
+    [RANDOM] * 4 + [
+        '0x55', '0xAA', '0x92 0x49 0x24', '0x49 0x24 0x92', '0x24 0x92 0x49',
+        *(f'0x{n * 0x11:02X}' for n in range(16)),
+        '0x92 0x49 0x24', '0x49 0x24 0x92', '0x24 0x92 0x49',
+        '0x6D 0xB6 0xDB', '0xB6 0xDB 0x6D', '0xDB 0x6D 0xB6',
+    ] + [RANDOM] * 4,
+    aliases=('Gutmann',),
+    description='Peter Gutmann\'s 35-pass sequence for MFM/RLL encodings'
+))
+register(WipeMethod(
+    'Zero Fill', ['0x00'],
+    aliases=('Zero Fill 1-Pass',),
+    description='Single zero overwrite'
+))
+register(WipeMethod(
+    'Random 1-Pass', [RANDOM],
+    aliases=('Random',),
+    description='Single random overwrite'
+))
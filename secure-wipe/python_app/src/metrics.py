@@ -0,0 +1,339 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+Counters, gauges and histograms are plain dicts behind a per-metric lock;
+recording a sample is a dict update, cheap enough for per-chunk progress
+callbacks. GET /metrics renders the process-wide REGISTRY.
+
+Under several server workers each process keeps its own REGISTRY, so
+share() makes every worker write snapshots into a common directory and
+exposition() sums them: counters and histograms of exited workers stay
+counted, gauges only come from live ones.
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Seconds; spans sub-millisecond signing up to multi-hour wipes
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                   5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0, 14400.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if labels.keys() != set(self.labels):
+            raise ValueError(f'{self.name} expects labels {self.labels}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def remove(self, **labels):
+        with self._lock:
+            self._values.pop(self._key(labels), None)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._samples(key, value))
+        return lines
+
+    def _samples(self, key, value):
+        return [f'{self.name}{_label_text(self.labels, key)} {_number(value)}']
+
+    def snapshot(self):
+        with self._lock:
+            values = [[list(key), value] for key, value in self._values.items()]
+        return {'kind': self.kind, 'documentation': self.documentation,
+                'labels': list(self.labels), 'values': values}
+
+    def merge(self, key, value):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def snapshot(self):
+        return {**super().snapshot(), 'buckets': list(self.buckets)}
+
+    def merge(self, key, value):
+        counts, total, count = value
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0] = [a + b for a, b in zip(state[0], counts)]
+            state[1] += total
+            state[2] += count
+
+    def _samples(self, key, state):
+        counts, total, count = state
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            le = _label_text(self.labels, key, [f'le="{_number(bound)}"'])
+            lines.append(f'{self.name}_bucket{le} {cumulative}')
+        labels = _label_text(self.labels, key)
+        lines.append(f'{self.name}_sum{labels} {_number(total)}')
+        lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing  # Module reloads re-register the same metrics
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()):
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def exposition(self):
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.expose())
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def merge(self, snapshot, gauges=True):
+        """Add a snapshot's samples to this registry's (gauges=False skips gauges)."""
+        for name, entry in snapshot.items():
+            if entry['kind'] == 'gauge' and not gauges:
+                continue
+            metric = self._metrics.get(name)
+            if metric is None:
+                kind = _KINDS[entry['kind']]
+                extra = {'buckets': entry['buckets']} if kind is Histogram else {}
+                metric = self.register(kind(name, entry['documentation'], entry['labels'], **extra))
+            for key, value in entry['values']:
+                metric.merge(tuple(key), value)
+
+
+_KINDS = {'counter': Counter, 'gauge': Gauge, 'histogram': Histogram}
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Exists, owned by someone else
+    return True
+
+
+class SharedMetrics:
+    """Snapshots of a registry in `directory`, one <pid>.json per worker process."""
+
+    def __init__(self, directory, registry, interval=5.0):
+        self.directory = directory
+        self.registry = registry
+        self.interval = interval
+        self._stop = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, f'{os.getpid()}.json')
+
+    def write(self, final=False):
+        """Replace this process's snapshot; a final one drops gauges, which die with it."""
+        snapshot = self.registry.snapshot()
+        if final:
+            snapshot = {name: entry for name, entry in snapshot.items() if entry['kind'] != 'gauge'}
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp, self.path)
+
+    def start(self):
+        def loop():
+            while not self._stop.wait(self.interval):
+                self.write()
+
+        self.write()
+        threading.Thread(target=loop, name='metrics-sync', daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        self.write(final=True)
+
+    def exposition(self):
+        """Every worker's latest snapshot summed, this process's current values included."""
+        self.write()
+        merged = Registry()
+        for path in sorted(glob.glob(os.path.join(self.directory, '*.json'))):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue  # Removed or replaced while listing
+            pid = int(os.path.basename(path)[:-len('.json')])
+            merged.merge(snapshot, gauges=_alive(pid))
+        return merged.exposition()
+
+    @staticmethod
+    def reset(directory):
+        """Remove all snapshots; the server master calls this before starting workers."""
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            os.remove(path)
+
+
+_shared = None
+
+
+def share(directory, interval=5.0):
+    """Sum REGISTRY with the other processes sharing `directory` in exposition()."""
+    global _shared
+    _shared = SharedMetrics(directory, REGISTRY, interval)
+    _shared.start()
+    return _shared
+
+
+def unshare():
+    global _shared
+    if _shared is not None:
+        _shared.stop()
+        _shared = None
+
+
+def exposition():
+    """The text served by GET /metrics."""
+    if _shared is not None:
+        return _shared.exposition()
+    return REGISTRY.exposition()
+
+
+REGISTRY = Registry()
+
+# Wipe engine
+BYTES_WIPED = REGISTRY.counter(
+    'secure_wipe_bytes_written_total', 'Bytes overwritten by the engine.', ['method'])
+DEVICE_THROUGHPUT = REGISTRY.gauge(
+    'secure_wipe_device_throughput_mbps', 'Latest write throughput per device in MB/s.', ['device'])
+PASS_DURATION = REGISTRY.histogram(
+    'secure_wipe_pass_duration_seconds', 'Duration of one overwrite pass.', ['method'])
+ENGINE_CALL = REGISTRY.histogram(
+    'secure_wipe_engine_call_seconds', 'Duration of engine calls.', ['call'])
+WIPES = REGISTRY.counter(
+    'secure_wipe_wipes_total', 'Finished device wipes by outcome.', ['method', 'outcome'])
+WIPES_ACTIVE = REGISTRY.gauge('secure_wipe_wipes_active', 'Wipes currently running.')
+PURGE_DURATION = REGISTRY.histogram(
+    'secure_wipe_purge_seconds', 'Duration of hardware purge commands.', ['action'])
+
+# Certificates
+CERT_SIGN = REGISTRY.histogram('secure_wipe_cert_sign_seconds', 'Certificate signing latency.')
+CERT_RENDER = REGISTRY.histogram(
+    'secure_wipe_cert_render_seconds', 'Certificate artifact render latency.', ['artifact'])
+CERT_VERIFY = REGISTRY.histogram(
+    'secure_wipe_cert_verify_seconds', 'Certificate signature verification latency.')
+CERT_VERIFICATIONS = REGISTRY.counter(
+    'secure_wipe_cert_verifications_total', 'Certificate verifications by result.', ['result'])
+
+# HTTP API
+HTTP_REQUESTS = REGISTRY.counter(
+    'secure_wipe_http_requests_total', 'API requests.', ['endpoint', 'method', 'status'])
+HTTP_LATENCY = REGISTRY.histogram(
+    'secure_wipe_http_request_seconds', 'API request latency.', ['endpoint'])
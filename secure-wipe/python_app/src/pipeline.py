@@ -0,0 +1,77 @@
+"""
+One device from wipe to certificate, shared by the GUI, the API and the
+headless CLI: purge the drive in hardware where the method allows and the
+drive supports it, otherwise run the engine (resuming from the journal when
+asked), then issue the signed certificate into the cert store.
+
+After a hardware purge the device is read back at the engine's verify
+level (purge.verify_purge), so Clear/Purge certificates never go out
+without a verification record.
+
+The purge planner replaces the old HPA/DCO step (an ATA enhanced security
+erase without a password): when it falls back to overwrite, the drive has
+just been found unable to take a security erase, so none is attempted.
+"""
+
+from . import engine, purge
+from .checkpoint import device_size
+from .logging_config import get_logger
+from .utils import load_config
+
+_log = get_logger('purge')
+
+
+def _hardware_purge(plan, on_progress, verify, verify_fraction):
+    settings = load_config()['purge']
+    size = device_size(plan.device)
+
+    def report(fraction):
+        # Engine-shaped events, so trackers, the SSE stream and the GUI need no special case
+        done = int(size * fraction)
+        on_progress({'pass': 1, 'passes': 1, 'bytes_written': done, 'bytes_total': size,
+                     'offset': done, 'synced': False})
+
+    _log.info('Purging %s with %s', plan.device, plan.action,
+              extra={'device': plan.device, 'data': plan.to_dict()})
+    record = purge.execute(plan, progress=report if on_progress else None,
+                           poll_interval=settings['poll_interval'], timeout=settings['timeout'])
+    verification = purge.verify_purge(plan, verify, verify_fraction)
+    if on_progress is not None:
+        report(1.0)
+    return record, verification
+
+
+def wipe_and_certify(device, method, gen, on_progress=None, store=None, journal=None,
+                     resume=False, serial=None, **engine_options):
+    """Wipe `device` with a WipeMethod and certify it.
+
+    engine_options (chunk_size, direct_io, verify, verify_fraction) override
+    the `engine` config section. Returns {'device', 'cert_id', 'cert_files',
+    'passes', 'verification', 'purge'[, 'resumed']}.
+    """
+    config = load_config()
+    plan = purge.plan_purge(device, method, mode=config['purge']['mode'],
+                            sys_root=config['devices']['sys_root'])
+    if plan.hardware:
+        # The drive's own sanitize replaces the passes; the read-back uses the engine's settings
+        settings = config['engine']
+        verify = engine_options.get('verify') or settings['verify']
+        if method.requires_verify and verify == 'none':
+            verify = 'sample'
+        fraction = engine_options.get('verify_fraction')
+        purged, verification = _hardware_purge(
+            plan, on_progress, verify, settings['verify_fraction'] if fraction is None else fraction
+        )
+        record = {'passes': [], 'verification': verification, 'purge': purged}
+    else:
+        result = engine.wipe_device(
+            device, method.pass_count, on_progress, method=method,
+            journal=journal, resume=resume, **engine_options
+        )
+        record = {**engine.wipe_record(result), 'purge': plan.to_dict()}
+    extra = {'serial': serial, **record} if serial else record
+    cert = gen.generate_full_cert(device, method.name, extra=extra, store=store)
+    return {
+        'device': device, 'cert_id': cert.get('cert_id'),
+        'cert_files': [cert[key] for key in ('pdf', 'qr', 'json') if key in cert], **record
+    }
@@ -0,0 +1,99 @@
+"""
+Wipe progress reporting.
+The engine calls back with raw byte counts; ProgressTracker turns them into
+throughput/ETA and ProgressBroker fans events out to any number of listeners
+(e.g. the SSE endpoint) without blocking the wipe thread.
+"""
+
+import queue
+import threading
+import time
+
+
+class WipeCancelled(Exception):
+    """Raised from a progress callback to stop the engine between chunks."""
+
+
+class ProgressTracker:
+    """Enriches engine progress events for one device with MB/s and ETA."""
+
+    def __init__(self, device):
+        self.device = device
+        self.start = time.monotonic()
+
+    def update(self, event):
+        elapsed = max(time.monotonic() - self.start, 1e-6)
+        written = event['bytes_written']
+        total = event['bytes_total']
+        rate = written / elapsed
+        event = dict(event)
+        event['device'] = self.device
+        event['percent'] = round(100.0 * written / total, 2) if total else 100.0
+        event['throughput_mbps'] = round(rate / 1e6, 2)
+        event['eta_seconds'] = round((total - written) / rate, 1) if rate else None
+        return event
+
+
+class ProgressBroker:
+    """Per-job publish/subscribe of progress events.
+
+    Each subscriber gets a bounded queue; if a client falls behind, the
+    oldest events are dropped so publishers never block. Once a job is
+    finished, its latest events are forgotten when the last subscriber goes
+    (the job store keeps its history).
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._subscribers = {}
+        self._latest = {}
+        self._finished = set()  # Jobs whose latest events go with their last subscriber
+        self._lock = threading.Lock()
+
+    def publish(self, job_id, event):
+        with self._lock:
+            self._latest.setdefault(job_id, {})[event.get('device')] = event
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for q in subscribers:
+            while True:
+                try:
+                    q.put_nowait(event)
+                    break
+                except queue.Full:
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def subscribe(self, job_id):
+        """Return a queue pre-filled with the latest event of each device."""
+        with self._lock:
+            latest = list(self._latest.get(job_id, {}).values())
+            q = queue.Queue(maxsize=max(self.maxsize, 2 * len(latest)))
+            for event in latest:
+                q.put_nowait(event)
+            self._subscribers.setdefault(job_id, []).append(q)
+        return q
+
+    def unsubscribe(self, job_id, q):
+        with self._lock:
+            subscribers = self._subscribers.get(job_id, [])
+            if q in subscribers:
+                subscribers.remove(q)
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+                if job_id in self._finished:
+                    self._finished.discard(job_id)
+                    self._latest.pop(job_id, None)
+
+    def finish(self, job_id):
+        """The job has ended: drop its latest events now, or after its last subscriber."""
+        with self._lock:
+            if job_id in self._subscribers:
+                self._finished.add(job_id)
+            else:
+                self._latest.pop(job_id, None)
+
+    def latest(self, job_id):
+        with self._lock:
+            return list(self._latest.get(job_id, {}).values())
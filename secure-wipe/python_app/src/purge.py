@@ -0,0 +1,330 @@
+"""
+Hardware purge planning and execution.
+Drives that can sanitize themselves (NVMe Sanitize or Format with crypto
+erase, ATA SANITIZE, ATA Secure Erase) finish a NIST 800-88 Clear or Purge
+in seconds to minutes instead of hours of overwriting. plan_purge() probes
+the drive with hdparm/nvme-cli and picks the fastest action that meets the
+method's level, or the software overwrite when none applies; the chosen
+action and why are recorded in the certificate. Admin tools run through a
+CommandRunner so tests can replace them with canned output.
+
+hdparm only takes the ATA security password on its command line, so while
+a security erase runs the password is visible to local processes (ps,
+/proc/<pid>/cmdline). It is a random value made for that one erase, and
+the certificate notes this.
+"""
+
+import json
+import math
+import os
+import random
+import re
+import secrets
+import stat
+import subprocess
+import time
+from .metrics import PURGE_DURATION
+
+SANITIZE_CRYPTO = 'sanitize-crypto'        # NVMe Sanitize crypto erase / ATA CRYPTO SCRAMBLE EXT
+FORMAT_CRYPTO = 'format-crypto'            # NVMe Format, Secure Erase Setting 2
+SANITIZE_BLOCK = 'sanitize-block'          # NVMe Sanitize block erase / ATA BLOCK ERASE EXT
+FORMAT_USER_DATA = 'format-user-data'      # NVMe Format, Secure Erase Setting 1
+SECURITY_ERASE_ENHANCED = 'ata-security-erase-enhanced'
+SECURITY_ERASE = 'ata-security-erase'      # Purge on rotational drives only
+SANITIZE_OVERWRITE = 'sanitize-overwrite'  # NVMe Sanitize overwrite / ATA OVERWRITE EXT
+OVERWRITE = 'overwrite'                    # The method's software passes
+
+# Fastest first; every hardware action here meets Purge, and so Clear as well
+PREFERENCE = (SANITIZE_CRYPTO, FORMAT_CRYPTO, SANITIZE_BLOCK, FORMAT_USER_DATA,
+              SECURITY_ERASE_ENHANCED, SECURITY_ERASE, SANITIZE_OVERWRITE)
+
+# Actions that leave one repeated byte on every sector (zeros or ones; the drive
+# picks). Crypto erase and the vendor patterns of an enhanced security erase
+# leave nothing a read-back could predict.
+UNIFORM_FILL = (SANITIZE_BLOCK, FORMAT_USER_DATA, SECURITY_ERASE, SANITIZE_OVERWRITE)
+
+SECTOR_SIZE = 512
+SAMPLE_BLOCK = 64 * 1024  # Bytes per sampled read, as in the engine's sample verification
+
+# sanitize-log SSTAT bits 2:0
+_NVME_SANITIZE_DONE = (1, 4)
+_NVME_SANITIZE_RUNNING = 2
+_NVME_SANITIZE_FAILED = 3
+
+
+class PurgeError(RuntimeError):
+    pass
+
+
+class CommandRunner:
+    """Runs drive admin tools. Tests replace it with a fake returning canned output."""
+
+    def run(self, args, timeout=None):
+        """Returns (returncode, stdout, stderr); a missing tool gives returncode 127."""
+        try:
+            proc = subprocess.run(args, capture_output=True, text=True, timeout=timeout)
+        except FileNotFoundError:
+            return 127, '', f'{args[0]}: not found'
+        except subprocess.TimeoutExpired:
+            raise PurgeError(f'{" ".join(args[:2])} timed out after {timeout}s') from None
+        return proc.returncode, proc.stdout, proc.stderr
+
+
+_runner = CommandRunner()
+
+
+def _check(runner, args, timeout=None):
+    code, out, err = runner.run(args, timeout=timeout)
+    if code != 0:
+        raise PurgeError(f'{" ".join(args[:2])} failed ({code}): {(err or out).strip()[-300:]}')
+    return out
+
+
+def _is_block_device(path):
+    try:
+        return stat.S_ISBLK(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+
+def _nvme_controller(path):
+    match = re.match(r'(/dev/nvme\d+)(n\d+)?', path)
+    return match.group(1) if match else None
+
+
+def _nvme_namespaces(controller, sys_root):
+    name = os.path.basename(controller)
+    try:
+        entries = os.listdir(os.path.join(sys_root, 'class', 'nvme', name))
+    except OSError:
+        return 1
+    return sum(1 for e in entries if re.fullmatch(rf'{name}n\d+', e)) or 1
+
+
+def probe_nvme(path, runner=None, sys_root='/sys'):
+    """Supported actions and notes for an NVMe namespace, from `nvme id-ctrl`."""
+    runner = runner or _runner
+    controller = _nvme_controller(path)
+    code, out, err = runner.run(['nvme', 'id-ctrl', controller, '-o', 'json'])
+    if code != 0:
+        return set(), [f'nvme id-ctrl failed: {(err or out).strip()[:200]}']
+    ctrl = json.loads(out)
+    sanicap, fna, oacs = ctrl.get('sanicap', 0), ctrl.get('fna', 0), ctrl.get('oacs', 0)
+    actions, notes = set(), []
+    # Sanitize always covers the whole controller; Format does when FNA bit 0 is set
+    shared = _nvme_namespaces(controller, sys_root) > 1
+    if sanicap & 0x7 and shared:
+        notes.append('sanitize skipped: other namespaces share the controller')
+    elif sanicap:
+        for bit, action in ((0x1, SANITIZE_CRYPTO), (0x2, SANITIZE_BLOCK), (0x4, SANITIZE_OVERWRITE)):
+            if sanicap & bit:
+                actions.add(action)
+    if oacs & 0x2:
+        if fna & 0x1 and shared:
+            notes.append('format skipped: it would erase every namespace on the controller')
+        else:
+            actions.add(FORMAT_USER_DATA)
+            if fna & 0x4:
+                actions.add(FORMAT_CRYPTO)
+    return actions, notes
+
+
+def _ata_section(text, title):
+    match = re.search(rf'^{title}:\s*\n(.*?)(?=^\S|\Z)', text, re.M | re.S)
+    return match.group(1) if match else ''
+
+
+def probe_ata(path, runner=None):
+    """Supported actions and notes for an ATA drive, from `hdparm -I`."""
+    runner = runner or _runner
+    code, out, err = runner.run(['hdparm', '-I', path])
+    if code != 0:
+        return set(), [f'hdparm -I failed: {(err or out).strip()[:200]}']
+    actions, notes = set(), []
+    features = _ata_section(out, 'Commands/features')
+    if re.search(r'^\s*\*\s+SANITIZE feature set', features, re.M):
+        for command, action in (('CRYPTO_SCRAMBLE_EXT', SANITIZE_CRYPTO),
+                                ('BLOCK_ERASE_EXT', SANITIZE_BLOCK),
+                                ('OVERWRITE_EXT', SANITIZE_OVERWRITE)):
+            if re.search(rf'^\s*\*\s+{command} command', features, re.M):
+                actions.add(action)
+    security = _ata_section(out, 'Security')
+    if re.search(r'^\s*supported\s*$', security, re.M):
+        if not re.search(r'not\s+frozen', security):
+            notes.append('security erase skipped: drive is frozen (suspend/resume or hotplug unfreezes it)')
+        elif not re.search(r'not\s+enabled', security) or not re.search(r'not\s+locked', security):
+            notes.append('security erase skipped: a drive password is already set')
+        else:
+            if 'supported: enhanced erase' in security:
+                actions.add(SECURITY_ERASE_ENHANCED)
+            if 'Solid State Device' not in out:
+                actions.add(SECURITY_ERASE)
+    return actions, notes
+
+
+class PurgePlan:
+    def __init__(self, device, action, level, reason, available=(), notes=()):
+        self.device = device
+        self.action = action
+        self.level = level
+        self.reason = reason
+        self.available = sorted(available)
+        self.notes = list(notes)
+
+    @property
+    def hardware(self):
+        return self.action != OVERWRITE
+
+    def to_dict(self):
+        return {
+            'action': self.action,
+            'level': self.level,
+            'reason': self.reason,
+            'available': self.available,
+            'notes': self.notes,
+        }
+
+
+def plan_purge(path, method, mode='auto', runner=None, sys_root='/sys'):
+    """Choose how to erase `path` for a WipeMethod; returns a PurgePlan.
+
+    Only methods with a NIST level ('clear' or 'purge') may be replaced by
+    a hardware action; pattern methods (DoD, Gutmann, ...) always overwrite.
+    mode 'overwrite' turns hardware purge off.
+    """
+    level = method.level
+    if mode == 'overwrite':
+        return PurgePlan(path, OVERWRITE, level, 'hardware purge disabled (purge.mode: overwrite)')
+    if level is None:
+        return PurgePlan(path, OVERWRITE, level, f'{method.name} prescribes overwrite passes')
+    if not _is_block_device(path):
+        return PurgePlan(path, OVERWRITE, level, 'not a block device')
+    if _nvme_controller(path):
+        available, notes = probe_nvme(path, runner, sys_root)
+    else:
+        available, notes = probe_ata(path, runner)
+    for action in PREFERENCE:
+        if action in available:
+            return PurgePlan(path, action, level, 'fastest supported hardware purge', available, notes)
+    return PurgePlan(path, OVERWRITE, level, 'no usable hardware purge', available, notes)
+
+
+def _nvme_sanitize_status(runner, controller):
+    log = json.loads(_check(runner, ['nvme', 'sanitize-log', controller, '-o', 'json']))
+    if 'sstat' not in log:  # nvme-cli 2.x nests the log under the device name
+        log = next(v for v in log.values() if isinstance(v, dict) and 'sstat' in v)
+    return log['sstat'] & 0x7, log.get('sprog', 0) / 65536
+
+
+def _run_nvme(plan, runner, progress, poll_interval, timeout):
+    controller = _nvme_controller(plan.device)
+    if plan.action in (FORMAT_CRYPTO, FORMAT_USER_DATA):
+        ses = '2' if plan.action == FORMAT_CRYPTO else '1'
+        _check(runner, ['nvme', 'format', plan.device, f'--ses={ses}', '--force'], timeout)
+        return 'nvme format --ses=' + ses
+    sanact = {SANITIZE_BLOCK: '2', SANITIZE_OVERWRITE: '3', SANITIZE_CRYPTO: '4'}[plan.action]
+    # A sanitize already running (e.g. before a server restart) is waited for, not reissued
+    if _nvme_sanitize_status(runner, controller)[0] != _NVME_SANITIZE_RUNNING:
+        _check(runner, ['nvme', 'sanitize', controller, f'--sanact={sanact}'])
+    deadline = time.monotonic() + timeout
+    while True:
+        status, fraction = _nvme_sanitize_status(runner, controller)
+        if status in _NVME_SANITIZE_DONE:
+            return 'nvme sanitize --sanact=' + sanact
+        if status == _NVME_SANITIZE_FAILED:
+            raise PurgeError(f'NVMe sanitize failed on {controller}')
+        if time.monotonic() > deadline:
+            raise PurgeError(f'NVMe sanitize on {controller} did not finish in {timeout}s')
+        if progress is not None:
+            progress(fraction)
+        time.sleep(poll_interval)
+
+
+def _run_ata(plan, runner, progress, poll_interval, timeout):
+    device = plan.device
+    if plan.action in (SECURITY_ERASE_ENHANCED, SECURITY_ERASE):
+        # A one-off password; cleared by the erase itself, or explicitly if the erase fails
+        password = secrets.token_hex(8)
+        plan.notes.append('security password: one-off random value, visible on the hdparm '
+                          'command line while the erase ran')
+        erase = '--security-erase-enhanced' if plan.action == SECURITY_ERASE_ENHANCED else '--security-erase'
+        _check(runner, ['hdparm', '--user-master', 'u', '--security-set-pass', password, device])
+        try:
+            _check(runner, ['hdparm', '--user-master', 'u', erase, password, device], timeout)
+        except PurgeError:
+            runner.run(['hdparm', '--user-master', 'u', '--security-disable', password, device])
+            raise
+        return 'hdparm ' + erase
+    option = {SANITIZE_CRYPTO: ['--sanitize-crypto-scramble'],
+              SANITIZE_BLOCK: ['--sanitize-block-erase'],
+              SANITIZE_OVERWRITE: ['--sanitize-overwrite', 'hex:00000000']}[plan.action]
+    status = _check(runner, ['hdparm', '--sanitize-status', device])
+    if 'In Process' not in status:
+        _check(runner, ['hdparm', '--yes-i-know-what-i-am-doing', *option, device])
+    deadline = time.monotonic() + timeout
+    while True:
+        status = _check(runner, ['hdparm', '--sanitize-status', device])
+        if 'In Process' not in status:
+            if 'Completed Without Error' not in status:
+                raise PurgeError(f'ATA sanitize failed on {device}: {status.strip()[-200:]}')
+            return 'hdparm ' + option[0]
+        if time.monotonic() > deadline:
+            raise PurgeError(f'ATA sanitize on {device} did not finish in {timeout}s')
+        if progress is not None:
+            match = re.search(r'\((\d+)%\)', status)
+            progress(int(match.group(1)) / 100 if match else 0.0)
+        time.sleep(poll_interval)
+
+
+def execute(plan, runner=None, progress=None, poll_interval=5.0, timeout=86400):
+    """Run a hardware plan; returns its certificate record (plan plus command and duration).
+
+    progress(fraction) is called while a sanitize runs.
+    """
+    if not plan.hardware:
+        raise ValueError('execute() runs hardware plans; overwrites go through the engine')
+    runner = runner or _runner
+    run = _run_nvme if _nvme_controller(plan.device) else _run_ata
+    start = time.monotonic()
+    with PURGE_DURATION.time(action=plan.action):
+        command = run(plan, runner, progress, poll_interval, timeout)
+    return {**plan.to_dict(), 'command': command,
+            'duration_seconds': round(time.monotonic() - start, 3)}
+
+
+def _sample_regions(size, fraction):
+    # Stratified like the engine: one aligned block at random in each of `samples` strata
+    blocks = -(-size // SAMPLE_BLOCK)
+    samples = min(blocks, math.ceil(blocks * min(max(fraction, 0.0), 1.0)))
+    for i in range(samples):
+        start, end = i * size // samples, (i + 1) * size // samples
+        length = min(end - start, SAMPLE_BLOCK)
+        offset = (start + random.randint(0, end - start - length)) // 4096 * 4096
+        yield offset, length
+
+
+def verify_purge(plan, mode='sample', fraction=0.01):
+    """Read back a hardware-purged device; returns the certificate's verification record.
+
+    mode is 'none', 'sample' (`fraction` of the device) or 'full'. After an
+    action in UNIFORM_FILL every block read must hold a single repeated
+    byte, else PurgeError; other actions are recorded as skipped.
+    """
+    if mode == 'none':
+        return {'mode': 'none', 'sectors_checked': 0}
+    if plan.action not in UNIFORM_FILL:
+        return {'mode': 'skipped', 'sectors_checked': 0,
+                'reason': f'hardware purge: {plan.action} leaves no predictable content'}
+    checked, fills = 0, set()
+    with open(plan.device, 'rb', buffering=0) as f:
+        fd = f.fileno()
+        size = os.lseek(fd, 0, os.SEEK_END)
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)  # Pages cached before the purge
+        for offset, length in _sample_regions(size, 1.0 if mode == 'full' else fraction):
+            block = os.pread(fd, length, offset)
+            if len(block) != length or block.count(block[:1]) != length:
+                raise PurgeError(f'Verification failed in block at offset {offset}')
+            fills.add(f'{block[0]:02x}')
+            checked += length
+    return {'mode': mode, 'sectors_checked': -(-checked // SECTOR_SIZE), 'fill': sorted(fills)}
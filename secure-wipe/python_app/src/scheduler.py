@@ -0,0 +1,191 @@
+"""
+Topology-aware wipe scheduling.
+Disks are grouped by the component they share on the way to the CPU
+(SATA/SAS HBA, USB hub, upstream PCIe switch port for NVMe), read from the
+sysfs device path. Each group has a cap on concurrent writers that starts
+at a per-transport default and adapts from measured throughput: it grows
+while adding a writer still raises the group's aggregate MB/s and shrinks
+back once the extra writer stops paying for itself. Throughput is the
+recent rate of each writer, smoothed over about one adapt interval, so a
+change in writers shows up within an interval. After a back-off the group
+probes above it again once recover_periods adjustments pass without one.
+"""
+
+import math
+import os
+import re
+import threading
+import time
+
+BDF = re.compile(r'^[0-9a-f]{4}:[0-9a-f]{2}:[0-9a-f]{2}\.[0-7]$')
+USB_PORT = re.compile(r'^\d+-[\d.]+$')
+
+DEFAULT_LIMITS = {'nvme': 4, 'ata': 8, 'sas': 8, 'usb': 2, 'other': 4}
+
+
+def controller_group(device, sys_root='/sys'):
+    """Return (group key, transport) for a device such as '/dev/sdb'."""
+    name = os.path.basename(device)
+    link = os.path.join(sys_root, 'block', name)
+    if not os.path.exists(link):
+        return f'unknown:{name}', 'other'
+    parts = os.path.realpath(link).split(os.sep)
+    bdfs = [i for i, part in enumerate(parts) if BDF.match(part)]
+    ports = [i for i, part in enumerate(parts) if USB_PORT.match(part)]
+    if ports:
+        # Everything on one hub shares its upstream link; a disk on a root port has it alone
+        end = ports[-2] if len(ports) > 1 else ports[-1]
+        return os.sep.join(parts[:end + 1]), 'usb'
+    if name.startswith('nvme') and bdfs:
+        # bdfs[0] is the root port; bdfs[1] is the drive itself or a switch upstream port
+        end = bdfs[1] if len(bdfs) > 1 else bdfs[0]
+        return os.sep.join(parts[:end + 1]), 'nvme'
+    if bdfs:
+        if any(p.startswith('ata') for p in parts):
+            transport = 'ata'
+        elif any(p.startswith(('host', 'port-', 'end_device')) for p in parts):
+            transport = 'sas'
+        else:
+            transport = 'other'
+        return os.sep.join(parts[:bdfs[-1] + 1]), transport
+    return f'unknown:{name}', 'other'
+
+
+class _Group:
+    def __init__(self, key, transport, cap, ceiling):
+        self.key = key
+        self.transport = transport
+        self.cap = cap
+        self.ceiling = ceiling
+        self.active = set()
+        self.samples = {}  # device -> (monotonic time, bytes written) of the last sample
+        self.rates = {}  # device -> smoothed recent MB/s
+        self.history = {}  # writers -> smoothed aggregate MB/s
+        self.last_adapt = 0.0
+        self.calm = 0  # Adjustments since the last back-off
+
+    def to_dict(self):
+        return {
+            'group': self.key,
+            'transport': self.transport,
+            'cap': self.cap,
+            'active': sorted(self.active),
+            'throughput_mbps': round(sum(self.rates.get(d, 0) for d in self.active), 2),
+        }
+
+
+class DeviceScheduler:
+    """Grants per-controller write slots; callers release them when a wipe ends."""
+
+    def __init__(self, limits=None, max_per_group=16, adapt=True, adapt_interval=5.0,
+                 min_gain=0.1, recover_periods=12, sys_root='/sys'):
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.max_per_group = max_per_group
+        self.adapt = adapt
+        self.adapt_interval = adapt_interval
+        self.min_gain = min_gain
+        self.recover_periods = recover_periods
+        self.sys_root = sys_root
+        self._groups = {}
+        self._device_group = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def _group(self, device):
+        name = os.path.basename(device)
+        group = self._device_group.get(name)
+        if group is None:
+            key, transport = controller_group(name, self.sys_root)
+            group = self._groups.get(key)
+            if group is None:
+                cap = min(self.limits.get(transport, self.limits['other']), self.max_per_group)
+                group = self._groups[key] = _Group(key, transport, cap, self.max_per_group)
+            self._device_group[name] = group
+        return name, group
+
+    def try_acquire(self, device):
+        """Take a write slot for `device` if its group has room."""
+        with self._lock:
+            name, group = self._group(device)
+            if len(group.active) >= group.cap:
+                return False
+            group.active.add(name)
+            return True
+
+    def release(self, device):
+        with self._lock:
+            name, group = self._group(device)
+            group.active.discard(name)
+            group.rates.pop(name, None)
+            group.samples.pop(name, None)
+        self._notify()
+
+    def observe(self, device, bytes_written):
+        """Feed a running wipe's total bytes written so far; may move the group's cap."""
+        now = time.monotonic()
+        with self._lock:
+            name, group = self._group(device)
+            if name not in group.active:
+                return
+            last = group.samples.get(name)
+            if last is not None and now <= last[0]:
+                return
+            group.samples[name] = (now, bytes_written)
+            if last is None:
+                return  # A rate needs two samples
+            elapsed = now - last[0]
+            rate = max(bytes_written - last[1], 0) / elapsed / 1e6
+            previous = group.rates.get(name)
+            if previous is None or self.adapt_interval <= 0:
+                group.rates[name] = rate
+            else:
+                # Exponentially weighted, with a time constant of one adapt interval
+                weight = 1 - math.exp(-elapsed / self.adapt_interval)
+                group.rates[name] = previous + weight * (rate - previous)
+            changed = self._adapt(group, now)
+        if changed:
+            self._notify()
+
+    def _adapt(self, group, now):
+        writers = len(group.active)
+        if not self.adapt or now - group.last_adapt < self.adapt_interval:
+            return False
+        if len(group.rates) < writers:
+            return False  # Wait until every writer has reported
+        group.last_adapt = now
+        aggregate = sum(group.rates.values())
+        previous = group.history.get(writers)
+        group.history[writers] = aggregate if previous is None else (previous + aggregate) / 2
+        fewer = group.history.get(writers - 1)
+        if fewer is not None and group.history[writers] < fewer * (1 + self.min_gain):
+            # The last writer added little: the shared link is saturated
+            cap = max(1, writers - 1)
+            group.ceiling = cap
+            group.calm = 0
+        else:
+            group.calm += 1
+            if group.calm >= self.recover_periods and group.ceiling < self.max_per_group:
+                # Load on the shared link changes (other wipes end): try one more writer again
+                group.ceiling += 1
+                group.calm = 0
+                for count in [n for n in group.history if n > group.cap]:
+                    del group.history[count]  # Measured under the old conditions
+            if writers >= group.cap and group.cap < group.ceiling:
+                cap = group.cap + 1
+            else:
+                return False
+        changed = cap != group.cap
+        group.cap = cap
+        return changed
+
+    def add_listener(self, callback):
+        """callback() runs whenever slots free up or a cap changes."""
+        self._listeners.append(callback)
+
+    def _notify(self):
+        for listener in list(self._listeners):
+            listener()
+
+    def groups(self):
+        with self._lock:
+            return [g.to_dict() for g in self._groups.values()]
@@ -0,0 +1,60 @@
+"""
+Startup profiling for --profile-startup.
+Modules are imported in a fresh interpreter under `python -X importtime`,
+so the numbers are cold-start costs and not skewed by whatever this
+process has already loaded.
+"""
+
+import os
+import subprocess
+import sys
+
+_MARK = '--secure-wipe-import-start--'
+
+
+def profile_imports(modules, cwd=None):
+    """Import `modules` in a child interpreter.
+
+    Returns (total_seconds, entries) where entries are dicts with module,
+    self_ms, cumulative_ms and depth, in import order.
+    """
+    if isinstance(modules, str):
+        modules = [modules]
+    code = (
+        'import sys, time\n'
+        f'sys.stderr.write({_MARK!r} + "\\n")\n'
+        't = time.perf_counter()\n'
+        f'import {", ".join(modules)}\n'
+        'print(time.perf_counter() - t)\n'
+    )
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, cwd=cwd or os.getcwd()
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f'Importing {", ".join(modules)} failed:\n{proc.stderr[-2000:]}')
+    lines = proc.stderr.splitlines()
+    entries = []
+    for line in lines[lines.index(_MARK) + 1:]:
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        entries.append({
+            'module': name.strip(),
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000,
+            'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+        })
+    return float(proc.stdout.strip().splitlines()[-1]), entries
+
+
+def report(modules, top=25, cwd=None, file=None):
+    """Print the slowest imports behind `modules`; returns the total seconds."""
+    file = file or sys.stdout
+    total, entries = profile_imports(modules, cwd)
+    print(f'Startup imports: {total * 1000:.1f} ms', file=file)
+    print(f'{"cumulative ms":>14} {"self ms":>9}  module', file=file)
+    for entry in sorted(entries, key=lambda e: e['cumulative_ms'], reverse=True)[:top]:
+        print(f'{entry["cumulative_ms"]:>14.1f} {entry["self_ms"]:>9.1f}  '
+              f'{"  " * entry["depth"]}{entry["module"]}', file=file)
+    return total
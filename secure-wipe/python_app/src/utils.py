@@ -1,15 +1,94 @@
+import copy
 import yaml
+import importlib
+import logging
 import os
+import threading
 from pathlib import Path
+from .logging_config import get_logger
+
+class FileCache:
+    """Process-wide cache of parsed files, keyed on path and mtime.
+
+    A file is re-read and re-parsed only when its mtime or size changes.
+    Cached objects are shared between callers.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, loader):
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        key = (path, loader)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            with open(path, 'rb') as f:
+                value = loader(f.read())
+            self._entries[key] = (stamp, value)
+            return value
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+file_cache = FileCache()
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access.
+
+    Keeps heavy or native dependencies (the Rust engine, psutil) off the
+    startup path of modules that only need them for some operations.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+def _parse_private_key(pem):
+    from cryptography.hazmat.primitives import serialization
+    return serialization.load_pem_private_key(pem, password=None)
+
+def _parse_public_key(pem):
+    from cryptography.hazmat.primitives import serialization
+    return serialization.load_pem_public_key(pem)
 
 def load_config(config_file='app_config.yaml'):
-    """Load YAML config from python_app/config/"""
+    """Load YAML config from python_app/config/ (cached until the file changes).
+
+    Each call returns its own copy, so a caller changing its config does
+    not change anyone else's.
+    """
     config_path = Path(__file__).parent / '..' / 'config' / config_file
     if not config_path.exists():
         raise FileNotFoundError(f"Config file not found: {config_path}")
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
-    return config
+    return copy.deepcopy(file_cache.get(config_path, yaml.safe_load))
+
+def load_private_key(path):
+    """Load a PEM private key (cached until the file changes)."""
+    return file_cache.get(path, _parse_private_key)
+
+def load_public_key(path):
+    """Load a PEM public key (cached until the file changes)."""
+    return file_cache.get(path, _parse_public_key)
 
 def load_auth_config():
     """Load Auth0 config (separate for security)."""
@@ -25,10 +104,15 @@ def parse_device_path(path):
             path = f'/dev/{path}'
     return path
 
-def log_message(level, message):
-    """Simple logging."""
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    print(f"[{timestamp}] [{level}] {message}")
+def log_message(level, message, *args, device=None, source='app', **data):
+    """Log through the queued logging pipeline (see logging_config).
+
+    `message` is %-formatted with `args` only if the record is emitted.
+    """
+    levelno = logging.getLevelName(level.upper())
+    if not isinstance(levelno, int):
+        levelno = logging.INFO
+    get_logger(source).log(levelno, message, *args, extra={'device': device, 'data': data or None})
 
 if __name__ == "__main__":
     config = load_config()
@@ -0,0 +1,118 @@
+"""
+Bulk certificate verification.
+The public key is parsed once per process and cached; large batches are
+verified in chunks across a process pool with a bounded number of chunks
+in flight, so results stream back in order with flat memory use.
+
+Pool workers start from a forkserver (spawn where there is none), not by
+forking a multithreaded server worker with its logging queue and SQLite
+locks possibly held. If the pool breaks mid-stream, every item left gets
+an error result, so a response already under way still has one line per
+item.
+"""
+
+import threading
+from collections import deque
+from itertools import chain, islice
+from .cert_gen import verify_cert_signature
+from .metrics import CERT_VERIFICATIONS
+from .utils import load_public_key
+
+
+def verify_item(public_key, item):
+    """Verify one {'json_data', 'signature_hex', 'merkle'} item; never raises."""
+    if 'error' in item:
+        CERT_VERIFICATIONS.inc(result='error')
+        return {'valid': False, 'error': item['error']}
+    try:
+        signature = bytes.fromhex(item['signature_hex'])
+        valid = verify_cert_signature(public_key, item['json_data'], signature, item.get('merkle'))
+        return {'valid': valid}
+    except Exception as e:
+        CERT_VERIFICATIONS.inc(result='error')
+        return {'valid': False, 'error': str(e)}
+
+
+def _outcome(result):
+    return 'error' if 'error' in result else 'valid' if result['valid'] else 'invalid'
+
+
+_worker_key_path = None
+
+def _init_worker(public_path):
+    global _worker_key_path
+    _worker_key_path = public_path
+
+def _verify_chunk(items):
+    public_key = load_public_key(_worker_key_path)
+    return [verify_item(public_key, item) for item in items]
+
+
+class BulkVerifier:
+    def __init__(self, public_path, max_workers=1, chunk_size=64):
+        self.public_path = public_path
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # Only batch verification starts processes
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context(method),
+                    initializer=_init_worker, initargs=(self.public_path,)
+                )
+            return self._pool
+
+    def _discard_pool(self, pool):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None  # The next batch starts a fresh pool
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def verify_iter(self, items):
+        """Yield one result dict per item, in input order."""
+        items = iter(items)
+        if self.max_workers <= 1:
+            public_key = load_public_key(self.public_path)
+            for item in items:
+                yield verify_item(public_key, item)
+            return
+        from concurrent.futures.process import BrokenProcessPool
+        pool = self._get_pool()
+        pending = deque()  # (future, number of items), oldest first
+        unsent = 0  # Items of a chunk the pool refused
+        try:
+            while True:
+                # Keep a couple of chunks per worker in flight, no more
+                while len(pending) < self.max_workers * 2:
+                    chunk = list(islice(items, self.chunk_size))
+                    if not chunk:
+                        break
+                    unsent = len(chunk)
+                    pending.append((pool.submit(_verify_chunk, chunk), len(chunk)))
+                    unsent = 0
+                if not pending:
+                    return
+                results = pending[0][0].result()
+                pending.popleft()
+                # Workers count into their own registries; tally here so /metrics sees them
+                for result in results:
+                    CERT_VERIFICATIONS.inc(result=_outcome(result))
+                yield from results
+        except BrokenProcessPool as e:
+            self._discard_pool(pool)
+            error = {'valid': False, 'error': f'Verification worker failed: {e}'}
+            for _ in chain(range(unsent + sum(n for _, n in pending)), items):
+                CERT_VERIFICATIONS.inc(result='error')
+                yield dict(error)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,30 @@
+import pytest
+from src import logstore
+from src.utils import load_config
+
+
+def _isolated_config(root):
+    """The app config with every SQLite store, lock and artifact directory under `root`."""
+    config = load_config()
+    config['checkpoint']['path'] = str(root / 'wipe_journal.db')
+    config['jobs']['store'] = str(root / 'jobs.db')
+    config['serve']['jobs_lock'] = str(root / 'jobs.lock')
+    config['certs'].update(root=str(root / 'certs'), index=str(root / 'certs' / 'index.db'))
+    config['audit_log']['path'] = str(root / 'audit_log.db')
+    return config
+
+
+@pytest.fixture
+def store_config(tmp_path):
+    return _isolated_config(tmp_path)
+
+
+@pytest.fixture(autouse=True, scope='session')
+def audit_log(tmp_path_factory):
+    # Logging is process-wide and threads log after their test ends, so one store per session
+    settings = _isolated_config(tmp_path_factory.mktemp('audit'))['audit_log']
+    store = logstore.LogStore(**settings)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(logstore, '_store', store)
+        yield store
+    store.close()
@@ -1,36 +1,139 @@
 import pytest
 from flask.testing import FlaskClient
+from api import routes
 from api.app import app
+from api.routes import gen, get_cert_store, get_jobs, get_verifier
+from src.logging_config import flush_logging
+from src.utils import log_message
+import json
+import threading
+import time
 from unittest.mock import patch, MagicMock
 import secure_wipe_engine as engine
 
 @pytest.fixture
-def client():
+def client(store_config, monkeypatch):
+    # Fresh jobs, journal and cert stores under tmp_path for every test
+    monkeypatch.setattr(routes, 'config', store_config)
+    monkeypatch.setattr(routes, '_shared', {})
     app.config['TESTING'] = True
     with app.test_client() as client:
         yield client
+    routes.drain(timeout=5)
 
 @patch('api.routes.gen.generate_full_cert')
-@patch('api.routes.engine.wipe_device')
-@patch('api.routes.engine.handle_hpa_dco')
+@patch('src.engine.wipe_device')
+@patch('src.engine.handle_hpa_dco')
 def test_wipe_endpoint(mock_hpa, mock_wipe, mock_cert, client):
+    mock_cert.return_value = {'pdf': 'a.pdf', 'qr': 'a.png', 'json': 'a.json', 'cert_id': 'ab', 'valid': True}
+    mock_wipe.return_value = {'patterns': ['fixed:00'], 'verify_mode': 'none', 'sectors_checked': 0}
     response = client.post('/api/v1/wipe', json={
         'devices': ['/dev/sda'],
         'passes': 1,
         'method': 'DoD 1-Pass'
     })
-    assert response.status_code == 200
+    assert response.status_code == 202
     data = response.get_json()
-    assert data['status'] == 'success'
-    assert len(data['wiped_devices']) == 1
+    assert data['status'] == 'queued'
+    assert get_jobs().wait(data['job_id'], timeout=5)
     mock_wipe.assert_called_once()
-    mock_hpa.assert_called_once()
+    mock_hpa.assert_not_called()  # The purge planner replaces the HPA/DCO erase
     mock_cert.assert_called_once()
 
+    response = client.get(f"/api/v1/jobs/{data['job_id']}")
+    assert response.status_code == 200
+    job = response.get_json()
+    assert job['state'] == 'completed'
+    assert job['devices'][0]['device'] == '/dev/sda'
+    assert job['devices'][0]['result']['cert_id'] == 'ab'
+
+@patch('api.routes.gen.generate_full_cert')
+@patch('src.engine.wipe_device')
+@patch('src.engine.handle_hpa_dco')
+def test_wipe_ndjson_queues_each_line(mock_hpa, mock_wipe, mock_cert, client):
+    mock_cert.return_value = {'cert_id': 'ab'}
+    mock_wipe.return_value = {'patterns': ['fixed:00'], 'verify_mode': 'none', 'sectors_checked': 0}
+    body = '\n'.join([
+        json.dumps({'devices': ['/dev/sda'], 'method': 'DoD 3-Pass'}),
+        '',
+        json.dumps({'devices': ['/dev/sdb'], 'verify': 'quick'}),
+        '{"devices": [',
+        json.dumps({'devices': ['/dev/sdc'], 'method': 'DoD 3-Pass'}),
+    ])
+    response = client.post('/api/v1/wipe', data=body, content_type='application/x-ndjson')
+    assert response.mimetype == 'application/x-ndjson'
+    results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [r['index'] for r in results] == [0, 1, 2, 3]
+    assert [r.get('status') for r in results] == ['queued', None, None, 'queued']
+    assert 'error' in results[1] and 'error' in results[2]
+    for result in (results[0], results[3]):
+        assert get_jobs().wait(result['job_id'], timeout=5)
+    assert mock_wipe.call_count == 2
+
+def test_wipe_rejects_unknown_verify_mode(client):
+    response = client.post('/api/v1/wipe', json={'devices': ['/dev/sda'], 'verify': 'quick'})
+    assert response.status_code == 400
+
+@patch('api.routes.gen.generate_full_cert')
+@patch('src.engine.handle_hpa_dco')
+@patch('src.engine.wipe_device')
+def test_wipe_events_stream(mock_wipe, mock_hpa, mock_cert, client):
+    mock_cert.return_value = {'pdf': 'a.pdf', 'qr': 'a.png', 'json': 'a.json', 'cert_id': 'ab', 'valid': True}
+    release = threading.Event()
+    def fake_wipe(path, passes, progress, **kwargs):
+        progress({'pass': 1, 'passes': 1, 'bytes_written': 512, 'bytes_total': 1024})
+        release.wait(5)
+        return {'patterns': ['fixed:00'], 'verify_mode': 'sample', 'sectors_checked': 2}
+    mock_wipe.side_effect = fake_wipe
+    response = client.post('/api/v1/wipe', json={'devices': ['/dev/sda'], 'passes': 1})
+    job_id = response.get_json()['job_id']
+    for _ in range(500):
+        if routes.progress.latest(job_id):
+            break
+        time.sleep(0.01)
+    response = client.get(f'/api/v1/wipe/{job_id}/events')
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    first = next(chunks).decode()  # Replayed to a client joining mid-wipe
+    release.set()
+    body = first + b''.join(chunks).decode()
+    response.close()
+    assert first.startswith('event: progress')
+    assert '"percent": 50.0' in body
+    assert 'event: done' in body
+    # The finished job's replay state goes with its last subscriber
+    assert routes.progress.latest(job_id) == []
+
+def test_wipe_events_from_another_worker(client, store_config, monkeypatch):
+    # This worker only records the job; a second manager on the same store runs it
+    from src.jobs import JobManager, JobStore
+    get_jobs().runner = False
+    runner = JobManager(max_workers=1, store=JobStore(store_config['jobs']['store']))
+    monkeypatch.setattr(routes, 'STORE_POLL_INTERVAL', 0.05)
+    release = threading.Event()
+    def make_func(params, resume):
+        def wipe(job, device):
+            runner.record_progress(job, device, {'device': device, 'bytes_written': 1024,
+                                                 'bytes_total': 1024, 'percent': 100.0})
+            release.wait(5)
+            return {'cert_id': 'ab'}
+        return wipe
+    job_id = client.post('/api/v1/wipe', json={'devices': ['/dev/sda']}).get_json()['job_id']
+    assert runner.adopt(make_func) == 1
+    threading.Timer(0.3, release.set).start()
+    body = client.get(f'/api/v1/wipe/{job_id}/events').get_data(as_text=True)
+    assert '"percent": 100.0' in body
+    assert body.index('event: progress') < body.index('event: done')
+    assert '"state": "completed"' in body
+    runner.shutdown()
+
+def test_job_not_found(client):
+    response = client.get('/api/v1/jobs/unknown')
+    assert response.status_code == 404
+
 def test_verify_cert_valid(client):
     # Mock public key and verify
-    with patch('api.routes.serialization.load_pem_public_key') as mock_load, \
-         patch('api.routes.ec.ECDSA') as mock_ecdsa:
+    with patch('api.routes.load_public_key') as mock_load:
         mock_key = MagicMock()
         mock_load.return_value = mock_key
         mock_verify = MagicMock()
@@ -44,13 +147,119 @@ def test_verify_cert_valid(client):
         data = response.get_json()
         assert data['valid'] == True
 
+def test_verify_cert_malformed_input(client):
+    json_str, sig = gen.sign_data(gen.generate_data('/dev/sda', 'DoD 3-Pass'))
+    bad = [
+        {'json_data': json_str, 'signature_hex': 'zz'},
+        {'json_data': json_str, 'signature_hex': sig.hex(),
+         'merkle': {'root': 'not hex', 'proof': []}},
+        {'json_data': json_str, 'signature_hex': sig.hex(),
+         'merkle': {'root': '00', 'proof': [{'side': 'left', 'hash': 'xyz'}]}},
+        {'signature_hex': sig.hex()},
+    ]
+    for body in bad:
+        response = client.post('/api/v1/verify_cert', json=body)
+        assert response.status_code == 400, body
+        assert 'error' in response.get_json()
+
 def test_logs_endpoint(client):
-    response = client.get('/api/v1/logs')
+    device = '/dev/logtest'
+    log_message('INFO', 'Wipe completed', device=device)
+    log_message('ERROR', 'Wipe failed', device=device)
+    log_message('INFO', 'Other device', device='/dev/other')
+    flush_logging()
+    response = client.get(f'/api/v1/logs?device={device}&limit=1')
     assert response.status_code == 200
     data = response.get_json()
-    assert 'logs' in data
-    assert len(data['logs']) > 0
+    assert [e['message'] for e in data['logs']] == ['Wipe failed']
+    response = client.get(f"/api/v1/logs?device={device}&cursor={data['next_cursor']}")
+    assert [e['message'] for e in response.get_json()['logs']] == ['Wipe completed']
+
+    response = client.get(f'/api/v1/logs?device={device}&level=info&format=ndjson')
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [e['message'] for e in lines] == ['Wipe completed']
+
+    assert client.get('/api/v1/logs?since=yesterday').status_code == 400
+    for limit in ('0', '-1', '1001', 'abc'):
+        assert client.get(f'/api/v1/logs?limit={limit}').status_code == 400
 
 def test_404(client):
     response = client.get('/nonexistent')
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_verify_cert_batch(client):
+    json_str, sig = gen.sign_data(gen.generate_data('/dev/sda', 'DoD 3-Pass'))
+    good = {'json_data': json_str, 'signature_hex': sig.hex()}
+    tampered = {'json_data': json_str + ' ', 'signature_hex': sig.hex()}
+    items = [json.dumps(item) for item in (good, tampered, {'json_data': 'x'})] + ['{"json_data"']
+    with patch.object(get_verifier(), 'max_workers', 1):
+        response = client.post('/api/v1/verify_cert/batch', data='\n'.join(items),
+                               content_type='application/x-ndjson')
+        assert response.status_code == 200
+        results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [r['valid'] for r in results] == [True, False, False, False]
+    assert 'error' in results[2] and 'error' in results[3]
+
+def test_list_devices(client, tmp_path):
+    from src.devices import DeviceInventory
+    disk = tmp_path / 'block' / 'sdz'
+    (disk / 'queue').mkdir(parents=True)
+    (disk / 'size').write_text('2048\n')
+    (disk / 'queue' / 'rotational').write_text('1\n')
+    with patch('api.routes.get_inventory', return_value=DeviceInventory(sys_root=str(tmp_path))):
+        response = client.get('/api/v1/devices')
+    assert response.status_code == 200
+    devices = response.get_json()['devices']
+    assert devices[0]['path'] == '/dev/sdz'
+    assert devices[0]['size_bytes'] == 2048 * 512
+
+
+def test_certs_lookup_and_download(client):
+    device = '/dev/certtest'
+    cert = gen.generate_full_cert(device, 'DoD 3-Pass', store=get_cert_store())
+    response = client.get(f'/api/v1/certs?device={device}')
+    assert response.status_code == 200
+    certs = response.get_json()['certs']
+    assert [c['cert_id'] for c in certs] == [cert['cert_id']]
+
+    response = client.get(f"/api/v1/certs/{cert['cert_id']}")
+    assert json.loads(response.get_json()['certificate']['data'])['device_id'] == device
+    response = client.get(f"/api/v1/certs/{cert['cert_id']}/pdf")
+    assert response.mimetype == 'application/pdf'
+    assert response.data.startswith(b'%PDF')
+    response.close()
+
+    assert client.get(f"/api/v1/certs/{cert['cert_id']}/exe").status_code == 404
+    assert client.get('/api/v1/certs/unknown').status_code == 404
+    assert client.get('/api/v1/certs?since=yesterday').status_code == 400
+    for limit in ('0', '-1', '1001', 'abc'):
+        assert client.get(f'/api/v1/certs?limit={limit}').status_code == 400
+
+
+def test_verify_cert_compact(client):
+    from src.cert_gen import qr_payload
+    cert = gen.generate_full_cert('/dev/qrtest', 'DoD 3-Pass', store=get_cert_store())
+    document = get_cert_store().document(cert['cert_id'])
+    payload = qr_payload(document['data'], bytes.fromhex(document['signature']))
+    response = client.post('/api/v1/verify_cert/compact', json={'payload': payload})
+    assert response.status_code == 200
+    assert response.get_json()['cert_id'] == cert['cert_id']
+    assert client.post('/api/v1/verify_cert/compact', json={'payload': 'SW:%%'}).status_code == 400
+
+
+def test_metrics_endpoint(client):
+    client.get('/api/v1/jobs/unknown')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    assert 'secure_wipe_http_requests_total{endpoint="routes.get_job",method="GET",status="404"}' in body
+    assert '# TYPE secure_wipe_bytes_written_total counter' in body
+
+
+def test_timing_header(client):
+    from api.app import config
+    assert 'Server-Timing' not in client.get('/').headers
+    with patch.dict(config['metrics'], {'timing_header': True}):
+        assert client.get('/').headers['Server-Timing'].startswith('app;dur=')
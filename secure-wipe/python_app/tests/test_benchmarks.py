@@ -0,0 +1,29 @@
+import json
+from benchmarks import harness, run
+
+def _results(**values):
+    return {name: harness.result(value, 'x', better)
+            for name, (value, better) in values.items()}
+
+def test_compare_flags_regressions_by_direction():
+    baseline = _results(mbps=(100.0, harness.HIGHER), latency=(10.0, harness.LOWER),
+                        gone=(1.0, harness.HIGHER))
+    current = _results(mbps=(80.0, harness.HIGHER), latency=(10.5, harness.LOWER),
+                       new=(1.0, harness.HIGHER))
+    rows = {row[0]: row for row in harness.compare(current, baseline, tolerance=0.1)}
+    assert set(rows) == {'mbps', 'latency'}
+    assert rows['mbps'][4] and not rows['latency'][4]
+
+def test_compare_mode_exit_code(tmp_path):
+    base, current = tmp_path / 'base.json', tmp_path / 'current.json'
+    base.write_text(json.dumps(harness.report(_results(ops=(100.0, harness.HIGHER)))))
+    current.write_text(json.dumps(harness.report(_results(ops=(50.0, harness.HIGHER)))))
+    assert run.main(['--compare', str(current), '--baseline', str(base)]) == 1
+    assert run.main(['--compare', str(current), '--baseline', str(base), '--tolerance', '0.6']) == 0
+
+def test_quick_cert_suite_writes_results(tmp_path):
+    output = tmp_path / 'results.json'
+    assert run.main(['--suite', 'certs', '--quick', '--output', str(output)]) == 0
+    results = json.loads(output.read_text())['results']
+    assert results['cert.sign.ops_per_sec']['better'] == 'higher'
+    assert results['cert.render_qr.p95_ms']['unit'] == 'ms'
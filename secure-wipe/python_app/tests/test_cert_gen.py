@@ -1,6 +1,8 @@
 import pytest
 from src.cert_gen import CertificateGenerator
 from src.gen_keys import private_key  # Import for test keys (or generate temp)
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.backends import default_backend
 import tempfile
 import os
 import json
@@ -39,6 +41,11 @@ def test_generate_data(temp_gen):
     assert 'timestamp' in data
     assert data['status'] == 'Completed'
 
+def test_generate_data_records_verification(temp_gen):
+    extra = {'verification': {'mode': 'sample', 'sectors_checked': 2048}}
+    data = temp_gen.generate_data("test_device", "DoD 3-Pass", extra=extra)
+    assert data['verification'] == {'mode': 'sample', 'sectors_checked': 2048}
+
 def test_sign_and_verify(temp_gen):
     data = temp_gen.generate_data("test_device", "DoD 3-Pass")
     json_str, sig = temp_gen.sign_data(data)
@@ -60,4 +67,82 @@ def test_generate_full_cert(temp_gen):
         with open(cert_files['json'], 'r') as f:
             cert_json = json.load(f)
         assert 'data' in cert_json
-        assert 'signature' in cert_json
\ No newline at end of file
+        assert 'signature' in cert_json
+
+def test_cert_paths_sanitize_device_paths():
+    from src.cert_gen import cert_paths
+    assert cert_paths('/dev/sda', 'out')['pdf'] == 'out/dev_sda_cert.pdf'
+
+def test_generate_full_cert_into_store(temp_gen, tmp_path):
+    from src.cert_store import CertStore
+    store = CertStore(str(tmp_path / 'certs'))
+    cert = temp_gen.generate_full_cert('/dev/sda', 'DoD 3-Pass', store=store)
+    assert os.path.getsize(cert['pdf']) > 0
+    document = store.document(cert['cert_id'])
+    assert temp_gen.verify_signature(document['data'], bytes.fromhex(document['signature']))
+    result = temp_gen.generate_batch(['/dev/sdb', '/dev/sdc'], 'DoD 3-Pass', max_workers=1,
+                                     merkle=True, store=store)
+    assert 'merkle' in store.document(result['certs'][0]['cert_id'])
+    assert len(store.query(method='DoD 3-Pass')[0]) == 3
+    store.close()
+
+def test_generate_batch(temp_gen):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = temp_gen.generate_batch(["dev_a", "dev_b", "dev_c"], "DoD 3-Pass", tmpdir, max_workers=2)
+        assert len(result['certs']) == 3
+        assert set(result['timings']) == {'sign', 'render', 'write', 'total'}
+        for cert_files in result['certs']:
+            assert os.path.getsize(cert_files['pdf']) > 0
+            assert os.path.getsize(cert_files['qr']) > 0
+            with open(cert_files['json'], 'r') as f:
+                cert_json = json.load(f)
+            assert temp_gen.verify_signature(cert_json['data'], bytes.fromhex(cert_json['signature']))
+
+def test_generate_batch_extras(temp_gen, tmp_path):
+    extras = [{'passes': [{'pattern': 'zeros'}], 'purge': {'action': 'overwrite'}}, None]
+    result = temp_gen.generate_batch(["dev_a", "dev_b"], "DoD 3-Pass", str(tmp_path),
+                                     max_workers=1, extras=extras)
+    datas = []
+    for cert_files in result['certs']:
+        with open(cert_files['json']) as f:
+            datas.append(json.loads(json.load(f)['data']))
+    assert datas[0]['passes'] == [{'pattern': 'zeros'}]
+    assert datas[0]['purge'] == {'action': 'overwrite'}
+    assert 'purge' not in datas[1]
+    with pytest.raises(ValueError):
+        temp_gen.generate_batch(["dev_a"], "DoD 3-Pass", str(tmp_path), extras=[])
+
+def test_merkle_batch_signature(temp_gen):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        result = temp_gen.generate_batch(["dev_a", "dev_b", "dev_c"], "DoD 3-Pass", tmpdir,
+                                         max_workers=1, merkle=True)
+        certs = []
+        for cert_files in result['certs']:
+            with open(cert_files['json'], 'r') as f:
+                certs.append(json.load(f))
+    # One signature covers the whole batch
+    assert len({c['signature'] for c in certs}) == 1
+    for cert_json in certs:
+        sig = bytes.fromhex(cert_json['signature'])
+        assert temp_gen.verify_signature(cert_json['data'], sig, cert_json['merkle'])
+        # Per-cert verification of a root signature must fail
+        assert not temp_gen.verify_signature(cert_json['data'], sig)
+        assert not temp_gen.verify_signature(cert_json['data'] + "x", sig, cert_json['merkle'])
+
+def test_compact_qr_payload(temp_gen):
+    from src.cert_gen import qr_payload, render_qr
+    from src.compact import b45decode, b45encode, cert_document, decode_payload
+    assert b45encode(b'ietf!') == 'QED8WEX0' and b45decode('QED8WEX0') == b'ietf!'
+    data = temp_gen.generate_data("/dev/sda", "DoD 3-Pass", extra={'verification': {'mode': 'sample'}})
+    json_str, sig = temp_gen.sign_data(data)
+    payload = qr_payload(json_str, sig)
+    document = cert_document(json_str, sig)
+    assert len(render_qr(payload)) < len(render_qr(json.dumps(document)))
+    assert set(payload) <= set('0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:')
+    assert temp_gen.verify_compact(payload, document)
+    # Wrong document, tampered data, garbage
+    other = cert_document(*temp_gen.sign_data(temp_gen.generate_data("/dev/sdb", "DoD 3-Pass")))
+    assert not temp_gen.verify_compact(payload, other)
+    assert not temp_gen.verify_compact(payload, {**document, 'data': json_str + ' '})
+    assert not temp_gen.verify_compact('SW:not base45!', document)
+    assert decode_payload(payload)['version'] == 1
@@ -0,0 +1,81 @@
+import json
+import os
+import pytest
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+from src.cert_store import CertStore, RenderCache
+
+@pytest.fixture
+def store(tmp_path):
+    s = CertStore(str(tmp_path / 'certs'))
+    yield s
+    s.close()
+
+KEY = ec.generate_private_key(ec.SECP384R1())
+
+def _signed(device, timestamp, serial=None, method='DoD 3-Pass'):
+    data = {'device_id': device, 'method': method, 'timestamp': timestamp, 'status': 'Completed'}
+    if serial:
+        data['serial'] = serial
+    json_str = json.dumps(data, sort_keys=True)
+    return json_str, KEY.sign(json_str.encode(), ec.ECDSA(hashes.SHA256()))
+
+def test_put_is_content_addressed(store, tmp_path):
+    json_str, sig = _signed('/dev/sda', '2024-01-01T10:00:00', serial='S1')
+    record = store.put(json_str, sig, pdf=b'%PDF-1', qr=b'png')
+    cert_id = record['cert_id']
+    assert record['files']['json'] == os.path.join(
+        str(tmp_path / 'certs'), 'objects', cert_id[:2], cert_id[2:4], f'{cert_id}.json')
+    assert record['device'] == '/dev/sda' and record['serial'] == 'S1'
+    with open(record['files']['pdf'], 'rb') as f:
+        assert f.read() == b'%PDF-1'
+    assert store.document(cert_id) == {'data': json_str, 'signature': sig.hex()}
+    # Storing the same cert again is a no-op
+    assert store.put(json_str, sig, pdf=b'%PDF-1', qr=b'png')['id'] == record['id']
+
+def test_rewipe_keeps_earlier_cert(store):
+    first = store.put(*_signed('/dev/sda', '2024-01-01T10:00:00'), pdf=b'a')
+    second = store.put(*_signed('/dev/sda', '2024-01-02T10:00:00'), pdf=b'b')
+    assert first['files']['pdf'] != second['files']['pdf']
+    assert os.path.exists(first['files']['pdf'])
+    records, _ = store.query(device='/dev/sda')
+    assert [r['cert_id'] for r in records] == [second['cert_id'], first['cert_id']]
+
+def test_query_filters_and_cursor(store):
+    for i in range(5):
+        store.put(*_signed(f'/dev/sd{"ab"[i % 2]}', f'2024-01-0{i + 1}T00:00:00', serial=f'S{i}'))
+    json_str, sig = _signed('/dev/sdc', '2024-02-01T00:00:00', method='Zero Fill')
+    target = store.put(json_str, sig)
+    assert [r['serial'] for r in store.query(serial='S3')[0]] == ['S3']
+    assert store.query(method='Zero Fill')[0][0]['cert_id'] == target['cert_id']
+    assert store.query(signature=sig.hex())[0][0]['cert_id'] == target['cert_id']
+    assert len(store.query(since='2024-01-03', until='2024-01-05')[0]) == 2
+    page, cursor = store.query(limit=4)
+    rest, end = store.query(limit=4, cursor=cursor)
+    assert len(page) == 4 and len(rest) == 2 and end is None
+    assert store.query(limit=0) == ([], None)
+    assert store.get('0' * 64) is None
+
+def test_lazy_artifacts_render_once(tmp_path, mocker):
+    store = CertStore(str(tmp_path / 'certs'), lazy_render=True)
+    json_str, sig = _signed('/dev/sda', '2024-01-01T10:00:00')
+    cert_id = store.put(json_str, sig)['cert_id']
+    render = mocker.patch('src.cert_gen.render_qr', return_value=b'png')
+    assert store.load(cert_id, 'qr') == (b'png', 'image/png')
+    assert store.load(cert_id, 'qr') == (b'png', 'image/png')
+    render.assert_called_once()
+    assert render.call_args[0][0].startswith('SW:')
+    assert store.load(cert_id, 'exe') is None
+    assert store.load('0' * 64, 'pdf') is None
+    store.close()
+
+def test_render_cache_evicts_least_recently_used():
+    cache = RenderCache(max_bytes=10)
+    cache.put('a', b'1234')
+    cache.put('b', b'1234')
+    cache.get('a')
+    cache.put('c', b'1234')
+    assert cache.get('b') is None
+    assert cache.get('a') == b'1234' and cache.get('c') == b'1234'
+    cache.put('huge', b'x' * 11)
+    assert cache.stats()['bytes'] == 8
@@ -0,0 +1,72 @@
+import pytest
+from unittest.mock import patch
+from src import engine
+from src.checkpoint import CheckpointJournal, seed_patterns
+from src.methods import get_method
+
+@pytest.fixture
+def journal(tmp_path):
+    j = CheckpointJournal(str(tmp_path / 'journal.db'))
+    yield j
+    j.close()
+
+@pytest.fixture
+def device(tmp_path):
+    path = tmp_path / 'disk.img'
+    path.write_bytes(b'\xaa' * 8192)
+    return str(path)
+
+def test_seed_patterns():
+    seeded = seed_patterns(['fixed:00', 'random', 'random'])
+    assert seeded[0] == 'fixed:00'
+    assert all(p.startswith('random:') and len(p) == 7 + 64 for p in seeded[1:])
+    assert seeded[1] != seeded[2]
+
+def test_journal_survives_reopen(tmp_path):
+    path = str(tmp_path / 'journal.db')
+    j = CheckpointJournal(path)
+    j.start('/dev/sda', 'DoD 5220.22-M 3-Pass', ['fixed:00', 'random:' + '00' * 32], 4096)
+    j.checkpoint('/dev/sda', 1, 2048)
+    j.close()
+    record = CheckpointJournal(path).resumable('/dev/sda', 'DoD 5220.22-M 3-Pass', 4096)
+    assert (record['pass'], record['offset']) == (1, 2048)
+    assert record['patterns'][1].startswith('random:')
+
+@patch('src.engine._engine.wipe_device')
+def test_wipe_records_synced_checkpoints(mock_wipe, journal, device):
+    def fake_wipe(path, passes, progress, **kwargs):
+        progress({'pass': 1, 'passes': 3, 'bytes_written': 4096, 'bytes_total': 24576,
+                  'offset': 4096, 'synced': True})
+        progress({'pass': 2, 'passes': 3, 'bytes_written': 10240, 'bytes_total': 24576,
+                  'offset': 2048, 'synced': True})
+        raise KeyboardInterrupt  # Simulate the process dying mid-pass
+    mock_wipe.side_effect = fake_wipe
+    method = get_method('DoD 3-Pass')
+    with pytest.raises(KeyboardInterrupt):
+        engine.wipe_device(device, 3, method=method, journal=journal)
+    patterns = mock_wipe.call_args.kwargs['patterns']
+    assert patterns[2].startswith('random:')
+
+    mock_wipe.side_effect = None
+    mock_wipe.return_value = {'patterns': ['fixed:00', 'fixed:ff', 'random'],
+                              'verify_mode': 'sample', 'sectors_checked': 1}
+    result = engine.wipe_device(device, 3, method=method, journal=journal, resume=True)
+    kwargs = mock_wipe.call_args.kwargs
+    assert (kwargs['start_pass'], kwargs['start_offset']) == (1, 2048)
+    assert kwargs['patterns'] == patterns  # Same seeds as the interrupted run
+    assert engine.wipe_record(result)['resumed'] == {'pass': 2, 'offset': 2048}
+    assert journal.get(device)['status'] == 'completed'
+
+@patch('src.engine._engine.wipe_device')
+def test_resume_ignores_other_method_or_size(mock_wipe, journal, device):
+    mock_wipe.return_value = {'patterns': ['fixed:00'], 'verify_mode': 'sample', 'sectors_checked': 1}
+    journal.start(device, 'Gutmann 35-Pass', ['fixed:00'], 8192)
+    journal.checkpoint(device, 3, 4096)
+    engine.wipe_device(device, 1, method=get_method('NIST Clear'), journal=journal, resume=True)
+    assert mock_wipe.call_args.kwargs['start_pass'] == 0
+
+    journal.start(device, 'NIST 800-88 Clear', ['fixed:00'], 1 << 40)  # A different disk
+    journal.checkpoint(device, 0, 4096)
+    result = engine.wipe_device(device, 1, method=get_method('NIST Clear'), journal=journal, resume=True)
+    assert mock_wipe.call_args.kwargs['start_offset'] == 0
+    assert 'resumed' not in engine.wipe_record(result)
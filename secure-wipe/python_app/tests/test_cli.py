@@ -0,0 +1,116 @@
+import argparse
+import io
+import json
+import subprocess
+import sys
+import time
+import _thread
+from pathlib import Path
+import pytest
+from src import cli
+from src.utils import load_config
+
+def _args(manifest, **overrides):
+    values = {'manifest': str(manifest), 'yes': True, 'dry_run': False, 'jobs': 2,
+              'render': False, 'progress_interval': 0.0}
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+def _config(tmp_path):
+    config = dict(load_config())
+    config['certs'] = {'root': str(tmp_path / 'certs')}
+    config['checkpoint'] = {'path': str(tmp_path / 'journal.db')}
+    config['devices'] = {'sys_root': str(tmp_path / 'sys')}
+    return config
+
+def _lines(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+def test_yaml_manifest(tmp_path):
+    manifest = tmp_path / 'wipe.yaml'
+    manifest.write_text(
+        'defaults: {method: "Zero Fill", verify: full}\n'
+        'devices:\n'
+        '  - sdb\n'
+        '  - {device: /dev/sdc, method: "DoD 5220.22-M 3-Pass", resume: true, direct_io: false}\n'
+    )
+    specs = cli.load_manifest(str(manifest), load_config())
+    assert [s['device'] for s in specs] == ['/dev/sdb', '/dev/sdc']
+    assert specs[0]['method'].name == 'Zero Fill' and specs[0]['engine'] == {'verify': 'full'}
+    assert specs[1]['resume'] and specs[1]['engine'] == {'verify': 'full', 'direct_io': False}
+
+def test_csv_manifest_and_errors(tmp_path):
+    manifest = tmp_path / 'wipe.csv'
+    manifest.write_text('device,method,passes,resume\n/dev/sdb,Custom,2,yes\n/dev/sdc,,,\n')
+    specs = cli.load_manifest(str(manifest), load_config())
+    assert specs[0]['method'].pass_count == 2 and specs[0]['resume']
+    assert specs[1]['method'].name == load_config()['app']['default_method']
+
+    for body, error in (('device,colour\n/dev/sdb,red\n', 'Unknown manifest field'),
+                        ('device,verify\n/dev/sdb,quick\n', 'verify must be one of'),
+                        ('device\n/dev/sdb\nsdb\n', 'listed twice'),
+                        ('device,method,passes\n/dev/sdb,Custom,0\n', 'Entry 1')):
+        manifest.write_text(body)
+        with pytest.raises(ValueError, match=error):
+            cli.load_manifest(str(manifest), load_config())
+
+def test_dry_run_and_confirmation(tmp_path, capsys):
+    manifest = tmp_path / 'wipe.yaml'
+    manifest.write_text('- /dev/sdb\n')
+    assert cli.run(_args(manifest, dry_run=True), _config(tmp_path)) == cli.EXIT_OK
+    planned = _lines(capsys)
+    assert planned[0]['event'] == 'planned' and planned[0]['device'] == '/dev/sdb'
+    assert cli.run(_args(manifest, yes=False), _config(tmp_path)) == cli.EXIT_USAGE
+
+def test_run_reports_progress_and_failures(tmp_path, capsys, mocker):
+    def fake_wipe(path, passes, progress, **kwargs):
+        if path == '/dev/bad':
+            raise IOError('Device not found')
+        progress({'pass': 1, 'passes': 1, 'bytes_written': 512, 'bytes_total': 512})
+        return {'patterns': ['fixed:00'], 'verify_mode': 'sample', 'sectors_checked': 1}
+    mocker.patch('src.engine.wipe_device', side_effect=fake_wipe)
+    mocker.patch('src.engine.handle_hpa_dco')
+    mocker.patch('src.cert_gen.CertificateGenerator.generate_full_cert',
+                 return_value={'json': 'c.json', 'cert_id': 'ab', 'valid': True})
+    manifest = tmp_path / 'wipe.yaml'
+    manifest.write_text('devices: [/dev/sdb, /dev/bad]\n')
+    assert cli.run(_args(manifest), _config(tmp_path)) == cli.EXIT_FAILED
+    events = _lines(capsys)
+    by_type = {}
+    for event in events:
+        by_type.setdefault(event['event'], []).append(event)
+    assert by_type['progress'][0]['percent'] == 100.0
+    assert by_type['completed'][0]['cert_id'] == 'ab'
+    assert by_type['failed'][0]['device'] == '/dev/bad'
+    assert events[-1]['event'] == 'summary' and events[-1]['failed'] == ['/dev/bad']
+
+def test_interrupt_skips_queued_devices(tmp_path, capsys, mocker):
+    def fake_wipe(path, passes, progress, **kwargs):
+        _thread.interrupt_main()  # Ctrl-C while the first device is being written
+        while True:  # Raises WipeCancelled once the CLI sets its cancel flag
+            progress({'pass': 1, 'passes': 1, 'bytes_written': 0, 'bytes_total': 512})
+            time.sleep(0.01)
+    wipe = mocker.patch('src.engine.wipe_device', side_effect=fake_wipe)
+    execute = mocker.patch('src.purge.execute')
+    manifest = tmp_path / 'wipe.yaml'
+    manifest.write_text('devices: [/dev/sdb, /dev/sdc, /dev/sdd]\n')
+    assert cli.run(_args(manifest, jobs=1), _config(tmp_path)) == cli.EXIT_INTERRUPTED
+    assert [call.args[0] for call in wipe.call_args_list] == ['/dev/sdb']
+    execute.assert_not_called()
+    events = _lines(capsys)
+    assert [e['device'] for e in events if e['event'] == 'started'] == ['/dev/sdb']
+    assert events[-1]['event'] == 'summary' and events[-1]['completed'] == 0
+
+def test_cli_imports_no_gui_or_web_stack(tmp_path):
+    manifest = tmp_path / 'wipe.yaml'
+    manifest.write_text('- /dev/sdb\n')
+    code = (
+        'import sys\n'
+        'from src import cli\n'
+        'from src.utils import load_config\n'
+        'cli.load_manifest(sys.argv[1], load_config())\n'
+        "print([m for m in ('PyQt6', 'flask', 'reportlab', 'qrcode') if m in sys.modules])\n"
+    )
+    out = subprocess.run([sys.executable, '-c', code, str(manifest)], capture_output=True,
+                         text=True, cwd=Path(__file__).resolve().parents[1], check=True).stdout
+    assert out.strip() == '[]'
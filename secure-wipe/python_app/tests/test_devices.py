@@ -0,0 +1,69 @@
+import os
+import pytest
+from src.devices import DeviceInventory, format_size
+
+def make_disk(sys_root, name, sectors, model=None, serial=None, rotational='0', bus='pci0000:00/0000:00:1f.2/ata1'):
+    block = sys_root / 'block' / name
+    target = sys_root / 'devices' / bus / name
+    (target / 'queue').mkdir(parents=True)
+    (target / 'device').mkdir()
+    (target / 'size').write_text(f'{sectors}\n')
+    (target / 'removable').write_text('0\n')
+    (target / 'queue' / 'rotational').write_text(rotational + '\n')
+    if model:
+        (target / 'device' / 'model').write_text(model + '\n')
+    if serial:
+        (target / 'device' / 'serial').write_text(serial + '\n')
+    block.parent.mkdir(exist_ok=True)
+    os.symlink(target, block)
+
+@pytest.fixture
+def sys_root(tmp_path):
+    make_disk(tmp_path, 'sda', 1953525168, model='WDC WD10EZEX', rotational='1')
+    make_disk(tmp_path, 'nvme0n1', 1000215216, model='Samsung SSD 980', serial='S64ANS0T')
+    make_disk(tmp_path, 'loop0', 2048)
+    return tmp_path
+
+def test_inventory_reads_block_devices(sys_root):
+    inventory = DeviceInventory(sys_root=str(sys_root))
+    devices = {d.name: d for d in inventory.devices()}
+    assert set(devices) == {'nvme0n1', 'sda'}  # loop devices are ignored
+    sda = devices['sda']
+    assert sda.path == '/dev/sda'
+    assert sda.size_bytes == 1953525168 * 512
+    assert sda.rotational is True and sda.transport == 'ata'
+    nvme = devices['nvme0n1'].to_dict()
+    assert nvme['nvme'] and nvme['serial'] == 'S64ANS0T' and nvme['rotational'] is False
+    assert inventory.get('/dev/sda') is sda
+
+def test_refresh_is_incremental(sys_root, mocker):
+    inventory = DeviceInventory(sys_root=str(sys_root))
+    inventory.refresh()
+    changes = []
+    inventory.add_listener(lambda added, removed: changes.append((added, removed)))
+    read = mocker.spy(inventory, '_read_device')
+    make_disk(sys_root, 'sdb', 2048, bus='pci0000:00/usb1/1-1')
+    os.unlink(sys_root / 'block' / 'sda')
+    assert inventory.refresh() == (['sdb'], ['sda'])
+    read.assert_called_once_with('sdb')  # Known disks are not re-read
+    assert changes == [(['sdb'], ['sda'])]
+    assert inventory.get('sdb').transport == 'usb'
+    assert inventory.refresh() == ([], [])
+
+def test_poll_watcher_picks_up_hotplug(sys_root, mocker):
+    mocker.patch.dict('sys.modules', {'pyudev': None})  # Force the polling fallback
+    inventory = DeviceInventory(sys_root=str(sys_root), poll_interval=0.01)
+    inventory.watch()
+    try:
+        make_disk(sys_root, 'sdc', 4096)
+        for _ in range(500):
+            if inventory.get('sdc'):
+                break
+            inventory._stop.wait(0.01)
+        assert inventory.get('sdc').size_bytes == 4096 * 512
+    finally:
+        inventory.stop()
+
+def test_format_size():
+    assert format_size(512) == '512 B'
+    assert format_size(1000204886016) == '1.0 TB'
@@ -1,9 +1,11 @@
 import pytest
-from PyQt6.QtWidgets import QApplication
+from PyQt6.QtWidgets import QApplication, QMessageBox
 from PyQt6.QtCore import QTimer
 from src.gui import SecureWipeApp
 from src.utils import load_config
 import sys
+import threading
+import time
 
 @pytest.fixture(scope="session")
 def app():
@@ -12,6 +14,12 @@ def app():
         app = QApplication(sys.argv)
     return app
 
+@pytest.fixture(autouse=True)
+def gui_config(store_config, mocker):
+    # Journal and cert store under tmp_path instead of the working directory
+    mocker.patch('src.gui.load_config', return_value=store_config)
+    return store_config
+
 def test_gui_launches(qtbot, app):
     config = load_config()
     window = SecureWipeApp()
@@ -19,14 +27,17 @@ def test_gui_launches(qtbot, app):
     window.show()
     assert window.windowTitle() == 'Secure Wipe'
     assert window.device_combo.count() > 0  # Devices loaded
+    assert not window.resume_check.isChecked()  # Resuming a journal is an explicit choice
 
 def test_theme_toggle(qtbot, app):
     window = SecureWipeApp()
     qtbot.addWidget(window)
     initial_theme = load_config()['app']['theme']
+    assert window.theme == initial_theme
     window.theme_btn.click()  # Toggle
     new_theme = 'dark' if initial_theme == 'light' else 'light'
-    assert load_config()['app']['theme'] == new_theme  # Config updated
+    assert window.theme == new_theme
+    assert load_config()['app']['theme'] == initial_theme  # Shared config untouched
 
 def test_wipe_button(qtbot, app, mocker):
     window = SecureWipeApp()
@@ -34,10 +45,115 @@ def test_wipe_button(qtbot, app, mocker):
     mocker.patch('src.gui.engine.wipe_device')  # Mock wipe
     mocker.patch('src.gui.engine.handle_hpa_dco')
     mocker.patch('src.gui.CertificateGenerator.generate_full_cert')
+    window.device_list.clearSelection()
     window.device_combo.addItem('/dev/mock')
     window.device_combo.setCurrentText('/dev/mock')
     # Simulate confirm dialog
-    mocker.patch('PyQt6.QtWidgets.QMessageBox.exec', return_value=1)  # Yes
+    mocker.patch('src.gui.QMessageBox.question', return_value=QMessageBox.StandardButton.Yes)
     window.wipe_btn.click()
-    # Check log (indirect: no crash)
-    assert True  # Passes if no exception
\ No newline at end of file
+    # Wipe runs on a worker thread; the window stays responsive meanwhile
+    qtbot.waitUntil(lambda: not window.workers, timeout=5000)
+    assert window.progress_rows['/dev/mock'][1].text() == 'Completed'
+
+def test_wipe_cancel(qtbot, app, mocker):
+    window = SecureWipeApp()
+    qtbot.addWidget(window)
+    def slow_wipe(path, passes, progress, **kwargs):
+        for i in range(1000):
+            progress({'pass': 1, 'passes': 1, 'bytes_written': i, 'bytes_total': 1000})
+            time.sleep(0.01)
+    mocker.patch('src.gui.engine.wipe_device', side_effect=slow_wipe)
+    hpa = mocker.patch('src.gui.engine.handle_hpa_dco')
+    window.start_wipe('/dev/mock')
+    qtbot.waitUntil(lambda: window.progress_rows['/dev/mock'][0].value() > 0, timeout=5000)
+    window.cancel_wipe('/dev/mock')
+    qtbot.waitUntil(lambda: not window.workers, timeout=5000)
+    assert window.progress_rows['/dev/mock'][1].text() == 'Cancelled'
+    hpa.assert_not_called()
+def test_wipe_queued_behind_busy_controller(qtbot, app, mocker):
+    window = SecureWipeApp()
+    qtbot.addWidget(window)
+    release = threading.Event()
+    def blocking_wipe(path, passes, progress, **kwargs):
+        release.wait(5)
+        return {'patterns': [], 'verify_mode': 'none', 'sectors_checked': 0}
+    mocker.patch('src.gui.engine.wipe_device', side_effect=blocking_wipe)
+    mocker.patch('src.gui.engine.handle_hpa_dco')
+    mocker.patch('src.gui.CertificateGenerator.generate_full_cert')
+    mocker.patch.object(window.scheduler, 'try_acquire', side_effect=[True, False, True])
+    window.start_wipe('/dev/mock1')
+    window.start_wipe('/dev/mock2')
+    assert window.queued == ['/dev/mock2']
+    assert window.progress_rows['/dev/mock2'][1].text() == 'Queued (controller busy)'
+    release.set()
+    qtbot.waitUntil(lambda: not window.workers and not window.queued, timeout=5000)
+    assert window.progress_rows['/dev/mock2'][1].text() == 'Completed'
+
+
+def test_save_certificate_renders_pdf(qtbot, app, mocker, tmp_path):
+    window = SecureWipeApp()
+    qtbot.addWidget(window)
+    window.certs['/dev/mock'] = 'ab' * 32
+    load = mocker.patch.object(window.cert_store, 'load', return_value=(b'%PDF-1', 'application/pdf'))
+    target = tmp_path / 'cert.pdf'
+    mocker.patch('src.gui.QFileDialog.getSaveFileName', return_value=(str(target), ''))
+    window.device_list.clearSelection()
+    window.device_combo.addItem('/dev/mock')
+    window.device_combo.setCurrentText('/dev/mock')
+    window.save_cert_btn.click()
+    load.assert_called_once_with('ab' * 32, 'pdf')
+    assert target.read_bytes() == b'%PDF-1'
+
+
+def test_save_certificate_missing_from_store(qtbot, app, mocker, tmp_path):
+    window = SecureWipeApp()
+    qtbot.addWidget(window)
+    window.certs['/dev/mock'] = 'cd' * 32
+    mocker.patch.object(window.cert_store, 'load', return_value=None)
+    target = tmp_path / 'cert.pdf'
+    mocker.patch('src.gui.QFileDialog.getSaveFileName', return_value=(str(target), ''))
+    critical = mocker.patch('src.gui.QMessageBox.critical')
+    window.device_list.clearSelection()
+    window.device_combo.addItem('/dev/mock')
+    window.device_combo.setCurrentText('/dev/mock')
+    window.save_cert_btn.click()
+    critical.assert_called_once()
+    assert not target.exists()
+
+
+def test_close_does_not_block_on_uncancellable_wipe(qtbot, app, mocker):
+    window = SecureWipeApp()
+    qtbot.addWidget(window)
+    window.show()
+    release = threading.Event()
+    def erase(path, passes, progress, **kwargs):
+        release.wait(5)  # Like a hardware erase: no progress events to cancel at
+        return {'patterns': [], 'verify_mode': 'none', 'sectors_checked': 0}
+    mocker.patch('src.gui.engine.wipe_device', side_effect=erase)
+    mocker.patch('src.gui.engine.handle_hpa_dco')
+    mocker.patch('src.gui.CertificateGenerator.generate_full_cert')
+    window.start_wipe('/dev/mock')
+    start = time.monotonic()
+    assert not window.close()
+    assert time.monotonic() - start < 0.5  # No wait on the worker thread
+    assert window.isVisible()
+    release.set()
+    qtbot.waitUntil(lambda: not window.isVisible(), timeout=5000)
+
+
+def test_close_cancels_wipe_and_closes_when_it_stops(qtbot, app, mocker):
+    window = SecureWipeApp()
+    qtbot.addWidget(window)
+    window.show()
+    writes = []
+    def overwrite(path, passes, progress, **kwargs):
+        while True:  # Stops when the cancelled worker raises from its progress callback
+            writes.append(path)
+            progress({'pass': 1, 'passes': 1, 'bytes_written': 0, 'bytes_total': 512})
+            time.sleep(0.01)
+    mocker.patch('src.gui.engine.wipe_device', side_effect=overwrite)
+    window.start_wipe('/dev/mock')
+    qtbot.waitUntil(lambda: bool(writes), timeout=5000)
+    assert not window.close()
+    qtbot.waitUntil(lambda: not window.isVisible(), timeout=5000)
+    assert not window.workers
@@ -0,0 +1,122 @@
+import threading
+import pytest
+from src.jobs import JobManager, JobStore, RunnerLock
+from src.progress import WipeCancelled
+
+@pytest.fixture
+def manager():
+    m = JobManager(max_workers=2)
+    yield m
+    m.shutdown()
+
+def test_job_runs_all_devices(manager):
+    finished = []
+    manager.add_listener(finished.append)
+    job = manager.submit(['/dev/sda', '/dev/sdb'], lambda job, d: {'device': d})
+    assert manager.wait(job.id, timeout=5)
+    assert job.state == 'completed' and finished == [job]
+    assert [t.result['device'] for t in job.tasks] == ['/dev/sda', '/dev/sdb']
+
+def test_failed_device_reported(manager):
+    def wipe(job, device):
+        if device == '/dev/bad':
+            raise IOError('Device not found')
+        return {}
+    job = manager.submit(['/dev/sda', '/dev/bad'], wipe)
+    assert manager.wait(job.id, timeout=5)
+    assert job.state == 'failed'
+    states = {t['device']: t['state'] for t in job.to_dict()['devices']}
+    assert states == {'/dev/sda': 'completed', '/dev/bad': 'failed'}
+
+def test_concurrency_is_bounded(manager):
+    running = []
+    peak = []
+    lock = threading.Lock()
+    release = threading.Event()
+    def wipe(job, device):
+        with lock:
+            running.append(device)
+            peak.append(len(running))
+        release.wait(1)
+        with lock:
+            running.remove(device)
+    job = manager.submit([f'/dev/sd{c}' for c in 'abcde'], wipe)
+    release.set()
+    assert manager.wait(job.id, timeout=5)
+    assert max(peak) <= 2
+
+def test_store_shares_jobs_and_resumes_interrupted(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    owner = JobManager(max_workers=2, store=store)
+    started = threading.Event()
+    def wipe(job, device):
+        started.set()
+        while not owner.stopping.is_set():
+            owner.stopping.wait(0.01)
+        raise WipeCancelled(device)
+    job = owner.submit(['/dev/sda'], wipe, params={'method': 'NIST Clear'})
+    assert started.wait(5)
+    assert owner.drain(timeout=5)
+    assert store.get(job.id).state == 'interrupted'
+
+    recorder = JobManager(max_workers=1, store=store)
+    recorder.runner = False
+    queued = recorder.submit(['/dev/sdb'], None, params={'method': 'NIST Clear'})
+    assert recorder.get(queued.id).state == 'pending'
+
+    runner = JobManager(max_workers=2, store=store)
+    calls = []
+    def make_func(params, resume):
+        return lambda job, device: calls.append((device, params['method'], resume))
+    assert runner.adopt(make_func) == 2
+    assert runner.wait(job.id, timeout=5) and runner.wait(queued.id, timeout=5)
+    assert sorted(calls) == [('/dev/sda', 'NIST Clear', True), ('/dev/sdb', 'NIST Clear', False)]
+    assert store.get(job.id).state == 'completed'
+    assert runner.adopt(make_func) == 0
+    for m in (owner, recorder, runner):
+        m.shutdown()
+
+def test_finished_jobs_are_served_from_store(tmp_path):
+    manager = JobManager(max_workers=1, store=JobStore(str(tmp_path / 'jobs.db')), keep_finished=1)
+    jobs = []
+    for device in ('/dev/sda', '/dev/sdb', '/dev/sdc'):
+        jobs.append(manager.submit([device], lambda job, d: {'device': d}))
+        assert manager.wait(jobs[-1].id, timeout=5)
+    assert [manager.is_local(job.id) for job in jobs] == [False, False, True]
+    old = manager.get(jobs[0].id)
+    assert old is not jobs[0] and old.state == 'completed'
+    assert old.tasks[0].result == {'device': '/dev/sda'}
+    assert manager.wait(jobs[0].id, timeout=1)
+    assert len(manager.list()) == 3
+    manager.shutdown()
+
+def test_other_process_follows_progress_through_store(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    recorder = JobManager(max_workers=1, store=JobStore(path))
+    recorder.runner = False
+    runner = JobManager(max_workers=1, store=JobStore(path), progress_interval=60)
+    release = threading.Event()
+    def make_func(params, resume):
+        def wipe(job, device):
+            for written in (10, 20, 100):
+                runner.record_progress(job, device, {'bytes_written': written, 'bytes_total': 100})
+            release.wait(5)
+        return wipe
+    job = recorder.submit(['/dev/sda'], None)
+    assert runner.adopt(make_func) == 1
+    assert not recorder.is_local(job.id) and runner.is_local(job.id)
+    assert not recorder.wait(job.id, timeout=0.2, poll_interval=0.05)
+    # Throttled to the first event, plus the final one
+    assert recorder.store.progress(job.id)['/dev/sda']['bytes_written'] == 100
+    release.set()
+    assert recorder.wait(job.id, timeout=5, poll_interval=0.05)
+    assert recorder.get(job.id).state == 'completed'
+    for m in (recorder, runner):
+        m.shutdown()
+
+def test_runner_lock_is_exclusive(tmp_path):
+    path = str(tmp_path / 'jobs.lock')
+    first, second = RunnerLock(path), RunnerLock(path)
+    assert first.acquire()
+    assert first.acquire()
+    assert not second.acquire()
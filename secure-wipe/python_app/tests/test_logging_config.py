@@ -0,0 +1,47 @@
+import io
+import json
+import logging
+import queue
+from src.logging_config import (
+    DeferredQueueHandler, JsonFormatter, ProgressSampler, get_logger
+)
+
+def make_record(msg, *args, **extra):
+    record = logging.LogRecord('secure_wipe.engine', logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+def test_json_formatter_includes_extras():
+    line = JsonFormatter().format(make_record('Wipe completed: %s', '/dev/sda', device='/dev/sda',
+                                              data={'passes': 3}))
+    entry = json.loads(line)
+    assert entry['message'] == 'Wipe completed: /dev/sda'
+    assert entry['level'] == 'INFO' and entry['logger'] == 'secure_wipe.engine'
+    assert entry['device'] == '/dev/sda' and entry['data'] == {'passes': 3}
+
+def test_progress_sampler_keeps_first_and_final_per_device():
+    sampler = ProgressSampler(interval=60)
+    assert sampler.filter(make_record('plain'))
+    assert sampler.filter(make_record('p', progress=True, device='/dev/sda'))
+    assert not sampler.filter(make_record('p', progress=True, device='/dev/sda'))
+    assert sampler.filter(make_record('p', progress=True, device='/dev/sdb'))
+    assert sampler.filter(make_record('p', progress=True, final=True, device='/dev/sda'))
+
+def test_queue_handler_defers_formatting_and_drops_when_full():
+    class Expensive:
+        formatted = 0
+        def __str__(self):
+            Expensive.formatted += 1
+            return 'value'
+    handler = DeferredQueueHandler(queue.Queue(maxsize=1))
+    logger = get_logger('test-deferred')
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        logger.warning('first %s', Expensive())
+        logger.warning('second %s', Expensive())
+    finally:
+        logger.removeHandler(handler)
+    assert Expensive.formatted == 0  # Nothing formatted on the calling thread
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait().getMessage() == 'first value'
@@ -0,0 +1,43 @@
+import time
+import pytest
+from src.logstore import LogStore
+
+@pytest.fixture
+def store(tmp_path):
+    s = LogStore(str(tmp_path / 'logs.db'), flush_interval=0.05)
+    yield s
+    s.close()
+
+def test_cursor_pagination_covers_everything(store):
+    for i in range(25):
+        store.write('INFO', f'msg {i}', device=f'/dev/sd{"ab"[i % 2]}')
+    assert store.flush()
+    seen, cursor = [], None
+    while True:
+        page, cursor = store.query(limit=10, cursor=cursor)
+        seen += [e['message'] for e in page]
+        if cursor is None:
+            break
+    assert seen == [f'msg {i}' for i in reversed(range(25))]
+    assert len(list(store.iter_all(page_size=7, device='/dev/sda'))) == 13
+    assert store.query(limit=0) == ([], None)
+
+def test_time_and_level_filters(store):
+    store.write('INFO', 'old')
+    assert store.flush()
+    cutoff = time.time()
+    time.sleep(0.01)
+    store.write('ERROR', 'new', data={'code': 5})
+    assert store.flush()
+    entries, _ = store.query(since=cutoff)
+    assert [e['message'] for e in entries] == ['new']
+    assert entries[0]['data'] == {'code': 5}
+    assert [e['message'] for e in store.query(level='error')[0]] == ['new']
+    assert [e['message'] for e in store.query(until=cutoff)[0]] == ['old']
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    s = LogStore(str(tmp_path / 'logs.db'), max_queue=1, flush_interval=0.05)
+    for _ in range(1000):
+        s.write('INFO', 'burst')
+    s.close()
+    assert s.dropped > 0
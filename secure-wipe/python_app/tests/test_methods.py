@@ -0,0 +1,48 @@
+import pytest
+from unittest.mock import patch
+from src import engine
+from src.methods import WipeMethod, get_method, available_methods, describe_pattern
+
+def test_registered_pass_counts():
+    assert get_method('NIST 800-88 Clear').pass_count == 1
+    assert get_method('DoD 3-Pass').pass_count == 3
+    assert get_method('DoD 5220.22-M ECE 7-Pass').pass_count == 7
+    assert get_method('gutmann').pass_count == 35
+
+def test_dod_complement_and_labels():
+    method = get_method('DoD 5220.22-M 3-Pass')
+    assert method.engine_patterns() == ['fixed:00', 'fixed:ff', 'random']
+    assert method.labels() == ['0x00', '0xFF', 'random']
+    assert method.requires_verify
+
+def test_gutmann_multibyte_patterns():
+    patterns = get_method('Gutmann 35-Pass').engine_patterns()
+    assert patterns[:4] == ['random'] * 4 and patterns[-4:] == ['random'] * 4
+    assert patterns[6] == 'fixed:924924'
+    assert describe_pattern(patterns[6]) == '0x92 0x49 0x24'
+
+def test_unknown_method_falls_back_to_legacy_passes():
+    method = get_method('Custom 2-Pass', passes=2)
+    assert method.name == 'Custom 2-Pass'
+    assert method.engine_patterns() == ['fixed:00', 'random']
+    with pytest.raises(ValueError):
+        get_method('Custom', passes=0)
+
+def test_invalid_steps():
+    with pytest.raises(ValueError):
+        WipeMethod('Bad', ['complement'])
+    with pytest.raises(ValueError):
+        WipeMethod('Bad', ['0xZZ'])
+    assert len({m.name for m in available_methods()}) == len(available_methods())
+
+@patch('src.engine._engine.wipe_device')
+def test_engine_runs_method_patterns(mock_wipe):
+    mock_wipe.return_value = {'patterns': ['fixed:00'], 'verify_mode': 'sample', 'sectors_checked': 8}
+    result = engine.wipe_device('/dev/mock', 3, verify='none', method=get_method('NIST Clear'))
+    args, kwargs = mock_wipe.call_args
+    assert args[1] == 1
+    assert kwargs['patterns'] == ['fixed:00']
+    assert kwargs['verify'] == 'sample'  # Clear requires read-back
+    assert engine.wipe_record(result) == {
+        'passes': ['0x00'], 'verification': {'mode': 'sample', 'sectors_checked': 8}
+    }
@@ -0,0 +1,66 @@
+import pytest
+from unittest.mock import patch
+from src import engine
+from src.metrics import BYTES_WIPED, DEVICE_THROUGHPUT, PASS_DURATION, WIPES, Registry
+
+def test_exposition_format():
+    registry = Registry()
+    requests = registry.counter('test_requests_total', 'Requests.', ['path'])
+    latency = registry.histogram('test_latency_seconds', 'Latency.', buckets=(0.1, 1.0))
+    requests.inc(path='/a')
+    requests.inc(2, path='/a"b')
+    latency.observe(0.05)
+    latency.observe(5)
+    text = registry.exposition()
+    assert '# TYPE test_requests_total counter' in text
+    assert 'test_requests_total{path="/a"} 1' in text
+    assert 'test_requests_total{path="/a\\"b"} 2' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 2' in text
+    assert 'test_latency_seconds_count 2' in text
+
+def test_labels_must_match():
+    counter = Registry().counter('test_total', 'Test.', ['method'])
+    with pytest.raises(ValueError):
+        counter.inc(device='/dev/sda')
+
+def test_engine_wipe_is_metered():
+    method = 'metered-test'
+    def fake_wipe(path, passes, progress, **kwargs):
+        for pass_number in (1, 2):
+            for offset in (512, 1024):
+                progress({'pass': pass_number, 'passes': 2, 'offset': offset,
+                          'bytes_written': (pass_number - 1) * 1024 + offset, 'bytes_total': 2048})
+        series.extend(DEVICE_THROUGHPUT.expose()[2:])
+        return {}
+    series = []
+    with patch.object(engine._engine, 'wipe_device', side_effect=fake_wipe, create=True):
+        engine._run_engine('/dev/sdz', 2, method, lambda event: None)
+    assert BYTES_WIPED.value(method=method) == 2048
+    assert PASS_DURATION.count(method=method) == 2
+    assert WIPES.value(method=method, outcome='ok') == 1
+    assert any('device="/dev/sdz"' in line for line in series)
+    assert not any('/dev/sdz' in line for line in DEVICE_THROUGHPUT.expose())
+
+def test_shared_metrics_sum_workers(tmp_path):
+    import json, os, subprocess, sys
+    from src.metrics import SharedMetrics
+    def worker_registry(requests, active):
+        registry = Registry()
+        registry.counter('test_requests_total', 'Requests.', ['path']).inc(requests, path='/a')
+        registry.gauge('test_active', 'Active.').set(active)
+        registry.histogram('test_seconds', 'Latency.', buckets=(1.0,)).observe(0.5)
+        return registry
+    dead = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                          capture_output=True, text=True).stdout.strip()
+    for pid, registry in ((os.getppid(), worker_registry(2, 1)), (dead, worker_registry(3, 5))):
+        (tmp_path / f'{pid}.json').write_text(json.dumps(registry.snapshot()))
+    shared = SharedMetrics(str(tmp_path), worker_registry(1, 1))
+    text = shared.exposition()
+    assert 'test_requests_total{path="/a"} 6' in text
+    assert 'test_active 2' in text  # The exited worker's gauge is not counted
+    assert 'test_seconds_count 3' in text and 'test_seconds_bucket{le="1.0"} 3' in text
+    shared.stop()
+    assert 'test_active' not in (tmp_path / f'{os.getpid()}.json').read_text()
+    SharedMetrics.reset(str(tmp_path))
+    assert not list(tmp_path.glob('*.json'))
@@ -0,0 +1,33 @@
+from src.progress import ProgressBroker, ProgressTracker
+
+def test_tracker_adds_rate_and_eta():
+    tracker = ProgressTracker('/dev/sda')
+    event = tracker.update({'pass': 1, 'passes': 3, 'bytes_written': 250, 'bytes_total': 1000})
+    assert event['device'] == '/dev/sda'
+    assert event['percent'] == 25.0
+    assert event['throughput_mbps'] >= 0
+    assert event['eta_seconds'] is not None
+
+def test_broker_replays_latest_and_drops_when_full():
+    broker = ProgressBroker(maxsize=2)
+    broker.publish('job', {'device': '/dev/sda', 'percent': 10})
+    q = broker.subscribe('job')
+    assert q.get_nowait()['percent'] == 10
+    for pct in (20, 30, 40):
+        broker.publish('job', {'device': '/dev/sda', 'percent': pct})
+    assert [q.get_nowait()['percent'] for _ in range(2)] == [30, 40]
+    broker.unsubscribe('job', q)
+    assert broker.latest('job')[0]['percent'] == 40
+
+def test_broker_forgets_finished_jobs():
+    broker = ProgressBroker()
+    broker.publish('idle', {'device': '/dev/sda', 'percent': 100})
+    broker.finish('idle')
+    assert broker.latest('idle') == []
+
+    broker.publish('job', {'device': '/dev/sda', 'percent': 100})
+    q = broker.subscribe('job')
+    broker.finish('job')
+    assert broker.latest('job')[0]['percent'] == 100  # Kept for the client still attached
+    broker.unsubscribe('job', q)
+    assert broker.latest('job') == [] and broker._latest == {} and broker._finished == set()
@@ -0,0 +1,107 @@
+import os
+import threading
+from types import SimpleNamespace
+import pytest
+from src.jobs import JobManager
+from src.scheduler import DeviceScheduler, controller_group
+
+HBA = 'pci0000:00/0000:00:1f.2/ata{n}/host{n}/target{n}:0:0/{n}:0:0:0/block/{name}'
+HUB = 'pci0000:00/0000:00:14.0/usb2/2-1/2-1.{n}/2-1.{n}:1.0/host{n}/block/{name}'
+SWITCH = 'pci0000:00/0000:00:01.0/0000:01:00.0/0000:02:0{n}.0/0000:0{m}:00.0/nvme/nvme{n}/{name}'
+
+def make_disk(sys_root, name, path):
+    target = sys_root / 'devices' / path
+    target.mkdir(parents=True)
+    (sys_root / 'block').mkdir(exist_ok=True)
+    os.symlink(target, sys_root / 'block' / name)
+
+@pytest.fixture
+def sys_root(tmp_path):
+    for n, name in enumerate(['sda', 'sdb'], 1):
+        make_disk(tmp_path, name, HBA.format(n=n, name=name))
+    for n, name in enumerate(['sdc', 'sdd'], 5):
+        make_disk(tmp_path, name, HUB.format(n=n, name=name))
+    for n in range(2):
+        make_disk(tmp_path, f'nvme{n}n1', SWITCH.format(n=n, m=n + 3, name=f'nvme{n}n1'))
+    return str(tmp_path)
+
+def test_controller_groups(sys_root):
+    hba, transport = controller_group('/dev/sda', sys_root)
+    assert transport == 'ata' and hba.endswith('0000:00:1f.2')
+    assert controller_group('/dev/sdb', sys_root)[0] == hba
+    hub, transport = controller_group('/dev/sdc', sys_root)
+    assert transport == 'usb' and hub.endswith('usb2/2-1')
+    assert controller_group('sdd', sys_root)[0] == hub
+    switch, transport = controller_group('nvme0n1', sys_root)
+    assert transport == 'nvme' and switch.endswith('0000:01:00.0')
+    assert controller_group('nvme1n1', sys_root)[0] == switch
+    assert controller_group('/dev/missing', sys_root) == ('unknown:missing', 'other')
+
+def test_cap_per_group(sys_root):
+    scheduler = DeviceScheduler(limits={'usb': 1}, sys_root=sys_root)
+    assert scheduler.try_acquire('/dev/sdc')
+    assert not scheduler.try_acquire('/dev/sdd')  # Same hub
+    assert scheduler.try_acquire('/dev/sda')  # Different controller
+    freed = []
+    scheduler.add_listener(lambda: freed.append(True))
+    scheduler.release('/dev/sdc')
+    assert freed and scheduler.try_acquire('/dev/sdd')
+
+@pytest.fixture
+def clock(mocker):
+    now = [0.0]
+    mocker.patch('src.scheduler.time', SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+def _ata_group(scheduler):
+    return next(g for g in scheduler.groups() if g['transport'] == 'ata')
+
+def test_cap_adapts_to_throughput(sys_root, clock):
+    scheduler = DeviceScheduler(limits={'ata': 1}, adapt_interval=0, recover_periods=2,
+                                sys_root=sys_root)
+    assert scheduler.try_acquire('sda')
+    scheduler.observe('sda', 0)
+    clock[0] = 1.0
+    scheduler.observe('sda', 200_000_000)  # Alone and saturating the cap: probe one more
+    assert scheduler.try_acquire('sdb')
+    scheduler.observe('sdb', 0)
+    clock[0] = 2.0
+    scheduler.observe('sda', 305_000_000)  # The recent rate, not the 152 MB/s average
+    scheduler.observe('sdb', 105_000_000)  # Two writers barely beat one: back off
+    group = _ata_group(scheduler)
+    assert group['cap'] == 1 and group['throughput_mbps'] == 210.0
+
+    # The lowered ceiling is probed again after recover_periods calm adjustments
+    scheduler.release('sdb')
+    for second in (3.0, 4.0):
+        clock[0] = second
+        scheduler.observe('sda', int(305_000_000 + (second - 2) * 200_000_000))
+    assert _ata_group(scheduler)['cap'] == 2
+
+def test_rates_are_smoothed_over_the_adapt_interval(sys_root, clock):
+    scheduler = DeviceScheduler(adapt=False, adapt_interval=5.0, sys_root=sys_root)
+    assert scheduler.try_acquire('sda')
+    scheduler.observe('sda', 0)
+    clock[0] = 1.0
+    scheduler.observe('sda', 100_000_000)
+    clock[0] = 6.0
+    scheduler.observe('sda', 100_000_000)  # Stalled for one interval: ~63% of the way to 0
+    assert _ata_group(scheduler)['throughput_mbps'] == pytest.approx(36.79, abs=0.01)
+
+def test_job_manager_respects_groups(sys_root):
+    scheduler = DeviceScheduler(limits={'usb': 1, 'ata': 2}, adapt=False, sys_root=sys_root)
+    manager = JobManager(max_workers=4, scheduler=scheduler)
+    running, peak_usb = set(), []
+    lock = threading.Lock()
+    def wipe(job, device):
+        with lock:
+            running.add(device)
+            peak_usb.append(len(running & {'/dev/sdc', '/dev/sdd'}))
+        threading.Event().wait(0.05)
+        with lock:
+            running.discard(device)
+    job = manager.submit(['/dev/sdc', '/dev/sdd', '/dev/sda', '/dev/sdb'], wipe)
+    assert manager.wait(job.id, timeout=5)
+    manager.shutdown()
+    assert job.state == 'completed'
+    assert max(peak_usb) == 1
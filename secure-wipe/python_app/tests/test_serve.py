@@ -0,0 +1,12 @@
+from api.serve import gunicorn_options
+from src.utils import load_config
+
+def test_gunicorn_options_follow_config():
+    config = load_config()
+    options = gunicorn_options(config)
+    assert options['bind'] == f"{config['api']['host']}:{config['api']['port']}"
+    assert options['workers'] == config['serve']['workers']
+    assert options['threads'] == config['serve']['threads']
+    assert options['worker_class'] == 'gthread'
+    assert options['preload_app'] is False
+    assert callable(options['post_worker_init']) and callable(options['worker_exit'])
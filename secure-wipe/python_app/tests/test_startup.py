@@ -0,0 +1,36 @@
+from pathlib import Path
+import pytest
+from src.startup import profile_imports
+
+APP_DIR = Path(__file__).resolve().parents[1]
+
+# Cold-import budgets in seconds; generous enough for a loaded CI runner
+BUDGETS = {
+    'src.cli': 1.0,
+    'src.gui': 2.0,
+    'api.app': 2.0,
+}
+# The API imports ..src, so it only imports as part of the python_app package
+PACKAGED = {'api.app': 'python_app.api.app'}
+# Loaded on first use only
+DEFERRED = ('reportlab', 'qrcode', 'cryptography', 'psutil', 'secure_wipe_engine',
+            'requests_oauthlib', 'concurrent.futures.process')
+
+@pytest.mark.parametrize('module', sorted(BUDGETS))
+def test_startup_budget(module):
+    name = PACKAGED.get(module, module)
+    cwd = APP_DIR.parent if module in PACKAGED else APP_DIR
+    total, entries = profile_imports(name, cwd=cwd)
+    loaded = {e['module'] for e in entries}
+    assert name in loaded
+    assert not [m for m in loaded if m.startswith(DEFERRED)]
+    slowest = sorted(entries, key=lambda e: e['self_ms'], reverse=True)[:5]
+    assert total < BUDGETS[module], f'{module} took {total:.2f}s; slowest: {slowest}'
+
+def test_generator_reads_keys_on_first_use(mocker):
+    from src.cert_gen import CertificateGenerator
+    load = mocker.patch('src.cert_gen.load_private_key')
+    gen = CertificateGenerator()
+    load.assert_not_called()
+    gen.private_key
+    load.assert_called_once_with(gen.private_path)
@@ -0,0 +1,26 @@
+import os
+import yaml
+from src.utils import FileCache, load_config, file_cache
+
+def test_file_cache_hits_until_file_changes(tmp_path):
+    cache = FileCache()
+    path = tmp_path / 'settings.yaml'
+    path.write_text('value: 1\n')
+    assert cache.get(path, yaml.safe_load) == {'value': 1}
+    assert cache.get(path, yaml.safe_load) == {'value': 1}
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'entries': 1}
+
+    path.write_text('value: 22\n')
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert cache.get(path, yaml.safe_load) == {'value': 22}
+    assert cache.stats()['misses'] == 2
+
+def test_load_config_is_cached():
+    first = load_config()
+    hits = file_cache.stats()['hits']
+    second = load_config()
+    assert file_cache.stats()['hits'] == hits + 1
+    assert second == first and second is not first
+    second['app']['theme'] = 'changed'
+    assert load_config()['app']['theme'] == first['app']['theme']
@@ -0,0 +1,52 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from src.cert_gen import CertificateGenerator
+from src.utils import load_config
+from src.verifier import BulkVerifier
+
+def _items():
+    gen = CertificateGenerator()
+    json_str, sig = gen.sign_data(gen.generate_data('/dev/sda', 'NIST Clear'))
+    good = {'json_data': json_str, 'signature_hex': sig.hex()}
+    bad = {'json_data': json_str + ' ', 'signature_hex': sig.hex()}
+    return [good, bad, good, {'error': 'malformed line'}, good]
+
+def test_pool_verifies_in_order():
+    verifier = BulkVerifier(load_config()['keys']['public_path'], max_workers=2, chunk_size=2)
+    try:
+        results = list(verifier.verify_iter(_items()))
+        # Workers come from a forkserver, not a fork of this multithreaded process
+        assert verifier._pool._mp_context.get_start_method() == 'forkserver'
+    finally:
+        verifier.shutdown()
+    assert [r['valid'] for r in results] == [True, False, True, False, True]
+    assert results[3]['error'] == 'malformed line'
+
+class BreakingPool:
+    """Answers the first chunk, then fails like a pool whose worker died."""
+
+    def __init__(self):
+        self.submitted = 0
+        self.shut_down = False
+
+    def submit(self, func, chunk):
+        future = Future()
+        self.submitted += 1
+        if self.submitted == 1:
+            future.set_result([{'valid': True} for _ in chunk])
+        else:
+            future.set_exception(BrokenProcessPool('worker died'))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+def test_broken_pool_fails_the_items_left(mocker):
+    verifier = BulkVerifier('unused.pem', max_workers=1, chunk_size=2)
+    verifier.max_workers = 2
+    pool = BreakingPool()
+    verifier._pool = pool
+    results = list(verifier.verify_iter({'n': i} for i in range(7)))
+    assert [r['valid'] for r in results] == [True, True] + [False] * 5
+    assert all('worker died' in r['error'] for r in results[2:])
+    assert pool.shut_down and verifier._pool is None
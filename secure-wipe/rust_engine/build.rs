@@ -1,10 +1,8 @@
 fn main() {
-    // Custom build hooks: Link platform-specific libs if needed
-    // Example for Linux hdparm (add to Cargo.toml if using external C libs)
-    #[cfg(target_os = "linux")]
-    println!("cargo:rustc-link-lib=hdparm");
+    // Custom build hooks: Link platform-specific libs if needed.
+    // hdparm is run as a command (handle_hpa_dco), so nothing is linked for it on Linux.
 
     // For Windows: Link winapi if added to deps
     #[cfg(target_os = "windows")]
     println!("cargo:rustc-link-lib=advapi32");
-}
\ No newline at end of file
+}
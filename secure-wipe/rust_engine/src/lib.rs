@@ -1,62 +1,552 @@
 use pyo3::prelude::*;
-use sysinfo::{System, SystemExt, Disks};
-use rand::Rng;
-use std::fs::File;
-use std::io::{Read, Write, Seek, SeekFrom};
+use pyo3::types::PyDict;
+use sysinfo::Disks;
+use rand::{Rng, RngCore};
+use rand_chacha::ChaCha20Rng;
+use rand_chacha::rand_core::SeedableRng;
+use std::alloc::{alloc_zeroed, dealloc, handle_alloc_error, Layout};
+use std::collections::HashMap;
+use std::fs::{File, OpenOptions};
+use std::io::{self, Read, Write, Seek, SeekFrom};
+use std::ops::{Deref, DerefMut};
 use std::path::Path;
-use anyhow::Result as AnyhowResult;
+use std::ptr::NonNull;
+use std::slice;
+use std::sync::mpsc::sync_channel;
+use std::thread;
+use std::time::{Duration, Instant};
 
 // Detect available devices (mount points)
 #[pyfunction]
-fn detect_devices() -> PyResult<Vec<String>> {
-    let s = System::new_all();
+pub fn detect_devices() -> PyResult<Vec<String>> {
     let disks: Vec<String> = Disks::new_with_refreshed_list()
+        .list()
         .iter()
         .map(|disk| disk.mount_point().to_string_lossy().to_string())
         .collect();
     Ok(disks)
 }
 
-// Wipe device with multi-pass (zero/random data)
-#[pyfunction]
-fn wipe_device(path: String, passes: u32) -> PyResult<()> {
-    let mut rng = rand::thread_rng();
-    let full_path = Path::new(&path);
-    if !full_path.exists() {
-        return Err(PyErr::new::<pyo3::exceptions::PyIOError, _>("Device not found"));
+// ---- Streaming writer -------------------------------------------------------
+// Writes whole devices in large aligned chunks with constant memory. Random
+// passes are double-buffered: a filler thread generates the next chunk with
+// ChaCha20 while the current one is written.
+
+// Default write chunk: big enough to keep the drive streaming, small enough for flat memory
+pub const DEFAULT_CHUNK_SIZE: usize = 4 << 20;
+// O_DIRECT needs buffer addresses, offsets and lengths aligned to the logical block size
+const ALIGN: usize = 4096;
+// Report progress at most once per this many bytes (plus at pass ends)
+const PROGRESS_STEP: u64 = 1 << 20;
+
+pub enum Pattern {
+    Fixed(Vec<u8>),    // Byte sequence repeated from offset 0
+    Random([u8; 32]),  // ChaCha20 seed
+}
+
+impl Pattern {
+    // Parse "random", "random:<64 hex seed>" or "fixed:<hex bytes>" as sent by the
+    // Python side. An explicit seed lets an interrupted random pass be resumed.
+    pub fn parse(spec: &str) -> Result<Pattern, String> {
+        if spec == "random" {
+            return Ok(Pattern::Random(rand::random()));
+        }
+        if let Some(hex) = spec.strip_prefix("random:") {
+            let seed: [u8; 32] = parse_hex(hex)
+                .and_then(|bytes| bytes.try_into().ok())
+                .ok_or_else(|| format!("Invalid random seed: {}", spec))?;
+            return Ok(Pattern::Random(seed));
+        }
+        let hex = spec.strip_prefix("fixed:").ok_or_else(|| format!("Unknown pattern: {}", spec))?;
+        match parse_hex(hex) {
+            Some(bytes) if !bytes.is_empty() => Ok(Pattern::Fixed(bytes)),
+            _ => Err(format!("Invalid fixed pattern: {}", spec)),
+        }
+    }
+
+    // Inverse of `parse`, reported back so certificates list what actually ran
+    pub fn label(&self) -> String {
+        match self {
+            Pattern::Fixed(bytes) => {
+                let hex: String = bytes.iter().map(|b| format!("{:02x}", b)).collect();
+                format!("fixed:{}", hex)
+            }
+            Pattern::Random(_) => "random".to_string(),
+        }
     }
+}
 
-    let mut file = File::options().write(true).open(full_path)?;
+fn parse_hex(hex: &str) -> Option<Vec<u8>> {
+    if hex.len() % 2 != 0 || !hex.is_ascii() {
+        return None;
+    }
+    (0..hex.len()).step_by(2).map(|i| u8::from_str_radix(&hex[i..i + 2], 16).ok()).collect()
+}
 
-    // Get size
-    file.seek(SeekFrom::End(0))?;
-    let size = file.seek(SeekFrom::Current(0))? as usize;
+// Legacy sequence: first pass zeros, later passes fresh random data
+pub fn default_patterns(passes: u32) -> Vec<Pattern> {
+    (0..passes)
+        .map(|pass| if pass == 0 { Pattern::Fixed(vec![0]) } else { Pattern::Random(rand::random()) })
+        .collect()
+}
 
-    // Multi-pass wipe
-    for pass in 0..passes {
-        file.seek(SeekFrom::Start(0))?;
-        let mut buffer = vec![0u8; size / 1024];  // Simplified buffer (adjust for full size)
-        if pass > 0 {
-            rng.fill(&mut buffer);
+// Smallest chunk size >= `chunk_size` that is ALIGN-aligned and a multiple of every
+// fixed pattern length, so each chunk starts at pattern phase 0 and one buffer serves all
+fn chunk_size_for(patterns: &[Pattern], chunk_size: usize) -> usize {
+    let gcd = |mut a: usize, mut b: usize| {
+        while b != 0 {
+            (a, b) = (b, a % b);
         }
-        // Write in chunks (for large devices)
-        for chunk in buffer.chunks_mut(1024) {
-            file.write_all(chunk)?;
+        a
+    };
+    let unit = patterns.iter().fold(ALIGN, |unit, p| match p {
+        Pattern::Fixed(bytes) => unit / gcd(unit, bytes.len()) * bytes.len(),
+        Pattern::Random(_) => unit,
+    });
+    chunk_size.max(unit).div_ceil(unit) * unit
+}
+
+fn fill_fixed(bytes: &[u8], offset: u64, buf: &mut [u8]) {
+    let phase = (offset % bytes.len() as u64) as usize;
+    for (b, p) in buf.iter_mut().zip(bytes.iter().cycle().skip(phase)) {
+        *b = *p;
+    }
+}
+
+pub struct Progress {
+    pub pass: u32,
+    pub passes: u32,
+    pub written: u64,
+    pub total: u64,
+    pub offset: u64,   // Bytes of the current pass written so far
+    pub synced: bool,  // Everything before `offset` has reached stable storage
+}
+
+// Where to pick up an interrupted wipe, and how often to make progress durable
+#[derive(Clone, Copy, Default)]
+pub struct Resume {
+    pub pass: usize,
+    pub offset: u64,
+    pub sync_every: Option<Duration>,
+}
+
+// Zero-initialised heap buffer with ALIGN alignment, suitable for O_DIRECT
+struct AlignedBuf {
+    ptr: NonNull<u8>,
+    len: usize,
+}
+
+unsafe impl Send for AlignedBuf {}
+
+impl AlignedBuf {
+    fn new(len: usize) -> Self {
+        let layout = Layout::from_size_align(len, ALIGN).expect("valid buffer layout");
+        let ptr = unsafe { alloc_zeroed(layout) };
+        let ptr = NonNull::new(ptr).unwrap_or_else(|| handle_alloc_error(layout));
+        AlignedBuf { ptr, len }
+    }
+}
+
+impl Deref for AlignedBuf {
+    type Target = [u8];
+    fn deref(&self) -> &[u8] {
+        unsafe { slice::from_raw_parts(self.ptr.as_ptr(), self.len) }
+    }
+}
+
+impl DerefMut for AlignedBuf {
+    fn deref_mut(&mut self) -> &mut [u8] {
+        unsafe { slice::from_raw_parts_mut(self.ptr.as_ptr(), self.len) }
+    }
+}
+
+impl Drop for AlignedBuf {
+    fn drop(&mut self) {
+        let layout = Layout::from_size_align(self.len, ALIGN).expect("valid buffer layout");
+        unsafe { dealloc(self.ptr.as_ptr(), layout) }
+    }
+}
+
+// Open for writing, with O_DIRECT when requested and supported.
+// Returns the file and whether O_DIRECT is actually in effect.
+fn open_for_write(path: &Path, direct_io: bool) -> io::Result<(File, bool)> {
+    #[cfg(target_os = "linux")]
+    if direct_io {
+        use std::os::unix::fs::OpenOptionsExt;
+        // Some filesystems (e.g. tmpfs) reject O_DIRECT; fall back to buffered writes
+        if let Ok(file) = OpenOptions::new().write(true).custom_flags(libc::O_DIRECT).open(path) {
+            return Ok((file, true));
         }
     }
+    let _ = direct_io;
+    Ok((OpenOptions::new().write(true).open(path)?, false))
+}
 
-    // Verify (read back)
-    file.seek(SeekFrom::Start(0))?;
-    let mut verify_buf = vec![0u8; size / 1024];
-    file.read_exact(&mut verify_buf)?;
+struct PassWriter<'a> {
+    path: &'a Path,
+    file: File,
+    direct: bool,
+    tail: Option<File>,
+}
 
-    Ok(())
+impl PassWriter<'_> {
+    // Write one chunk at `offset` (the file position is already there)
+    fn write_chunk(&mut self, offset: u64, data: &[u8]) -> io::Result<()> {
+        if !self.direct || data.len() % ALIGN == 0 {
+            return self.file.write_all(data);
+        }
+        // O_DIRECT can't write a partial block: finish the device tail through a buffered handle
+        let aligned = data.len() - data.len() % ALIGN;
+        self.file.write_all(&data[..aligned])?;
+        if self.tail.is_none() {
+            self.tail = Some(OpenOptions::new().write(true).open(self.path)?);
+        }
+        let tail = self.tail.as_mut().unwrap();
+        tail.seek(SeekFrom::Start(offset + aligned as u64))?;
+        tail.write_all(&data[aligned..])
+    }
+
+    fn sync(&mut self) -> io::Result<()> {
+        self.file.sync_data()?;
+        drop_cache(&self.file);
+        if let Some(tail) = self.tail.as_mut() {
+            tail.sync_data()?;
+            drop_cache(tail);
+        }
+        Ok(())
+    }
+}
+
+// Evict written pages so a buffered read-back has to come from the media
+fn drop_cache(file: &File) {
+    #[cfg(target_os = "linux")]
+    unsafe {
+        use std::os::unix::io::AsRawFd;
+        libc::posix_fadvise(file.as_raw_fd(), 0, 0, libc::POSIX_FADV_DONTNEED);
+    }
+    let _ = file;
+}
+
+// Run every pass over the whole device, starting at `resume`; fdatasync at each
+// pass boundary and every `resume.sync_every`, reporting those points as synced.
+// `on_progress` errors abort the wipe between chunks. Returns the device size.
+pub fn stream_passes<E, F>(
+    path: &Path, patterns: &[Pattern], chunk_size: usize, direct_io: bool, resume: Resume,
+    mut on_progress: F,
+) -> Result<u64, E>
+where
+    E: From<io::Error>,
+    F: FnMut(&Progress) -> Result<(), E>,
+{
+    let chunk_size = chunk_size_for(patterns, chunk_size);
+    let (file, direct) = open_for_write(path, direct_io)?;
+    let mut writer = PassWriter { path, file, direct, tail: None };
+    let size = writer.file.seek(SeekFrom::End(0))?;
+    let passes = patterns.len() as u32;
+    let total = size * passes as u64;
+    // Fixed-pattern buffers are built once and shared by every pass using that pattern
+    let mut fixed_bufs: HashMap<&[u8], AlignedBuf> = HashMap::new();
+    let mut last_sync = Instant::now();
+    let mut sync_due = move || match resume.sync_every {
+        Some(every) if last_sync.elapsed() >= every => {
+            last_sync = Instant::now();
+            true
+        }
+        _ => false,
+    };
+
+    for (pass, pattern) in patterns.iter().enumerate().skip(resume.pass) {
+        let base = size * pass as u64;
+        // Resume on a chunk boundary so fixed patterns stay in phase
+        let begin = if pass == resume.pass {
+            (resume.offset / chunk_size as u64 * chunk_size as u64).min(size)
+        } else {
+            0
+        };
+        let mut last_report = begin;
+        let mut report = |done: u64, synced: bool| -> Result<(), E> {
+            if synced || done - last_report >= PROGRESS_STEP {
+                last_report = done;
+                on_progress(&Progress {
+                    pass: pass as u32, passes, written: base + done, total, offset: done, synced,
+                })?;
+            }
+            Ok(())
+        };
+        writer.file.seek(SeekFrom::Start(begin))?;
+        match pattern {
+            Pattern::Fixed(bytes) => {
+                let buf = fixed_bufs.entry(bytes.as_slice()).or_insert_with(|| {
+                    let mut buf = AlignedBuf::new(chunk_size);
+                    if bytes.iter().any(|&b| b != 0) {
+                        fill_fixed(bytes, 0, &mut buf);
+                    }
+                    buf
+                });
+                let mut offset = begin;
+                while offset < size {
+                    let n = (size - offset).min(chunk_size as u64) as usize;
+                    writer.write_chunk(offset, &buf[..n])?;
+                    offset += n as u64;
+                    if offset < size {
+                        let synced = sync_due();
+                        if synced {
+                            writer.sync()?;
+                        }
+                        report(offset, synced)?;
+                    }
+                }
+            }
+            Pattern::Random(seed) => {
+                let seed = *seed;
+                thread::scope(|scope| -> Result<(), E> {
+                    let (empty_tx, empty_rx) = sync_channel::<AlignedBuf>(2);
+                    let (full_tx, full_rx) = sync_channel::<AlignedBuf>(2);
+                    for _ in 0..2 {
+                        empty_tx.send(AlignedBuf::new(chunk_size)).expect("filler channel open");
+                    }
+                    scope.spawn(move || {
+                        let mut rng = ChaCha20Rng::from_seed(seed);
+                        rng.set_word_pos((begin / 4) as u128);
+                        for mut buf in empty_rx {
+                            rng.fill_bytes(&mut buf);
+                            if full_tx.send(buf).is_err() {
+                                break;
+                            }
+                        }
+                    });
+                    let mut offset = begin;
+                    while offset < size {
+                        let buf = full_rx.recv().expect("filler thread alive");
+                        let n = (size - offset).min(chunk_size as u64) as usize;
+                        writer.write_chunk(offset, &buf[..n])?;
+                        offset += n as u64;
+                        if offset < size {
+                            let synced = sync_due();
+                            if synced {
+                                writer.sync()?;
+                            }
+                            report(offset, synced)?;
+                        }
+                        // Hand the buffer back for refilling; the filler exits once we drop empty_tx
+                        let _ = empty_tx.send(buf);
+                    }
+                    Ok(())
+                })?;
+            }
+        }
+        writer.sync()?;
+        on_progress(&Progress {
+            pass: pass as u32, passes, written: base + size, total, offset: size, synced: true,
+        })?;
+    }
+    Ok(size)
+}
+
+// ---- Read-back verification -----------------------------------------------
+// Expected data is regenerated from the pass pattern (ChaCha20 is seekable),
+// so nothing written has to be kept in memory.
+
+// Sectors reported to certificates are 512-byte logical sectors
+pub const SECTOR_SIZE: u64 = 512;
+// Size of each randomly placed block read in sample mode
+const SAMPLE_BLOCK: u64 = 64 * 1024;
+
+#[derive(Clone, Copy)]
+pub enum VerifyMode {
+    None,
+    Sample(f64),  // Fraction of the device to read back
+    Full,
+}
+
+// Fill `buf` with the bytes `pattern` wrote starting at `offset` (a multiple of 4)
+fn expected_at(pattern: &Pattern, offset: u64, buf: &mut [u8]) {
+    match pattern {
+        Pattern::Fixed(bytes) => fill_fixed(bytes, offset, buf),
+        Pattern::Random(seed) => {
+            let mut rng = ChaCha20Rng::from_seed(*seed);
+            rng.set_word_pos((offset / 4) as u128);
+            rng.fill_bytes(buf);
+        }
+    }
+}
+
+// Regions (offset, length) to read back. Sample mode is stratified: the device
+// is split into equal strata and one aligned block is picked at random in each.
+fn verify_regions(size: u64, chunk_size: usize, mode: VerifyMode) -> Box<dyn Iterator<Item = (u64, usize)>> {
+    match mode {
+        VerifyMode::None => Box::new(std::iter::empty()),
+        VerifyMode::Full => Box::new(
+            (0..size).step_by(chunk_size).map(move |o| (o, (size - o).min(chunk_size as u64) as usize)),
+        ),
+        VerifyMode::Sample(fraction) => {
+            let blocks = size.div_ceil(SAMPLE_BLOCK);
+            let samples = ((blocks as f64 * fraction.clamp(0.0, 1.0)).ceil() as u64).min(blocks);
+            let mut rng = rand::thread_rng();
+            Box::new((0..samples).map(move |i| {
+                let start = i * size / samples;
+                let end = (i + 1) * size / samples;
+                let span = end - start;
+                let len = span.min(SAMPLE_BLOCK);
+                let offset = (start + rng.gen_range(0..=span - len)) / ALIGN as u64 * ALIGN as u64;
+                (offset, len as usize)
+            }))
+        }
+    }
+}
+
+// Open for reading, bypassing the page cache when O_DIRECT was requested
+fn open_for_read(path: &Path, direct_io: bool) -> io::Result<(File, bool)> {
+    #[cfg(target_os = "linux")]
+    if direct_io {
+        use std::os::unix::fs::OpenOptionsExt;
+        if let Ok(file) = OpenOptions::new().read(true).custom_flags(libc::O_DIRECT).open(path) {
+            return Ok((file, true));
+        }
+    }
+    let _ = direct_io;
+    Ok((File::open(path)?, false))
+}
+
+// Read back the regions selected by `mode` and compare them with the last
+// pass pattern. Returns the number of bytes checked.
+pub fn verify_pass(
+    path: &Path, pattern: &Pattern, size: u64, chunk_size: usize, direct_io: bool, mode: VerifyMode,
+) -> io::Result<u64> {
+    let chunk_size = chunk_size_for(slice::from_ref(pattern), chunk_size);
+    let (mut file, direct) = open_for_read(path, direct_io)?;
+    let mut buffered: Option<File> = None;
+    let mut actual = AlignedBuf::new(chunk_size.max(SAMPLE_BLOCK as usize));
+    let mut expected = vec![0u8; actual.len()];
+    let mut checked = 0u64;
+    for (offset, len) in verify_regions(size, chunk_size, mode) {
+        let buf = &mut actual[..len];
+        if direct && offset % ALIGN as u64 == 0 && len % ALIGN == 0 {
+            file.seek(SeekFrom::Start(offset))?;
+            file.read_exact(buf)?;
+        } else {
+            // Unaligned tail: O_DIRECT can't read it, use a buffered handle
+            if buffered.is_none() {
+                buffered = Some(File::open(path)?);
+            }
+            let handle = buffered.as_mut().unwrap();
+            handle.seek(SeekFrom::Start(offset))?;
+            handle.read_exact(buf)?;
+        }
+        expected_at(pattern, offset, &mut expected[..len]);
+        if buf[..] != expected[..len] {
+            return Err(io::Error::new(
+                io::ErrorKind::InvalidData,
+                format!("Verification failed in block at offset {}", offset),
+            ));
+        }
+        checked += len as u64;
+    }
+    Ok(checked)
+}
+
+// ---- Python bindings -------------------------------------------------------
+
+// Invoke the optional Python progress callback, re-acquiring the GIL only for the call.
+// An exception raised by the callback aborts the wipe (used for cancellation).
+fn report_progress(progress: Option<&PyObject>, p: &Progress) -> PyResult<()> {
+    let Some(callback) = progress else { return Ok(()) };
+    Python::with_gil(|py| {
+        let event = PyDict::new(py);
+        event.set_item("pass", p.pass + 1)?;
+        event.set_item("passes", p.passes)?;
+        event.set_item("bytes_written", p.written)?;
+        event.set_item("bytes_total", p.total)?;
+        event.set_item("offset", p.offset)?;
+        event.set_item("synced", p.synced)?;
+        callback.call1(py, (event,))?;
+        Ok(())
+    })
+}
+
+pub struct WipeReport {
+    pub device_size: u64,
+    pub bytes_checked: u64,
+}
+
+fn parse_verify_mode(verify: &str, fraction: f64) -> PyResult<VerifyMode> {
+    match verify {
+        "none" => Ok(VerifyMode::None),
+        "sample" => Ok(VerifyMode::Sample(fraction)),
+        "full" => Ok(VerifyMode::Full),
+        _ => Err(PyErr::new::<pyo3::exceptions::PyValueError, _>(
+            format!("Unknown verify mode: {} (expected none, sample or full)", verify),
+        )),
+    }
+}
+
+// Wipe device with the given pass patterns ("fixed:<hex>" / "random"), or the
+// legacy zero-then-random sequence of `passes` passes, then read back per `verify`.
+// Returns a dict summarising what was written and checked.
+#[pyfunction]
+#[pyo3(signature = (
+    path, passes, progress=None, chunk_size=DEFAULT_CHUNK_SIZE, direct_io=false,
+    verify="sample", verify_fraction=0.01, patterns=None, start_pass=0, start_offset=0,
+    checkpoint_interval=0.0
+))]
+fn wipe_device(
+    py: Python, path: String, passes: u32, progress: Option<PyObject>,
+    chunk_size: usize, direct_io: bool, verify: &str, verify_fraction: f64,
+    patterns: Option<Vec<String>>, start_pass: usize, start_offset: u64, checkpoint_interval: f64,
+) -> PyResult<PyObject> {
+    let mode = parse_verify_mode(verify, verify_fraction)?;
+    let resume = Resume {
+        pass: start_pass,
+        offset: start_offset,
+        sync_every: (checkpoint_interval > 0.0).then(|| Duration::from_secs_f64(checkpoint_interval)),
+    };
+    let patterns = match patterns {
+        Some(specs) => specs
+            .iter()
+            .map(|spec| Pattern::parse(spec))
+            .collect::<Result<Vec<_>, _>>()
+            .map_err(PyErr::new::<pyo3::exceptions::PyValueError, _>)?,
+        None => default_patterns(passes),
+    };
+    let labels: Vec<String> = patterns.iter().map(Pattern::label).collect();
+    let passes = patterns.len() as u32;
+    // Release the GIL so wipes started from Python worker threads run in parallel
+    let report = py.allow_threads(move || {
+        wipe_path(&path, &patterns, progress.as_ref(), chunk_size, direct_io, mode, resume)
+    })?;
+    let result = PyDict::new(py);
+    result.set_item("device_size", report.device_size)?;
+    result.set_item("passes", passes)?;
+    result.set_item("patterns", labels)?;
+    result.set_item("bytes_written", report.device_size * passes as u64)?;
+    result.set_item("verify_mode", verify)?;
+    result.set_item("bytes_checked", report.bytes_checked)?;
+    result.set_item("sectors_checked", report.bytes_checked.div_ceil(SECTOR_SIZE))?;
+    Ok(result.to_object(py))
+}
+
+pub fn wipe_path(
+    path: &str, patterns: &[Pattern], progress: Option<&PyObject>, chunk_size: usize, direct_io: bool,
+    verify: VerifyMode, resume: Resume,
+) -> PyResult<WipeReport> {
+    let full_path = Path::new(path);
+    if !full_path.exists() {
+        return Err(PyErr::new::<pyo3::exceptions::PyIOError, _>("Device not found"));
+    }
+    // Random seeds live in the patterns so the last pass can be regenerated for verification
+    let device_size =
+        stream_passes(full_path, patterns, chunk_size, direct_io, resume, |p| report_progress(progress, p))?;
+    let bytes_checked = match patterns.last() {
+        Some(last) => verify_pass(full_path, last, device_size, chunk_size, direct_io, verify)?,
+        None => 0,
+    };
+    Ok(WipeReport { device_size, bytes_checked })
 }
 
 // HPA/DCO handling (platform-specific)
 #[cfg(target_os = "linux")]
 #[pyfunction]
-fn handle_hpa_dco(path: String) -> PyResult<()> {
+pub fn handle_hpa_dco(path: String) -> PyResult<()> {
     use std::process::Command;
     let status = Command::new("hdparm")
         .args(["--user-master", "u", "--security-erase-enhanced", &path])
@@ -69,7 +559,7 @@ fn handle_hpa_dco(path: String) -> PyResult<()> {
 
 #[cfg(target_os = "windows")]
 #[pyfunction]
-fn handle_hpa_dco(path: String) -> PyResult<()> {
+pub fn handle_hpa_dco(path: String) -> PyResult<()> {
     // Placeholder: Use diskpart or winapi (add winapi crate for full)
     Err(PyErr::new::<pyo3::exceptions::PyNotImplementedError, _>(
         "Windows HPA: Implement via diskpart script"
@@ -78,7 +568,7 @@ fn handle_hpa_dco(path: String) -> PyResult<()> {
 
 #[cfg(target_os = "macos")]
 #[pyfunction]
-fn handle_hpa_dco(path: String) -> PyResult<()> {
+pub fn handle_hpa_dco(path: String) -> PyResult<()> {
     use std::process::Command;
     let status = Command::new("diskutil")
         .args(["secureErase", "0", &path])  // Level 0 for zero-fill
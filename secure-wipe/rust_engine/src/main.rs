@@ -1,7 +1,7 @@
 use std::env;
 use std::process;
 
-mod lib;  // Import functions from lib.rs
+use secure_wipe_engine as lib;  // The engine library crate (lib.rs)
 
 fn main() {
     let args: Vec<String> = env::args().collect();
@@ -13,7 +13,7 @@ fn main() {
     let path = &args[1];
     let passes: u32 = args[2].parse().expect("Invalid passes number");
 
-    match lib::wipe_device(path.to_string(), passes) {
+    match lib::wipe_path(path, &lib::default_patterns(passes), None, lib::DEFAULT_CHUNK_SIZE, true, lib::VerifyMode::Sample(0.01), lib::Resume::default()) {
         Ok(_) => {
             println!("Wipe completed on {}", path);
             // Handle HPA/DCO